@@ -1,22 +1,23 @@
+import time
+_STARTED = time.perf_counter() # Startup is timed from here (the interpreter's own start-up isn't counted)
+
 import tkinter as tk
 from tkinter import ttk
 import os
-import subprocess
-import shutil  # For shutil.which to find Java
 import uuid    # For generating UUIDs for offline play
 import random  # For slightly varying player name
+import threading
+
+# Everything below is light; the engine itself (http.client, ssl, zipfile, ...) is
+# imported on a worker thread the first time it is needed, see _get_engine.
+# minecraft-launcher-lib isn't needed any more, the engine installs and launches by itself
+from mineengine import trace
+from mineengine.errors import Cancelled, VersionNotFound
+from mineengine.session import load_snapshot, save_snapshot
+from mineengine.tasks import TaskRunner
+from mineengine.uibus import UiBus
 
-# Try to import the library, guide user if not found
-try:
-    import minecraft_launcher_lib
-except ImportError:
-    # This message will print to console if the library isn't installed.
-    # A GUI pop-up would be more user-friendly in a real app.
-    print("喵! Error: minecraft-launcher-lib is not installed!")
-    print("Please install it by running: pip install minecraft-launcher-lib")
-    # Consider exiting or disabling functionality if critical
-    # For this example, we'll let it proceed and error out if functions are called.
-    # exit() # Uncomment to exit if the library is critical for startup
+SESSION_NAME = "launcher1" # Snapshot of the last session, so the list is there at once
 
 class AdvancedMinecraftLauncher:
     def __init__(self, root):
@@ -24,7 +25,14 @@ class AdvancedMinecraftLauncher:
         root.title("Cute & Advanced Minecraft Launcher 喵~")
         root.minsize(450, 300) # A bit more space for messages
 
-        self.version_var = tk.StringVar()
+        # The last session's list and pick; usable right away while the real list is fetched
+        snapshot = load_snapshot(SESSION_NAME)
+        self.startup = trace.begin("startup", start=_STARTED, app=SESSION_NAME, snapshot=bool(snapshot))
+        self.window_ready = None
+        self.versions = [] # Ids listed in the combobox
+        self.latest_release = snapshot.get("latest")
+
+        self.version_var = tk.StringVar(value=snapshot.get("version", ""))
         self.status_var = tk.StringVar()
         self.status_var.set("Ready, nya~ Fetch versions to start!")
 
@@ -41,12 +49,18 @@ class AdvancedMinecraftLauncher:
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=1, column=0, columnspan=2, pady=10)
 
-        ttk.Button(button_frame, text="Refresh Versions 喵!", command=self.fetch_versions_from_lib).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Refresh Versions 喵!", command=lambda: self.fetch_versions_thread(force=True)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Download/Install Version", command=self.install_selected_version).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Launch Game Purr!", command=self.launch_selected_game).pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_install, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Rescan Java", command=self.rescan_java).pack(side=tk.LEFT, padx=5)
+
+        self.progress_bar = ttk.Progressbar(main_frame, mode="determinate")
+        self.progress_bar.grid(row=2, column=0, columnspan=2, padx=5, sticky="ew")
 
         self.status_label = ttk.Label(main_frame, textvariable=self.status_var, wraplength=400, justify=tk.LEFT)
-        self.status_label.grid(row=2, column=0, columnspan=2, padx=5, pady=10, sticky="w")
+        self.status_label.grid(row=3, column=0, columnspan=2, padx=5, pady=10, sticky="w")
 
         main_frame.grid_columnconfigure(1, weight=1) # Make combobox expand
 
@@ -56,128 +70,185 @@ class AdvancedMinecraftLauncher:
         os.makedirs(self.minecraft_dir, exist_ok=True)
         print(f"Purr! Minecraft directory set to: {self.minecraft_dir}")
 
-        # Callbacks for minecraft-launcher-lib progress updates
-        self.install_callbacks = {
-            "setStatus": self._set_status_callback,
-            "setProgress": self._set_progress_callback,
-            # "setMax": self._set_max_progress_callback # Optional, if using a determinate progress bar
-        }
-        self.current_operation_status = "" # Stores the current operation text for progress updates
+        # Workers post progress here; the Tk thread repaints the latest values on a timer
+        self.bus = UiBus(root)
+        self.bus.subscribe("status", self.status_var.set)
+        self.bus.subscribe("progress_max", lambda value: self.progress_bar.config(maximum=max(value, 1)))
+        self.bus.subscribe("progress", lambda value: self.progress_bar.config(value=value))
+        # Callbacks for install progress updates (setMax drives the determinate progress bar)
+        self.install_callbacks = self.bus.callbacks(status_prefix="Status: ")
+        # Shared fetch/install/launch engine (manifest, Java registry and launch plans are all cached);
+        # built on first use by a worker thread
+        self.engine = None
+        self._engine_lock = threading.Lock()
+        # Fetches, installs and launches all run on one asyncio loop with a small shared pool:
+        # a repeated Refresh joins the running fetch, a new install supersedes the old one, Cancel stops installs
+        self.tasks = TaskRunner()
 
-        if 'minecraft_launcher_lib' in globals(): # Check if import was successful
-            self.fetch_versions_from_lib() # Fetch versions on startup
+        if snapshot.get("versions"):
+            self._show_versions(snapshot["versions"], self.latest_release, "Welcome back, nya~ Checking for new versions...")
         else:
-            self.status_var.set("Error: minecraft-launcher-lib not found. Please install it. Meow...")
+            self.status_var.set("Fetching version manifest, nya~...")
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+        root.after(0, self._on_first_frame)
+        # Fetch versions on startup, in the background; under "versions" so a Refresh meanwhile joins it
+        self.tasks.submit("versions", trace.bind(self._startup_task, parent=self.startup))
+
+    def _get_engine(self):
+        # Worker threads only: the first call imports and builds the engine (~0.1 s)
+        with self._engine_lock:
+            if self.engine is None:
+                from mineengine.engine import LauncherEngine
+                engine = LauncherEngine()
+                engine.supervisor.on_exit = self._on_game_exit
+                self.engine = engine
+            return self.engine
+
+    def _on_first_frame(self):
+        self.root.update_idletasks() # Paint the snapshot before taking the time
+        self.window_ready = time.perf_counter()
+        trace.record("startup.window", _STARTED, self.window_ready, parent=self.startup,
+                     versions=len(self.versions))
 
-    def _update_ui(self):
-        """Forces UI update."""
-        self.root.update_idletasks()
+    def _startup_task(self, operation):
+        try:
+            with trace.span("startup.engine"):
+                self._get_engine()
+            try:
+                self._versions_fetched(self._fetch_versions_task(operation))
+            except Exception as e:
+                self._versions_failed(e)
+        finally:
+            self.bus.call(self._startup_done)
+
+    def _startup_done(self):
+        self.startup.finish() # One "startup" line in metrics.jsonl per start
+        if self.window_ready:
+            print(f"Purr! Window ready in {self.window_ready - _STARTED:.2f}s")
+        self.save_session()
 
-    def _set_status_callback(self, text):
-        self.current_operation_status = text
-        self.status_var.set(f"Status: {text}")
-        self._update_ui()
+    def save_session(self):
+        save_snapshot(SESSION_NAME, {
+            "versions": self.versions,
+            "latest": self.latest_release,
+            "version": self.version_var.get(),
+        })
 
-    def _set_progress_callback(self, value):
-        # This assumes value is an integer from 0 to 100.
-        self.status_var.set(f"Status: {self.current_operation_status} (Progress: {value}%)")
-        self._update_ui()
+    def on_close(self):
+        self.save_session()
+        # Downloads stop at their next chunk and nothing gets launched once the window is gone
+        self.tasks.cancel_all()
+        self.root.destroy()
+
+    def _on_game_exit(self, instance):
+        # Called from the supervisor's monitor thread
+        if instance.state == "crashed":
+            last_lines = "\n".join(line for _, line in instance.log.lines(last=3))
+            self.bus.post("status", f"Minecraft crashed ({instance.reason}), oh noes...\n{last_lines}")
+        else:
+            self.bus.post("status", f"Minecraft closed after {instance.uptime() / 60:.0f} min. Bye bye, meow~")
 
-    def fetch_versions_from_lib(self):
-        if 'minecraft_launcher_lib' not in globals():
-            self.status_var.set("Cannot fetch versions, library missing. Meow :(")
+    def fetch_versions_thread(self, force=False):
+        if self.tasks.running("versions") is not None:
+            # The startup fetch (or an earlier Refresh) is still running; its list shows up when it's done
+            self.status_var.set("Already fetching the version manifest, nya~...")
             return
-            
         self.status_var.set("Fetching version manifest, nya~...")
-        self._update_ui()
-        try:
-            version_list = minecraft_launcher_lib.utils.get_version_list()
-            versions = [v['id'] for v in version_list] # Show all types: release, snapshot, etc.
-            self.version_combo['values'] = versions
-            if versions:
-                latest_release = minecraft_launcher_lib.utils.get_latest_version().get("release")
-                if latest_release and latest_release in versions:
-                    self.version_var.set(latest_release)
-                elif self.version_combo['values']: # Fallback to first if latest not found
-                    self.version_combo.current(0)
-            self.status_var.set("Version manifest fetched! Select a version, purr.")
-        except Exception as e:
-            self.status_var.set(f"Error fetching manifest: {str(e)} Meow...")
-        self._update_ui()
+        self.tasks.submit("versions", self._fetch_versions_task, force,
+                          on_result=self._versions_fetched, on_error=self._versions_failed)
 
-    def install_selected_version(self):
-        if 'minecraft_launcher_lib' not in globals():
-            self.status_var.set("Cannot install, library missing. Sad meow :(")
-            return
+    def _fetch_versions_task(self, operation, force=False):
+        # Cached copy is used when fresh; "Refresh" forces a (conditional) revalidation
+        manifest = self._get_engine().manifest_cache.get_manifest(force=force)
+        versions = [v['id'] for v in manifest["versions"]] # Show all types: release, snapshot, etc.
+        return versions, manifest.get("latest", {}).get("release")
+
+    def _versions_fetched(self, result):
+        versions, latest_release = result
+        self.bus.call(self._show_versions, versions, latest_release, "Version manifest fetched! Select a version, purr.")
+
+    def _versions_failed(self, error):
+        self.bus.post("status", f"Error fetching manifest: {str(error)} Meow...")
+
+    def _show_versions(self, versions, latest_release, status):
+        # Runs on the Tk thread; keeps the user's pick when it is still listed
+        self.versions = versions
+        self.latest_release = latest_release
+        self.version_combo['values'] = versions
+        if versions and self.version_var.get() not in versions:
+            if latest_release and latest_release in versions:
+                self.version_var.set(latest_release)
+            else: # Fallback to first if latest not found
+                self.version_combo.current(0)
+        self.status_var.set(status)
 
+    def install_selected_version(self):
         selected_version = self.version_var.get()
         if not selected_version:
             self.status_var.set("Nyah! Please select a version first.")
             return
 
         self.status_var.set(f"Preparing to install {selected_version} into {self.minecraft_dir}...")
-        self._update_ui()
+        self.cancel_button.config(state=tk.NORMAL)
+        # Installing another version before this one is done cancels this one
+        self.tasks.submit("install", self._install_task, selected_version,
+                          on_cancel=lambda: self.bus.call(self.cancel_button.config, state=tk.DISABLED))
 
+    def _install_task(self, operation, selected_version):
         try:
-            minecraft_launcher_lib.install.install_minecraft_version(
-                versionid=selected_version,
-                minecraft_directory=self.minecraft_dir,
-                callback=self.install_callbacks
-            )
-            self.status_var.set(f"Version {selected_version} installed successfully! Purrrrfect!")
-        except minecraft_launcher_lib.exceptions.VersionNotFound:
-            self.status_var.set(f"Error: Version {selected_version} not found by the library. Meow :(")
+            self._get_engine().install(selected_version, self.minecraft_dir, callback=operation.callbacks(self.install_callbacks))
+            self.bus.post("status", f"Version {selected_version} installed successfully! Purrrrfect!")
+        except Cancelled:
+            # Big half-done files keep a resume journal, so installing again continues from here
+            self.bus.post("status", f"Install of {selected_version} cancelled. Installing again picks up where it stopped, nya~")
+        except VersionNotFound:
+            self.bus.post("status", f"Error: Version {selected_version} not found by the library. Meow :(")
         except Exception as e:
-            self.status_var.set(f"Error installing {selected_version}: {str(e)}. Aww...")
-        self._update_ui()
+            self.bus.post("status", f"Error installing {selected_version}: {str(e)}. Aww...")
+        finally:
+            if self.tasks.running("install") in (None, operation): # Not already replaced by a newer install
+                self.bus.call(self.cancel_button.config, state=tk.DISABLED)
 
-    def launch_selected_game(self):
-        if 'minecraft_launcher_lib' not in globals():
-            self.status_var.set("Cannot launch, library missing. Meow :(")
-            return
+    def cancel_install(self):
+        if self.tasks.cancel("install"):
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set("Cancelling the install... nya~")
 
+    def rescan_java(self):
+        # Searches the whole machine again, for a JDK installed since the runtimes were cached
+        self.status_var.set("Looking for Java again, nya~...")
+        self.tasks.submit("java", self._rescan_java_task,
+                          on_result=lambda note: self.bus.post("status", note),
+                          on_error=lambda e: self.bus.post("status", f"Java rescan failed: {e}"))
+
+    def _rescan_java_task(self, operation):
+        runtimes = self._get_engine().java_registry.invalidate([self.minecraft_dir])
+        majors = sorted({info["major"] for info in runtimes.values()})
+        return f"Java found (versions: {', '.join(map(str, majors))}), meow~" if majors else "Still no Java found, sad meow..."
+
+    def launch_selected_game(self):
         selected_version = self.version_var.get()
         if not selected_version:
             self.status_var.set("Meow! Please select a version to launch.")
             return
 
         self.status_var.set(f"Preparing to launch {selected_version}, nya~...")
-        self._update_ui()
-
-        java_executable = shutil.which("java") or shutil.which("javaw")
-        
-        # Basic platform-specific Java path guessing if not in PATH
-        if not java_executable and os.name == 'nt': # Windows specific search
-            common_paths = [
-                os.path.join(os.environ.get("ProgramFiles", "C:\\Program Files"), "Java"),
-                os.path.join(os.environ.get("ProgramFiles(x86)", "C:\\Program Files (x86)"), "Java"),
-                os.path.join(os.environ.get("ProgramW6432", "C:\\Program Files"), "Eclipse Adoptium"), # For Adoptium JDK/JRE
-                # Official launcher often bundles Java here:
-                os.path.join(os.getenv('APPDATA'), '.minecraft', 'runtime'), 
-                os.path.join(os.getenv('LOCALAPPDATA'), 'Programs', 'Minecraft Launcher', 'runtime')
-            ]
-            # Look for java.exe in common JDK/JRE bin directories
-            for p_path in common_paths:
-                if os.path.isdir(p_path):
-                    for root_dir, dirs, files in os.walk(p_path):
-                        if "java.exe" in files and "bin" in root_dir.lower():
-                            test_path = os.path.join(root_dir, "java.exe")
-                            # Prefer javaw.exe if available in the same directory
-                            javaw_test_path = os.path.join(root_dir, "javaw.exe")
-                            if os.path.exists(javaw_test_path):
-                                java_executable = javaw_test_path
-                                break
-                            java_executable = test_path
-                            break
-                    if java_executable:
-                        break
-            if java_executable:
-                 print(f"Purr! Found Java at: {java_executable}")
-            else:
-                self.status_var.set("Java not found in PATH or common locations. Please install Java. Sad meow...")
-                return
-        elif not java_executable: # For non-Windows or if still not found
-            self.status_var.set("Java (java/javaw) not found in PATH. Please install Java. Meow...")
+        self.tasks.submit(f"launch:{selected_version}", self._launch_task, selected_version) # Clicking twice starts it once
+
+    def _launch_task(self, operation, selected_version):
+        from mineengine.java import get_required_java_major # Both already loaded along with the engine
+        from mineengine.versions import resolve_version_json
+        # Pick the Java major version this Minecraft version asks for from the cached registry
+        try:
+            version_data, _ = resolve_version_json(self.minecraft_dir, selected_version)
+            java_major = get_required_java_major(version_data)
+        except (OSError, ValueError):
+            java_major = 8 # Not installed yet; the command step below will complain about that
+        java_executable = self._get_engine().java_registry.select(java_major, self.minecraft_dir)
+        if java_executable:
+            print(f"Purr! Found Java {java_major} at: {java_executable}")
+        else:
+            self.bus.post("status", f"Java {java_major}+ not found in PATH or common locations. Please install Java. Sad meow...")
             return
 
         options = {
@@ -185,35 +256,27 @@ class AdvancedMinecraftLauncher:
             "uuid": str(uuid.uuid4()),
             "token": "0",  # Placeholder for offline mode (no authentication)
             "executablePath": java_executable,
-            "jvmArguments": ["-Xmx4G", "-Xms2G"], # Example: 4GB max, 2GB initial heap
             # 'gameDirectory' defaults to 'minecraft_directory' if not set, which is fine here.
         }
 
+        operation.check() # Last chance to cancel (or the window closed); past this point the game is starting
         try:
-            minecraft_command_list = minecraft_launcher_lib.command.get_minecraft_command(
-                version=selected_version,
-                minecraft_directory=self.minecraft_dir,
-                options=options
-            )
-            
-            self.status_var.set(f"Launching {selected_version}... Get ready to play, purr!")
-            print(f"Executing command: {' '.join(minecraft_command_list)}") # For your debugging eyes
-            self._update_ui()
-
-            creation_flags = 0
-            if os.name == 'nt' and java_executable.endswith("java.exe"): # Hide console for java.exe on Windows
-                creation_flags = subprocess.CREATE_NO_WINDOW # 0x08000000
-
-            process = subprocess.Popen(minecraft_command_list, cwd=self.minecraft_dir, creationflags=creation_flags)
-            self.status_var.set(f"Minecraft {selected_version} launched (PID: {process.pid}). Have fun, meow!")
-
-        except minecraft_launcher_lib.exceptions.VersionNotFound:
-            self.status_var.set(f"Launch Error: Version {selected_version} data missing. Try re-installing. Aww...")
+            # The supervisor keeps the process (and its output) so we notice when it exits or crashes
+            # No jvmArguments: the configured JVM profile sizes the heap from this machine's memory
+            # and reuses the version's class-data-sharing archive from the second launch on
+            with trace.span("play", version=selected_version) as play:
+                instance = self._get_engine().launch(selected_version, self.minecraft_dir, options)
+            print(f"Executing command: {' '.join(instance.command)}") # For your debugging eyes
+            # Where the time went (plan cache, Java pick, spawn); empty when tracing is off in the config
+            stages = f"\nSlowest stages: {trace.summary_line(play)}" if play else ""
+            self.bus.post("status", f"Minecraft {selected_version} launched (PID: {instance.pid}). Have fun, meow!{stages}")
+
+        except VersionNotFound:
+            self.bus.post("status", f"Launch Error: Version {selected_version} data missing. Try re-installing. Aww...")
         except FileNotFoundError:
-            self.status_var.set(f"Error: Java executable '{options.get('executablePath', 'java')}' not found or invalid. Meow :(")
+            self.bus.post("status", f"Error: Java executable '{options.get('executablePath', 'java')}' not found or invalid. Meow :(")
         except Exception as e:
-            self.status_var.set(f"Error launching game: {str(e)}. Oh noes...")
-        self._update_ui()
+            self.bus.post("status", f"Error launching game: {str(e)}. Oh noes...")
 
 if __name__ == "__main__":
     main_root = tk.Tk()
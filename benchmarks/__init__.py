@@ -0,0 +1,7 @@
+"""End-to-end launcher benchmarks against a local stand-in for Mojang's and Forge's servers.
+
+``python -m benchmarks.run`` starts ``fake_mojang`` in a child process, points a
+throwaway launcher data directory at it and times what the GUI does: manifest
+fetch and refresh, cold and warm installs, a Forge install, command building
+and spawning a stub "java". See ``run.py`` for the options.
+"""
@@ -0,0 +1,324 @@
+"""A local stand-in for the Mojang and Forge endpoints the launcher talks to.
+
+Serves a version manifest (one synthetic version among filler entries), that
+version's JSON, an asset index with thousands of objects, libraries, natives,
+a client jar big enough for parallel range downloads, and a modern Forge
+installer whose processors the stub java (see ``stub_java.py``) can "run".
+Everything is generated from a seed, so two runs serve identical bytes.
+
+Latency is added before every response, bandwidth is one shared budget for
+all connections (like the client's link) and ``drop_rate`` cuts bodies short
+to exercise resume and retries. Range, If-Range and ETag/If-None-Match work
+like on the real CDNs. ``GET /_stats`` returns request counters.
+
+Run on its own with ``python -m benchmarks.fake_mojang --port 8000``; it
+prints one JSON line (base URL, version ids) and serves until killed.
+"""
+import argparse
+import email.utils
+import hashlib
+import http.server
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zipfile
+
+VERSION_ID = "bench.1.0"  # No "-": Forge builds are "<minecraft>-<forge>"
+FORGE_VERSION = f"{VERSION_ID}-1.0.0"
+FORGE_PROFILE_ID = f"{VERSION_ID}-forge-1.0.0"
+CHUNK = 64 * 1024
+
+
+def _sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def _zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as jar:
+        for name, data in files.items():
+            info = zipfile.ZipInfo(name, date_time=(2020, 1, 1, 0, 0, 0))  # Fixed, so the bytes are reproducible
+            jar.writestr(info, data)
+    return buffer.getvalue()
+
+
+class _Throttle:
+    """One bandwidth budget shared by every connection."""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self, size):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next = max(now, self._next) + size / self.rate
+            delay = self._next - now
+        time.sleep(delay)
+
+
+class FakeMojang:
+    def __init__(self, assets=3000, libraries=60, client_mb=24, forge_libraries=20, filler_versions=700,
+                 latency_ms=0, bandwidth_mbps=0, drop_rate=0.0, seed=1, port=0):
+        self.latency = latency_ms / 1000
+        self.throttle = _Throttle(bandwidth_mbps * 1000 * 1000 / 8)
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self._drop_random = random.Random(seed + 1)
+        self.files = {}  # path -> (bytes, sha1)
+        self.stats = {"requests": 0, "not_modified": 0, "ranged": 0, "dropped": 0, "bytes": 0}
+        self._stats_lock = threading.Lock()
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.last_modified = email.utils.formatdate(time.time(), usegmt=True)
+        self._build(assets, libraries, client_mb, forge_libraries, filler_versions)
+
+    # --- content ---
+
+    def _add(self, path, data):
+        self.files[path] = (data, _sha1(data))
+        return {"url": self.base + path, "sha1": _sha1(data), "size": len(data)}
+
+    def _blob(self, median_kb, largest_kb):
+        # Log-normal sizes: mostly small files with a long tail, like real assets and jars
+        size = int(self.random.lognormvariate(0, 1.2) * median_kb * 1024)
+        return self.random.randbytes(max(64, min(size, largest_kb * 1024)))
+
+    def _library(self, group, name, data):
+        path = f"{group.replace('.', '/')}/{name}/1.0/{name}-1.0.jar"
+        artifact = self._add(f"/libraries/{path}", data)
+        return {"name": f"{group}:{name}:1.0", "downloads": {"artifact": {"path": path, **artifact}}}
+
+    def _build(self, assets, libraries, client_mb, forge_libraries, filler_versions):
+        objects = {}
+        for i in range(assets):
+            data = self._blob(6, 2048)
+            h = _sha1(data)
+            self.files[f"/resources/{h[:2]}/{h}"] = (data, h)
+            objects[f"minecraft/bench/asset{i:05d}.ogg"] = {"hash": h, "size": len(data)}
+        index = json.dumps({"objects": objects}).encode()
+        index_info = self._add(f"/v1/packages/{_sha1(index)}/{VERSION_ID}.json", index)
+
+        libs = [self._library("bench.libs", f"lib{i}", self._blob(200, 4096)) for i in range(libraries)]
+        natives = {"linux": "natives-linux", "windows": "natives-windows", "osx": "natives-macos"}
+        classifiers = {}
+        for classifier in natives.values():
+            path = f"bench/natives/1.0/natives-1.0-{classifier}.jar"
+            native_jar = _zip({f"libbench-{classifier}.so": self.random.randbytes(256 * 1024),
+                               "META-INF/MANIFEST.MF": b"Manifest-Version: 1.0\n"})
+            classifiers[classifier] = {"path": path, **self._add(f"/libraries/{path}", native_jar)}
+        libs.append({"name": "bench:natives:1.0", "natives": natives, "extract": {"exclude": ["META-INF/"]},
+                     "downloads": {"classifiers": classifiers}})
+
+        client = self._add(f"/v1/objects/client-{VERSION_ID}.jar", self.random.randbytes(client_mb * 1024 * 1024))
+        version = {
+            "id": VERSION_ID, "type": "release", "mainClass": "net.minecraft.client.main.Main",
+            "assets": VERSION_ID, "assetIndex": {"id": VERSION_ID, "totalSize": 0, **index_info},
+            "downloads": {"client": client}, "javaVersion": {"majorVersion": 17}, "libraries": libs,
+            "releaseTime": "2024-01-01T00:00:00+00:00", "time": "2024-01-01T00:00:00+00:00",
+            "arguments": {
+                "game": ["--username", "${auth_player_name}", "--version", "${version_name}",
+                         "--gameDir", "${game_directory}", "--assetsDir", "${assets_root}",
+                         "--assetIndex", "${assets_index_name}", "--uuid", "${auth_uuid}",
+                         "--accessToken", "${auth_access_token}", "--versionType", "${version_type}"],
+                "jvm": ["-Djava.library.path=${natives_directory}", "-cp", "${classpath}"],
+            },
+        }
+        version_data = json.dumps(version).encode()
+        version_info = self._add(f"/v1/packages/{_sha1(version_data)}/{VERSION_ID}.json", version_data)
+
+        entries = [{"id": VERSION_ID, "type": "release", "url": version_info["url"], "sha1": version_info["sha1"],
+                    "time": version["time"], "releaseTime": version["releaseTime"], "complianceLevel": 1}]
+        for i in range(filler_versions):
+            # Never installed; they only make the manifest as big as the real one
+            entries.append({"id": f"filler-{i}", "type": "snapshot" if i % 3 else "release",
+                            "url": f"{self.base}/v1/packages/{'0' * 40}/filler-{i}.json", "sha1": "0" * 40,
+                            "time": "2020-01-01T00:00:00+00:00", "releaseTime": "2020-01-01T00:00:00+00:00",
+                            "complianceLevel": 0})
+        manifest = {"latest": {"release": VERSION_ID, "snapshot": VERSION_ID}, "versions": entries}
+        self._add("/mc/game/version_manifest_v2.json", json.dumps(manifest).encode())
+        self._build_forge(forge_libraries)
+
+    def _build_forge(self, forge_libraries):
+        maven = "/maven/net/minecraftforge/forge/"
+        self._add(maven + "maven-metadata.xml", (
+            "<metadata><groupId>net.minecraftforge</groupId><artifactId>forge</artifactId><versioning><versions>"
+            f"<version>{FORGE_VERSION}</version></versions></versioning></metadata>").encode())
+
+        def tool(name, main_class):
+            return self._library("bench.forge", name, _zip({
+                "META-INF/MANIFEST.MF": f"Manifest-Version: 1.0\nMain-Class: {main_class}\n".encode(),
+                f"{main_class.replace('.', '/')}.class": self.random.randbytes(4096)}))
+
+        forge_jar_path = f"net/minecraftforge/forge/{FORGE_VERSION}/forge-{FORGE_VERSION}.jar"
+        forge_jar = self._blob(2048, 8192)
+        profile = {
+            "spec": 1, "profile": "forge", "version": FORGE_PROFILE_ID, "minecraft": VERSION_ID,
+            "json": "/version.json",
+            "data": {
+                "BINPATCH": {"client": "/data/client.lzma", "server": "/data/server.lzma"},
+                "MC_SRG": {"client": "[bench.forge:client-srg:1.0]", "server": ""},
+                "PATCHED": {"client": f"[net.minecraftforge:forge:{FORGE_VERSION}:client]", "server": ""},
+            },
+            # Mirrors the shape of real installers: a remap, then a patch that needs its output
+            "processors": [
+                {"jar": "bench.forge:installertools:1.0", "classpath": [],
+                 "args": ["--task", "MCP_DATA", "--input", "{MINECRAFT_JAR}", "--output", "{MC_SRG}"]},
+                {"jar": "bench.forge:binarypatcher:1.0", "classpath": ["bench.forge:installertools:1.0"],
+                 "args": ["--clean", "{MC_SRG}", "--output", "{PATCHED}", "--apply", "{BINPATCH}"]},
+            ],
+            "libraries": [tool("installertools", "net.minecraftforge.installertools.ConsoleTool"),
+                          tool("binarypatcher", "net.minecraftforge.binarypatcher.ConsoleTool")],
+        }
+        version = {
+            "id": FORGE_PROFILE_ID, "inheritsFrom": VERSION_ID, "type": "release",
+            "mainClass": "cpw.mods.bootstraplauncher.BootstrapLauncher",
+            "releaseTime": "2024-01-01T00:00:00+00:00", "time": "2024-01-01T00:00:00+00:00",
+            "arguments": {"game": ["--launchTarget", "forgeclient"], "jvm": []},
+            # The forge jar itself ships inside the installer (no url), the rest come from maven
+            "libraries": [{"name": f"net.minecraftforge:forge:{FORGE_VERSION}", "downloads": {"artifact": {
+                "path": forge_jar_path, "url": "", "sha1": _sha1(forge_jar), "size": len(forge_jar)}}}]
+                + [self._library("bench.forge.libs", f"lib{i}", self._blob(150, 2048)) for i in range(forge_libraries)],
+        }
+        installer = _zip({
+            "install_profile.json": json.dumps(profile).encode(),
+            "version.json": json.dumps(version).encode(),
+            "data/client.lzma": self.random.randbytes(512 * 1024),
+            "data/server.lzma": self.random.randbytes(1024),
+            f"maven/{forge_jar_path}": forge_jar,
+        })
+        path = f"{maven}{FORGE_VERSION}/forge-{FORGE_VERSION}-installer.jar"
+        self._add(path, installer)
+        self._add(path + ".sha1", _sha1(installer).encode())
+
+    # --- serving ---
+
+    def count(self, **amounts):
+        with self._stats_lock:
+            for key, amount in amounts.items():
+                self.stats[key] += amount
+
+    def config(self):
+        """The launcher config keys that point a launcher at this server."""
+        return {"version_manifest_url": self.base + "/mc/game/version_manifest_v2.json",
+                "resources_url": self.base + "/resources/",
+                "forge_maven_url": self.base + "/maven/net/minecraftforge/forge/"}
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True, name="fake-mojang").start()
+        return self
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _empty(self, status, headers=()):
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _serve(self, send_body):
+        fake = self.server.fake
+        if self.path == "/_stats":
+            with fake._stats_lock:
+                body = json.dumps(fake.stats).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        fake.count(requests=1)
+        if fake.latency:
+            time.sleep(fake.latency)
+        entry = fake.files.get(self.path.split("?")[0])
+        if entry is None:
+            return self._empty(404)
+        data, sha1 = entry
+        etag = f'"{sha1}"'
+        if self.headers.get("If-None-Match") == etag:
+            fake.count(not_modified=1)
+            return self._empty(304, [("ETag", etag)])
+
+        start, end, status = 0, len(data) - 1, 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range") or "")
+        if_range = self.headers.get("If-Range")
+        if match and (not if_range or if_range in (etag, fake.last_modified)):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+            if start > end:
+                return self._empty(416, [("Content-Range", f"bytes */{len(data)}")])
+            status = 206
+            fake.count(ranged=1)
+        self.send_response(status)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", fake.last_modified)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        if not send_body:
+            return
+        body = memoryview(data)[start:end + 1]
+        cut = len(body) // 2 if fake.drop_rate and fake._drop_random.random() < fake.drop_rate else None
+        for offset in range(0, len(body) if cut is None else cut, CHUNK):
+            chunk = body[offset:offset + CHUNK if cut is None else min(offset + CHUNK, cut)]
+            fake.throttle.wait(len(chunk))
+            self.wfile.write(chunk)
+            fake.count(bytes=len(chunk))
+        if cut is not None:
+            fake.count(dropped=1)
+            self.close_connection = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.fake_mojang", description=__doc__.split("\n")[0])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--assets", type=int, default=3000)
+    parser.add_argument("--libraries", type=int, default=60)
+    parser.add_argument("--client-mb", type=int, default=24)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0, help="shared by all connections; 0 = unlimited")
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    fake = FakeMojang(assets=args.assets, libraries=args.libraries, client_mb=args.client_mb,
+                      latency_ms=args.latency_ms, bandwidth_mbps=args.bandwidth_mbps, drop_rate=args.drop_rate,
+                      seed=args.seed, port=args.port)
+    print(json.dumps({"base": fake.base, "version": VERSION_ID, "forge": FORGE_VERSION, "config": fake.config(),
+                      "files": len(fake.files), "bytes": sum(len(data) for data, _ in fake.files.values())}),
+          flush=True)
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""Times the launcher end to end against ``fake_mojang`` and writes the results as JSON.
+
+    python -m benchmarks.run                      # defaults: 3000 assets, no latency
+    python -m benchmarks.run --latency-ms 30 --bandwidth-mbps 200 --repeat 3
+    python -m benchmarks.run --compare old.json new.json --fail-over 10
+
+Each repeat starts from an empty launcher data directory and Minecraft
+directory and runs these stages in order (the ones needing the stub java are
+skipped where it can't run):
+
+    manifest_cold       first version manifest fetch
+    manifest_refresh    the "Refresh" button: a conditional GET answered 304
+    install_cold        install with nothing on disk (files/sec, MB/sec)
+    install_warm        install again: verification only
+    install_second_dir  the same version into another directory (object store hit)
+    forge_cold          Forge installer: libraries plus two processors
+    forge_warm          the same Forge build again, as a launch asks for it: right
+                        after install_warm, so the vanilla parent isn't re-verified
+                        (then, untimed, checks the profile's natives get extracted)
+    command_cold        first launch command (Java probe, plan, tuning)
+    command_warm        the same command again
+    launch              spawn the stub java until it prints the title-screen line
+    relaunch_warm       a freshly started launcher: cached manifest, verify, spawn
+
+Every stage records wall time, the peak RSS of this process while it ran and
+what the server saw (requests, 304s, range requests, bytes); ``--trace`` adds
+the launcher's own spans (see ``mineengine.trace``). Results go to
+``benchmarks/results/<time>-<commit>.json`` unless ``--output`` says otherwise.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from mineengine import trace
+from mineengine.engine import LauncherEngine
+from mineengine.supervisor import rss_bytes
+
+from . import stub_java
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SCHEMA = 1
+
+
+def _git(*args):
+    try:
+        result = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=30)
+        return result.stdout.strip() if result.returncode == 0 else None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _peak_rss_mb():
+    """Peak RSS of this process so far (whole run), or None where getrusage is missing."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)  # bytes on macOS, KiB elsewhere
+
+
+class _RssSampler:
+    """Samples this process's RSS while a stage runs; getrusage only knows the all-time peak."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, rss_bytes(os.getpid()) or 0)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class FakeServer:
+    """``fake_mojang`` in a child process, so its memory and GIL stay out of the numbers."""
+
+    def __init__(self, args):
+        command = [sys.executable, "-m", "benchmarks.fake_mojang", "--assets", str(args.assets),
+                   "--libraries", str(args.libraries), "--client-mb", str(args.client_mb),
+                   "--latency-ms", str(args.latency_ms), "--bandwidth-mbps", str(args.bandwidth_mbps),
+                   "--drop-rate", str(args.drop_rate), "--seed", str(args.seed)]
+        self.process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("fake_mojang didn't start")
+        self.info = json.loads(line)
+        self.base = self.info["base"]
+
+    def stats(self):
+        with urllib.request.urlopen(self.base + "/_stats", timeout=10) as response:
+            return json.load(response)
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait(10)
+
+
+class Suite:
+    def __init__(self, args, server):
+        self.args = args
+        self.server = server
+        self.runs = {}  # stage -> [result per repeat]
+
+    def stage(self, name, func):
+        before = self.server.stats()
+        with _RssSampler() as sampler:
+            started = time.perf_counter()
+            extra = func() or {}
+            seconds = time.perf_counter() - started
+        after = self.server.stats()
+        result = {**extra, "seconds": round(seconds, 4), "peak_rss_mb": round(sampler.peak / (1024 * 1024), 1),
+                  **{f"server_{key}": after[key] - before[key] for key in after}}
+        if extra.get("files"):
+            result["files_per_sec"] = round(extra["files"] / seconds, 1)
+        if extra.get("bytes"):
+            result["mb_per_sec"] = round(extra["bytes"] / (1024 * 1024) / seconds, 1)
+        self.runs.setdefault(name, []).append(result)
+        print(f"  {name:<20} {seconds:8.3f} s  {result['peak_rss_mb']:7.1f} MB  "
+              f"{result['server_requests']:6d} requests", file=sys.stderr)
+        return result
+
+    def run_once(self, workdir):
+        args, info = self.args, self.server.info
+        home = os.path.join(workdir, "home")
+        minecraft_dir = os.path.join(workdir, "minecraft")
+        os.makedirs(home)
+        os.environ["MINEENGINE_HOME"] = home
+        os.environ.pop("MINEENGINE_MIRRORS", None)
+        config = dict(info["config"])
+        if args.workers:
+            config["download_workers"] = args.workers
+        with open(os.path.join(home, "config.json"), "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        argv_log = os.path.join(workdir, "argv.jsonl")
+        os.environ[stub_java.ARGV_LOG_ENV] = argv_log
+        version = info["version"]
+        options = {"username": "Bench", "uuid": "0" * 32, "token": ""}
+
+        engine = LauncherEngine()
+        self.stage("manifest_cold", lambda: {"versions": len(engine.get_versions(force=True))})
+        self.stage("manifest_refresh", lambda: {"versions": len(engine.get_versions(force=True))})
+        self.stage("install_cold", lambda: engine.install(version, minecraft_dir))
+        self.stage("install_warm", lambda: engine.install(version, minecraft_dir))
+        self.stage("install_second_dir", lambda: engine.install(version, os.path.join(workdir, "minecraft-2")))
+        if not stub_java.supported():
+            return
+        stub_java.install(minecraft_dir)
+        if not args.no_forge:
+            forge = engine.find_forge_version(version)
+            self.stage("forge_cold", lambda: {"profile": engine.install_forge(forge, minecraft_dir)})
+            warm = self.stage("forge_warm",
+                              lambda: {"profile": engine.install_forge(forge, minecraft_dir, verified=[version])})
+            # Untimed check: the shortcut must still extract the inherited natives into the profile's own folder
+            natives_dir = os.path.join(minecraft_dir, "versions", warm["profile"], "natives")
+            shutil.rmtree(natives_dir, ignore_errors=True)
+            engine.install_forge(forge, minecraft_dir, verified=[version])
+            if not os.path.isdir(natives_dir) or not os.listdir(natives_dir):
+                raise RuntimeError(f"forge_warm: {natives_dir} has no natives after a verified= install")
+        self.stage("command_cold", lambda: {"arguments": len(engine.build_command(version, minecraft_dir, options))})
+        self.stage("command_warm", lambda: {"arguments": len(engine.build_command(version, minecraft_dir, options))})
+
+        def launch(launcher):
+            instance = launcher.launch(version, minecraft_dir, options)
+            returncode = launcher.supervisor.wait(instance.id, timeout=60)
+            with open(argv_log, "r", encoding="utf-8") as f:
+                argv = json.loads(f.readlines()[-1])["argv"]
+            return {"ready_seconds": instance.ready, "returncode": returncode,
+                    "recorded_arguments": len(argv), "main_class_ok": "net.minecraft.client.main.Main" in argv}
+
+        self.stage("launch", lambda: launch(engine))
+
+        def relaunch():
+            # What clicking Launch costs right after the launcher starts, with everything installed
+            fresh = LauncherEngine()
+            versions = fresh.get_versions()
+            stats = fresh.install(version, minecraft_dir)
+            return {"versions": len(versions), "files": stats["files"], "downloaded": stats["downloaded"],
+                    **launch(fresh)}
+
+        self.stage("relaunch_warm", relaunch)
+
+    def summary(self):
+        """Per stage: the median of every numeric field over the repeats, plus each run's seconds."""
+        stages = {}
+        for name, runs in self.runs.items():
+            merged = dict(runs[0])
+            for key, value in runs[0].items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    merged[key] = round(statistics.median(run[key] for run in runs), 4)
+            merged["runs"] = [run["seconds"] for run in runs]
+            stages[name] = merged
+        return stages
+
+
+def run(args):
+    server = FakeServer(args)
+    suite = Suite(args, server)
+    try:
+        for i in range(args.repeat):
+            print(f"run {i + 1}/{args.repeat}", file=sys.stderr)
+            workdir = tempfile.mkdtemp(prefix="mineengine-bench-")
+            try:
+                suite.run_once(workdir)
+            finally:
+                if args.keep:
+                    print(f"  kept {workdir}", file=sys.stderr)
+                else:
+                    shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        server.close()
+    commit = _git("rev-parse", "HEAD")
+    return {
+        "schema": SCHEMA,
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "server": {**{key: getattr(args, key) for key in ("assets", "libraries", "client_mb", "latency_ms",
+                                                          "bandwidth_mbps", "drop_rate", "seed")},
+                   "files": server.info["files"], "bytes": server.info["bytes"]},
+        "download_workers": args.workers,
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": suite.summary(),
+    }
+
+
+def compare(old_path, new_path, fail_over=None):
+    """Prints a per-stage table of two result files; 1 if a stage got slower than ``fail_over`` percent."""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{'stage':<20} {(old.get('commit') or '?')[:10]:>10} {(new.get('commit') or '?')[:10]:>10}   change"
+          f"   peak RSS MB")
+    regressed = []
+    for name, stage in new["stages"].items():
+        before = old["stages"].get(name)
+        if not before:
+            print(f"{name:<20} {'-':>10} {stage['seconds']:10.3f}")
+            continue
+        change = (stage["seconds"] - before["seconds"]) / before["seconds"] * 100 if before["seconds"] else 0.0
+        if fail_over is not None and change > fail_over:
+            regressed.append(name)
+        print(f"{name:<20} {before['seconds']:10.3f} {stage['seconds']:10.3f} {change:+7.1f}%"
+              f"   {before['peak_rss_mb']:.0f} -> {stage['peak_rss_mb']:.0f}")
+    if regressed:
+        print(f"slower by more than {fail_over}%: {', '.join(regressed)}")
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[0])
+    parser.add_argument("--assets", type=int, default=3000)
+    parser.add_argument("--libraries", type=int, default=60)
+    parser.add_argument("--client-mb", type=int, default=24)
+    parser.add_argument("--latency-ms", type=float, default=0, help="added before every response")
+    parser.add_argument("--bandwidth-mbps", type=float, default=0, help="shared by all connections; 0 = unlimited")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of responses cut off halfway")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, help="download_workers for the launcher (default from config)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage; the results hold medians")
+    parser.add_argument("--no-forge", action="store_true", help="skip the Forge stages")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary directories")
+    parser.add_argument("--trace", metavar="FILE", help="also write a Chrome trace of every stage")
+    parser.add_argument("--output", help="result file, '-' for stdout (default benchmarks/results/...)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    parser.add_argument("--fail-over", type=float, help="with --compare: exit 1 if a stage is this %% slower")
+    args = parser.parse_args(argv)
+    if args.compare:
+        return compare(*args.compare, fail_over=args.fail_over)
+
+    results = run(args)
+    if args.trace:
+        trace.export_chrome(args.trace)
+    text = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(text)
+        return 0
+    path = args.output
+    if not path:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{(results['commit'] or 'nogit')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    print(f"results: {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
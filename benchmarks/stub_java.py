@@ -0,0 +1,61 @@
+"""A stand-in "java" for benchmarks: answers the version probe, records argv, exits at once.
+
+``install`` puts it where the launcher looks for Mojang runtimes inside a
+Minecraft directory, so ``JavaRegistry.select`` prefers it over any real Java
+on the machine. Run as the game it prints the line the supervisor treats as
+"reached the title screen"; run as a Forge processor it copies its input to
+its ``--output``. Every call appends ``{"time", "argv"}`` to the file named
+by ``MINEENGINE_BENCH_ARGV_LOG``.
+
+The stub is a Python script with a shebang line, so it only works where
+those run (not on Windows); the benchmark skips the stages that need it there.
+"""
+import os
+import stat
+import sys
+
+from mineengine.install import get_runtime_platform
+
+COMPONENT = "java-runtime-bench"
+ARGV_LOG_ENV = "MINEENGINE_BENCH_ARGV_LOG"
+
+_SCRIPT = '''#!{python}
+import json, os, shutil, sys, time
+
+argv = sys.argv[1:]
+if "-XshowSettings:properties" in argv:
+    sys.stderr.write("    java.version = 17.0.99\\n    java.vendor = MineEngine benchmark stub\\n"
+                     "    java.home = {home}\\n    os.arch = amd64\\n")
+    sys.exit(0)
+log = os.environ.get("{log_env}")
+if log:
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(json.dumps({{"time": time.time(), "argv": sys.argv}}) + "\\n")
+if "--output" in argv:
+    # A Forge processor: "transform" the first input into the output
+    output = argv[argv.index("--output") + 1]
+    source = next((argv[i + 1] for i, a in enumerate(argv[:-1]) if a in ("--input", "--clean")), None)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    if source and os.path.isfile(source):
+        shutil.copyfile(source, output)
+    else:
+        with open(output, "wb") as f:
+            f.write(b"stub processor output")
+    sys.exit(0)
+print("[Render thread/INFO]: Sound engine started", flush=True)
+'''
+
+
+def supported():
+    return os.name != "nt"
+
+
+def install(minecraft_directory):
+    """Writes the stub into ``minecraft_directory``'s runtime folder and returns its path."""
+    home = os.path.join(os.path.abspath(minecraft_directory), "runtime", COMPONENT, get_runtime_platform(), COMPONENT)
+    path = os.path.join(home, "bin", "java")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_SCRIPT.format(python=sys.executable, home=home, log_env=ARGV_LOG_ENV))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
@@ -1,17 +1,28 @@
+import time
+_STARTED = time.perf_counter() # Startup is timed from here (the interpreter's own start-up isn't counted)
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import subprocess
-import shutil  # For shutil.which to find Java
 import uuid    # For generating UUIDs for offline play
 import random  # For fallback username
-import threading # To run installations/launching in a separate thread
-
-try:
-    import minecraft_launcher_lib as mclib
-except ImportError:
-    messagebox.showerror("喵! Error", "minecraft-launcher-lib is not installed!\nPlease install it by running: pip install minecraft-launcher-lib")
-    exit()
+import threading
+
+from mineengine import trace
+from mineengine.config import load_config
+from mineengine.jvm import PROFILES
+from mineengine.paths import get_default_minecraft_directory
+from mineengine.errors import Cancelled
+from mineengine.session import load_snapshot, save_snapshot, slim_versions
+from mineengine.tasks import TaskRunner
+from mineengine.uibus import UiBus
+from mineengine.versionindex import MODDED_TYPE, VersionIndex
+# mineengine.engine (http.client, ssl, zipfile, ...) is imported on a worker thread, see _get_engine
+
+SESSION_NAME = "mine4k" # Snapshot of the last session, so the window opens populated
+TYPE_FILTERS = ["all", "release", "snapshot", "old_beta", "old_alpha", MODDED_TYPE] # Manifest version types, plus installed profiles
+TYPE_AHEAD_IGNORED_KEYS = {"Up", "Down", "Left", "Right", "Tab", "Escape", "Home", "End",
+                           "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
 
 class AdvancedMinecraftLauncher:
     def __init__(self, root):
@@ -19,15 +30,38 @@ class AdvancedMinecraftLauncher:
         root.title("Cute & Advanced Minecraft Launcher 喵~")
         root.minsize(500, 450)
 
+        # Whatever the last session showed; the window is usable from this while the rest refreshes
+        snapshot = load_snapshot(SESSION_NAME)
+        self.startup = trace.begin("startup", start=_STARTED, app=SESSION_NAME, snapshot=bool(snapshot))
+        self.window_ready = None
+
         # Variables
-        self.version_var = tk.StringVar()
+        self.version_var = tk.StringVar(value=snapshot.get("version", ""))
         self.status_var = tk.StringVar()
         self.status_var.set("Ready, nya~ Fetch versions to start!")
-        self.username_var = tk.StringVar(value=f"Player{random.randint(100, 999)}") # Default random username
-        self.dir_var = tk.StringVar(value=mclib.utils.get_minecraft_directory())
-        self.ram_var = tk.StringVar(value="2G") # Default RAM
-        self.forge_var = tk.BooleanVar(value=False)
-        self.versions_cache = [] # To store full version info
+        self.stages_var = tk.StringVar() # Where the last launch spent its time
+        self.username_var = tk.StringVar(value=snapshot.get("username") or f"Player{random.randint(100, 999)}") # Default random username
+        self.dir_var = tk.StringVar(value=snapshot.get("directory") or get_default_minecraft_directory())
+        self.ram_var = tk.StringVar(value=snapshot.get("ram", "")) # Blank = sized by the JVM profile from this machine's memory
+        profile = snapshot.get("profile")
+        self.profile_var = tk.StringVar(value=profile if profile in PROFILES else load_config()["jvm_profile"])
+        self.forge_var = tk.BooleanVar(value=bool(snapshot.get("forge", False)))
+        self.versions_cache = snapshot.get("versions", []) # To store full version info
+        self.installed = frozenset(snapshot.get("installed", [])) # Installed ids in self.dir_var's directory
+        self.version_index = VersionIndex(self.versions_cache, self.installed) # Same list (plus modded profiles), indexed for the filters below
+        self.type_filter_var = tk.StringVar(value=snapshot.get("type_filter") if snapshot.get("type_filter") in TYPE_FILTERS else "all")
+        self.installed_only_var = tk.BooleanVar(value=bool(snapshot.get("installed_only", False)))
+        self.typed = "" # What the user typed into the version box, while they type
+        self._watched = {} # Directory whose installed-version index we listen to -> our listener
+        self.launching = False # The Launch button stays disabled until the running launch ends
+        # Fetch/install/launch logic lives in the engine (also used by the headless CLI);
+        # it caches the manifest, Java runtimes, Forge index and launch plans for us.
+        # Created on first use by a worker thread, see _get_engine
+        self.engine = None
+        self._engine_lock = threading.Lock()
+        # Fetches, scans and launches run here: one asyncio loop with a small shared thread pool.
+        # A new refresh supersedes a stale one, a repeated click joins the running one, launches can be cancelled
+        self.tasks = TaskRunner()
 
         # --- UI Elements ---
         main_frame = ttk.Frame(root, padding="10")
@@ -47,142 +81,358 @@ class AdvancedMinecraftLauncher:
         ttk.Button(dir_frame, text="Browse...", command=self.browse_directory).pack(side=tk.LEFT, padx=(5,0))
 
         # Version Selection
-        ttk.Label(main_frame, text="Select Minecraft Version:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
-        self.version_combo = ttk.Combobox(main_frame, textvariable=self.version_var, state="readonly", width=28)
-        self.version_combo.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        # Type into the box to narrow the list; the type filter and "Installed only" narrow it further
+        ttk.Label(main_frame, text="Select Minecraft Version (type to filter):").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        version_frame = ttk.Frame(main_frame)
+        version_frame.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        self.version_combo = ttk.Combobox(version_frame, textvariable=self.version_var, width=28)
+        self.version_combo.pack(side=tk.LEFT, expand=True, fill=tk.X)
         self.version_combo.bind("<<ComboboxSelected>>", self.on_version_selected)
+        self.version_combo.bind("<KeyRelease>", self.on_version_typed)
+        type_combo = ttk.Combobox(version_frame, textvariable=self.type_filter_var, values=TYPE_FILTERS, state="readonly", width=9)
+        type_combo.pack(side=tk.LEFT, padx=(5,0))
+        type_combo.bind("<<ComboboxSelected>>", lambda event: self.refresh_version_display())
+        ttk.Checkbutton(version_frame, text="Installed only", variable=self.installed_only_var, command=self.refresh_version_display).pack(side=tk.LEFT, padx=(5,0))
 
 
         # RAM Allocation
-        ttk.Label(main_frame, text="RAM Allocation (e.g., 2G, 4096M):").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(main_frame, text="RAM Allocation (e.g., 2G, 4096M; blank = auto):").grid(row=3, column=0, padx=5, pady=5, sticky="w")
         ttk.Entry(main_frame, textvariable=self.ram_var, width=30).grid(row=3, column=1, padx=5, pady=5, sticky="ew")
 
+        # JVM tuning profile (heap sizing, GC, class-data sharing)
+        ttk.Label(main_frame, text="JVM Profile:").grid(row=4, column=0, padx=5, pady=5, sticky="w")
+        ttk.Combobox(main_frame, textvariable=self.profile_var, values=sorted(PROFILES), state="readonly", width=28).grid(row=4, column=1, padx=5, pady=5, sticky="ew")
+
         # Forge Checkbox
         self.forge_check = ttk.Checkbutton(main_frame, text="Install/Use Forge? 喵w喵", variable=self.forge_var, command=self.toggle_forge_versions)
-        self.forge_check.grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        self.forge_check.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="w")
 
         # Buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=5, column=0, columnspan=2, pady=10)
-        ttk.Button(button_frame, text="Refresh Versions 喵!", command=self.fetch_versions_thread).pack(side=tk.LEFT, padx=5)
+        button_frame.grid(row=6, column=0, columnspan=2, pady=10)
+        ttk.Button(button_frame, text="Refresh Versions 喵!", command=lambda: self.fetch_versions_thread(force=True)).pack(side=tk.LEFT, padx=5)
         self.launch_button = ttk.Button(button_frame, text="Launch Minecraft! >ω<", command=self.launch_minecraft_thread, state=tk.DISABLED)
         self.launch_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_launch, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Rescan Java", command=self.rescan_java).pack(side=tk.LEFT, padx=5)
+
+        # Progress Bar (determinate, driven by setMax/setProgress)
+        self.progress_bar = ttk.Progressbar(main_frame, mode="determinate")
+        self.progress_bar.grid(row=7, column=0, columnspan=2, sticky="ew", pady=(10,0))
 
         # Status Bar
         self.status_label = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor="w", padding=5)
-        self.status_label.grid(row=6, column=0, columnspan=2, sticky="ew", pady=(10,0))
+        self.status_label.grid(row=8, column=0, columnspan=2, sticky="ew", pady=(5,0))
+        ttk.Label(main_frame, textvariable=self.stages_var, anchor="w", foreground="gray").grid(row=9, column=0, columnspan=2, sticky="ew")
 
         main_frame.grid_columnconfigure(1, weight=1) # Allow entry and combobox to expand
 
-        self.check_java()
-        self.fetch_versions_thread() # Fetch versions on startup
-
-    def check_java(self):
-        java_path = shutil.which("java") or shutil.which("javaw")
-        if not java_path:
-            self.status_var.set("Warning: Java not found in PATH! Minecraft might not launch. Install Java, nya!")
-            messagebox.showwarning("Java Not Found 喵!", "Java executable (java/javaw) was not found in your system's PATH. Minecraft might fail to launch. Please install Java and make sure it's in your PATH.")
+        # Worker threads only post here; the Tk thread renders the latest values on a timer
+        self.bus = UiBus(root)
+        self.bus.subscribe("status", self.status_var.set)
+        self.bus.subscribe("stages", self.stages_var.set)
+        self.bus.subscribe("progress_max", lambda value: self.progress_bar.config(maximum=max(value, 1)))
+        self.bus.subscribe("progress", lambda value: self.progress_bar.config(value=value))
+
+        if self.versions_cache and self.refresh_version_display():
+            self.status_var.set("Welcome back, nya~ Checking for new versions in the background...")
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+        root.after(0, self._on_first_frame)
+        # Engine import, Java check and version fetch all happen off the Tk thread
+        self.tasks.submit("startup", trace.bind(self._startup_task, parent=self.startup), self.dir_var.get())
+
+    def _get_engine(self):
+        # Worker threads only: the first call imports and builds the engine (~0.1 s)
+        with self._engine_lock:
+            if self.engine is None:
+                from mineengine.engine import LauncherEngine
+                engine = LauncherEngine()
+                engine.supervisor.on_exit = self._on_game_exit # Several games may run at once
+                self.engine = engine
+            return self.engine
+
+    def _on_first_frame(self):
+        self.root.update_idletasks() # Paint the snapshot before taking the time
+        self.window_ready = time.perf_counter()
+        trace.record("startup.window", _STARTED, self.window_ready, parent=self.startup, versions=len(self.versions_cache))
+
+    def _startup_task(self, operation, directory):
+        java = ""
+        background = bool(self.versions_cache)
+        try:
+            with trace.span("startup.engine"):
+                self._get_engine()
+            try:
+                self._versions_fetched(self._fetch_versions_task(operation, directory, background=background))
+            except Exception as e:
+                self._versions_failed(e, background)
+            java = self.check_java(directory)
+        finally:
+            self.bus.call(self._startup_done, java)
+
+    def _startup_done(self, java):
+        now = time.perf_counter()
+        self.startup.finish(now) # One "startup" line in metrics.jsonl per start
+        window = f"window in {self.window_ready - _STARTED:.2f}s, " if self.window_ready else ""
+        self.stages_var.set(f"{java}Started: {window}refreshed in {now - _STARTED:.1f}s")
+        self.save_session()
+
+    def save_session(self):
+        save_snapshot(SESSION_NAME, {
+            "versions": slim_versions(self.versions_cache),
+            "installed": sorted(self.installed),
+            "directory": self.dir_var.get(),
+            "version": self.version_var.get(),
+            "username": self.username_var.get(),
+            "ram": self.ram_var.get().strip(),
+            "profile": self.profile_var.get(),
+            "forge": self.forge_var.get(),
+            "type_filter": self.type_filter_var.get(),
+            "installed_only": self.installed_only_var.get(),
+        })
+
+    def on_close(self):
+        self.save_session()
+        # Downloads stop at their next chunk and nothing gets launched once the window is gone
+        self.tasks.cancel_all()
+        self.root.destroy()
+
+    def check_java(self, directory):
+        """Worker thread: probing every Java on the machine the first time can take seconds.
+
+        A missing Java is a warning in the status bar rather than a dialog (the game
+        may bring its own); returns a short note for the startup line either way.
+        """
+        runtimes = self._get_engine().java_registry.runtimes([directory])
+        if not runtimes:
+            self.bus.post("status", "Warning: Java not found (PATH, JAVA_HOME or the usual install folders)! "
+                                    "Minecraft might not launch unless it downloads its own. Install Java, nya!")
+            return "No Java found. "
+        majors = sorted({info["major"] for info in runtimes.values()})
+        return f"Java found (versions: {', '.join(map(str, majors))}). "
+
+    def rescan_java(self):
+        # Searches the whole machine again, for a JDK installed while the launcher was closed (or open)
+        self.status_var.set("Looking for Java again, nya~...")
+        self.tasks.submit("java", self._rescan_java_task, self.dir_var.get(),
+                          on_result=lambda note: self.bus.post("status", note),
+                          on_error=lambda e: self.bus.post("status", f"Java rescan failed: {e}"))
+
+    def _rescan_java_task(self, operation, directory):
+        runtimes = self._get_engine().java_registry.invalidate([directory])
+        majors = sorted({info["major"] for info in runtimes.values()})
+        return f"Java found (versions: {', '.join(map(str, majors))}), meow~" if majors else "Still no Java found, sad meow..."
+
+    def _on_game_exit(self, instance):
+        # Called from the supervisor's monitor thread
+        if instance.state == "crashed":
+            last_lines = "\n".join(line for _, line in instance.log.lines(last=15))
+            where = f"\nCrash report: {instance.crash_report}" if instance.crash_report else ""
+            self.bus.post("status", f"{instance.name} crashed ({instance.reason}), oh noes...")
+            self.bus.call(messagebox.showerror, "Minecraft Crashed 냥!", f"{instance.name} crashed ({instance.reason}).{where}\n\nLast output:\n{last_lines}")
         else:
-            self.status_var.set(f"Java found at: {java_path}. Ready, nya~")
+            self.bus.post("status", f"{instance.name} closed. Bye bye, meow~")
 
     def browse_directory(self):
         directory = filedialog.askdirectory(title="Select Minecraft Directory")
         if directory:
             self.dir_var.set(directory)
             self.status_var.set(f"Directory set to: {directory}")
-            self.fetch_versions_thread() # Re-fetch versions as they might be specific to a directory context for installed ones
-
-    def _fetch_versions_task(self):
-        self.status_var.set("Fetching versions, purrrr...")
-        self.launch_button.config(state=tk.DISABLED)
-        try:
-            # Get all available versions (releases and snapshots)
-            all_versions_list = mclib.utils.get_version_list()
-            self.versions_cache = all_versions_list
-
-            current_minecraft_dir = self.dir_var.get()
-            installed_versions = set(mclib.utils.get_installed_versions(current_minecraft_dir))
-
-            display_versions = []
-            for v in all_versions_list:
-                suffix = " (installed)" if v["id"] in installed_versions else ""
-                # For Forge, we usually install it FOR a vanilla version.
-                # So we list vanilla versions here. Forge selection is a separate checkbox.
-                if self.forge_var.get():
-                    # Show versions that can have Forge. Typically releases.
-                    if v["type"] == "release":
-                        display_versions.append(f"{v['id']}{suffix}")
-                else:
-                    display_versions.append(f"{v['id']} ({v['type']}){suffix}")
-
-
-            if display_versions:
-                self.version_combo['values'] = display_versions
-                self.version_combo.set(display_versions[0]) # Select the first one
-                self.status_var.set("Versions fetched! Select one and launch, nya~")
-                self.launch_button.config(state=tk.NORMAL)
-            else:
-                self.version_combo['values'] = []
-                self.version_combo.set('')
-                self.status_var.set("No versions found or an error occurred. Meow :(")
-        except Exception as e:
-            self.status_var.set(f"Error fetching versions: {e}")
-            messagebox.showerror("Error 喵!", f"Could not fetch versions: {e}")
-        finally:
-            if not self.version_var.get() or not self.versions_cache:
-                 self.launch_button.config(state=tk.DISABLED)
+            # Only the installed set changes, the cached manifest is still good.
+            # Browsing again before this finishes supersedes it
+            self.tasks.submit("installed", self._scan_installed_task, directory,
+                              on_result=lambda ids: self.bus.call(self._show_versions, None, None, directory, ids))
+
+    def _scan_installed_task(self, operation, directory):
+        return self._watch_installed(operation, directory)
+
+    def _watch_installed(self, operation, directory):
+        """Worker thread: the directory's installed ids; changes on disk show up in the list by themselves.
+
+        Only the directory shown is watched: the ones browsed away from stop their watcher threads.
+        """
+        operation.check() # Superseded by a browse to another directory; don't watch this one again
+        engine = self._get_engine()
+        index = engine.installed_index(directory) # Scanned once per directory, then watched
+        with self._engine_lock:
+            listener = self._watched.get(directory)
+            subscribe = listener is None
+            if subscribe:
+                listener = lambda ids: self.bus.call(self._show_versions, None, None, directory, ids)
+                self._watched[directory] = listener
+            stale = [other for other in list(self._watched) if other != directory]
+            for other in stale:
+                del self._watched[other]
+        if subscribe:
+            index.subscribe(listener)
+        for other in stale:
+            engine.close_installed_index(other) # Stops its watcher thread; its listeners go with it
+        return index.ids()
+
+    def _fetch_versions_task(self, operation, directory, force=False, background=False):
+        # background: a list is already showing (last session's), so leave it usable meanwhile
+        self.bus.post("status", "Checking for new versions in the background, nya~" if background else "Fetching versions, purrrr...")
+        if not background:
+            self.bus.call(self.launch_button.config, state=tk.DISABLED)
+        # Get all available versions (releases and snapshots).
+        # Served from the on-disk cache when we have one; a stale copy is
+        # revalidated in the background and the list refreshed if it changed.
+        versions = self._get_engine().get_versions(force=force, on_update=self._on_versions_updated)
+        return versions, directory, self._watch_installed(operation, directory)
+
+    def _versions_fetched(self, result):
+        versions, directory, installed = result
+        self.bus.call(self._show_versions, versions, "Versions fetched! Select one and launch, nya~", directory, installed)
+
+    def _versions_failed(self, error, background=False):
+        self.bus.post("status", f"Error fetching versions: {error}")
+        if background:
+            return # Keep showing the last session's list; Refresh tries again
+        self.bus.call(messagebox.showerror, "Error 喵!", f"Could not fetch versions: {error}")
+        if self.versions_cache and self.version_var.get():
+            self.bus.call(self._update_launch_button, True) # Keep the list we already had
+
+    def _on_versions_updated(self, versions):
+        # Background revalidation found a newer manifest
+        self.bus.call(self._show_versions, versions, None)
+
+    def _show_versions(self, versions, status, directory=None, installed=None):
+        # Runs on the Tk thread; a scan of a directory the user has since browsed away from is dropped
+        rebuild = versions is not None
+        if versions is not None:
+            self.versions_cache = versions
+        if installed is not None and directory == self.dir_var.get():
+            rebuild = rebuild or frozenset(installed) != self.installed
+            self.installed = frozenset(installed)
+        if rebuild: # Installed modded profiles are part of the index
+            self.version_index = VersionIndex(self.versions_cache, self.installed)
+        if self.refresh_version_display() and status:
+            self.status_var.set(status)
+
+    def refresh_version_display(self):
+        """Re-filters the indexed version list in memory (no network, no disk). Returns True if anything is listed."""
+        forge = self.forge_var.get()
+        kind = self.type_filter_var.get()
+        # For Forge, we usually install it FOR a vanilla version.
+        # So we list vanilla versions here (typically releases). Forge selection is a separate checkbox.
+        types = {"release"} if forge else (None if kind == "all" else {kind})
+        matches = self.version_index.search(prefix=self.typed, types=types, installed=self.installed,
+                                            installed_only=self.installed_only_var.get())
+
+        display_versions = []
+        for v in matches:
+            suffix = " (installed)" if v["id"] in self.installed else ""
+            if forge:
+                display_versions.append(f"{v['id']}{suffix}")
             else:
-                 self.launch_button.config(state=tk.NORMAL)
+                display_versions.append(f"{v['id']} ({v['type']}){suffix}")
+
+        self.version_combo['values'] = display_versions
+        if display_versions:
+            if not self.typed: # Leave what the user is typing alone
+                # Keep the user's pick if it is still in the list
+                selected_id = self.version_var.get().split(" ")[0]
+                self.version_combo.set(next((d for d in display_versions if d.split(" ")[0] == selected_id), display_versions[0]))
+            self._update_launch_button(True)
+            return True
+        if not self.typed:
+            self.version_combo.set('')
+        self._update_launch_button(False)
+        if len(self.version_index) and (self.typed or kind != "all" or self.installed_only_var.get()):
+            self.status_var.set("No versions match the filter. Meow?")
+        else:
+            self.status_var.set("No versions found or an error occurred. Meow :(")
+        return False
 
+    def _update_launch_button(self, listed):
+        # A launch in progress keeps it disabled; _launch_ended gives it back
+        self.launch_button.config(state=tk.NORMAL if listed and not self.launching else tk.DISABLED)
 
-    def fetch_versions_thread(self):
-        threading.Thread(target=self._fetch_versions_task, daemon=True).start()
+    def on_version_typed(self, event):
+        if event.keysym in TYPE_AHEAD_IGNORED_KEYS:
+            return
+        if event.keysym == "Return":
+            self._pick_typed()
+            return
+        text = self.version_var.get().strip()
+        self.typed = text.split(" ")[0] if text else "" # "1.20.1 (release)" filters as "1.20.1"
+        if self.refresh_version_display() and self.typed:
+            self.status_var.set(f"{len(self.version_combo['values'])} versions start with '{self.typed}'. Enter picks the first, nya~")
+
+    def _pick_typed(self):
+        """Turns typed text into a listed version: the exact id if there is one, else the first match.
+
+        Returns False (and leaves the text alone) when nothing matches.
+        """
+        if not self.typed:
+            return True
+        values = self.version_combo['values']
+        if not values:
+            self.status_var.set(f"No version starts with '{self.typed}'. Meow?")
+            return False
+        exact = next((d for d in values if d.split(" ")[0] == self.typed), None)
+        self.typed = ""
+        self.version_combo.set(exact or values[0])
+        self.refresh_version_display()
+        self.on_version_selected()
+        return True
+
+    def fetch_versions_thread(self, force=False):
+        if self.tasks.running("startup") is not None:
+            # Startup is still fetching (or checking Java right after); a second fetch would only race it
+            self.status_var.set("Still starting up and fetching versions, nya~...")
+            return
+        # Clicking Refresh again while a fetch runs joins it; a fetch for another directory supersedes it
+        self.tasks.submit("versions", self._fetch_versions_task, self.dir_var.get(), force,
+                          on_result=self._versions_fetched, on_error=self._versions_failed)
 
     def on_version_selected(self, event=None):
-        # This can be used later if specific actions are needed when a version is selected
+        if event is not None and self.typed: # Picked from the filtered list; show the full list again
+            self.typed = ""
+            self.refresh_version_display()
         selected_display_name = self.version_var.get()
         self.status_var.set(f"Selected: {selected_display_name}. Ready to launch! ^_^")
 
 
     def toggle_forge_versions(self):
         self.status_var.set("Toggled Forge! Refreshing versions for you, purrfect!")
-        self.fetch_versions_thread() # Re-fetch and filter versions based on Forge selection
+        if self.versions_cache:
+            self.refresh_version_display() # Re-filter the cached list based on Forge selection
+        else:
+            self.fetch_versions_thread()
 
 
-    def _launch_minecraft_task(self):
-        self.launch_button.config(state=tk.DISABLED)
-        self.status_var.set("Preparing to launch... hold on to your whiskers!")
+    def _launch_minecraft_task(self, operation, settings):
+        self.bus.post("status", "Preparing to launch... hold on to your whiskers!")
 
-        selected_display_name = self.version_var.get()
+        selected_display_name = settings["version"]
         if not selected_display_name:
-            self.status_var.set("No version selected, nya!")
-            messagebox.showerror("Error 냥!", "Please select a Minecraft version first!")
-            self.launch_button.config(state=tk.NORMAL)
+            self.bus.post("status", "No version selected, nya!")
+            self.bus.call(messagebox.showerror, "Error 냥!", "Please select a Minecraft version first!")
+            self.bus.call(self._launch_ended)
             return
 
         # Extract the actual version ID from the display name (e.g., "1.19.2 (release) (installed)" -> "1.19.2")
         version_id = selected_display_name.split(" ")[0]
 
-        minecraft_directory = self.dir_var.get()
+        minecraft_directory = settings["directory"]
         if not os.path.isdir(minecraft_directory):
             try:
                 os.makedirs(minecraft_directory, exist_ok=True)
-                self.status_var.set(f"Created Minecraft directory: {minecraft_directory}")
+                self.bus.post("status", f"Created Minecraft directory: {minecraft_directory}")
             except Exception as e:
-                self.status_var.set(f"Error creating directory: {e}")
-                messagebox.showerror("Directory Error 喵!", f"Could not create Minecraft directory: {minecraft_directory}\n{e}")
-                self.launch_button.config(state=tk.NORMAL)
+                self.bus.post("status", f"Error creating directory: {e}")
+                self.bus.call(messagebox.showerror, "Directory Error 喵!", f"Could not create Minecraft directory: {minecraft_directory}\n{e}")
+                self.bus.call(self._launch_ended)
                 return
 
-        username = self.username_var.get() if self.username_var.get() else f"Player{random.randint(100,999)}"
-        ram_allocation = self.ram_var.get()
+        username = settings["username"] if settings["username"] else f"Player{random.randint(100,999)}"
 
         options = {
             "username": username,
             "uuid": str(uuid.uuid4()), # Generate a new UUID for each offline launch
             "token": "",  # For offline mode, token is typically empty
-            # JVM arguments can be customized here
-            "jvmArguments": [f"-Xmx{ram_allocation}", f"-Xms{ram_allocation.replace('G','M') if 'G' in ram_allocation else ram_allocation}"], # Basic RAM
             "launcherName": "CuteLauncher喵",
             "launcherVersion": "0.1"
         }
@@ -190,52 +440,91 @@ class AdvancedMinecraftLauncher:
         # options["puid"] = options["uuid"] # Some newer discussions point to PUID being same as UUID for offline
 
         try:
-            self.status_var.set(f"Installing Minecraft {version_id}, please wait... this might take a while, nya!")
-            mclib.install.install_minecraft_version(versionid=version_id, minecraft_directory=minecraft_directory)
-            self.status_var.set(f"Minecraft {version_id} is installed! Meowvellous!")
-
-            version_to_launch = version_id
-
-            if self.forge_var.get():
-                self.status_var.set(f"Looking for Forge for {version_id}...")
-                try:
-                    forge_version_name = mclib.forge.find_forge_version(version_id)
-                    if forge_version_name:
-                        self.status_var.set(f"Found Forge: {forge_version_name}. Installing... (this can be slow, hang in there!)")
-                        mclib.forge.install_forge_version(forge_version_name, minecraft_directory,
-                                                          callback={'setStatus': lambda text: self.status_var.set(f"Forge: {text}")})
-                        self.status_var.set(f"Forge {forge_version_name} installed! Ready to launch with Forge!")
-                        version_to_launch = forge_version_name # Launch the forge version ID
-                    else:
-                        self.status_var.set(f"Could not find a compatible Forge version for {version_id}. Launching vanilla.")
-                        messagebox.showwarning("Forge Not Found 喵~", f"Could not automatically find a Forge version for {version_id}. Launching vanilla Minecraft instead.")
-                except Exception as e:
-                    self.status_var.set(f"Error with Forge for {version_id}: {e}. Launching vanilla.")
-                    messagebox.showerror("Forge Error 냥!", f"An error occurred during Forge setup for {version_id}:\n{e}\nLaunching vanilla Minecraft.")
-
-
-            self.status_var.set(f"Getting command for {version_to_launch}...")
-            command = mclib.command.get_minecraft_command(version=version_to_launch,
-                                                          minecraft_directory=minecraft_directory,
-                                                          options=options)
-            
-            self.status_var.set(f"Launching {version_to_launch} as {username}! Pew pew! Please wait for Minecraft to start...")
-            # For better UX, you might want to hide the launcher window or provide more feedback
-            # Using Popen for non-blocking launch
-            subprocess.Popen(command, cwd=minecraft_directory) # Run in the minecraft directory
+            # One span around the whole click so the slowest stages can be shown afterwards
+            with trace.span("play", version=version_id, forge=settings["forge"]) as play:
+                engine = self._get_engine() # Normally built by the startup thread already
+                self.bus.post("status", f"Installing Minecraft {version_id}, please wait... this might take a while, nya!")
+                engine.install(version_id, minecraft_directory,
+                               callback=operation.callbacks(self.bus.callbacks(status_suffix=" nya~")))
+                self.bus.post("status", f"Minecraft {version_id} is installed! Meowvellous!")
+
+                version_to_launch = version_id
+
+                if settings["forge"]:
+                    self.bus.post("status", f"Looking for Forge for {version_id}...")
+                    try:
+                        forge_version_name = engine.find_forge_version(version_id)
+                        if forge_version_name:
+                            self.bus.post("status", f"Found Forge: {forge_version_name}. Installing... (this can be slow the first time, hang in there!)")
+                            # Skips the install when this directory already has it; returns the profile id to launch.
+                            # version_id was verified just above, so only Forge's own files are checked
+                            version_to_launch = engine.install_forge(forge_version_name, minecraft_directory,
+                                                                     callback=operation.callbacks(self.bus.callbacks(status_prefix="Forge: ")),
+                                                                     verified=[version_id])
+                            self.bus.post("status", f"Forge {forge_version_name} installed! Ready to launch with Forge!")
+                        else:
+                            self.bus.post("status", f"Could not find a compatible Forge version for {version_id}. Launching vanilla.")
+                            self.bus.call(messagebox.showwarning, "Forge Not Found 喵~", f"Could not automatically find a Forge version for {version_id}. Launching vanilla Minecraft instead.")
+                    except Cancelled:
+                        raise
+                    except Exception as e:
+                        self.bus.post("status", f"Error with Forge for {version_id}: {e}. Launching vanilla.")
+                        self.bus.call(messagebox.showerror, "Forge Error 냥!", f"An error occurred during Forge setup for {version_id}:\n{e}\nLaunching vanilla Minecraft.")
+
+
+                operation.check() # Last chance to cancel; past this point the game is starting
+                self.bus.post("status", f"Launching {version_to_launch} as {username}! Pew pew! Please wait for Minecraft to start...")
+                # Picks the Java this version asks for and fills only username/UUID/RAM into the cached plan;
+                # the supervisor drains the game's output and tells us when it exits or crashes
+                # JVM flags come from the chosen profile; the RAM box (if filled in) overrides its heap size
+                instance = engine.launch(version_to_launch, minecraft_directory, options,
+                                              profile=settings["profile"], heap=settings["ram"])
+                tuning = instance.tuning
+                self.bus.post("status", f"Minecraft {version_to_launch} is running as {username} (PID: {instance.pid}, "
+                                        f"{tuning['profile']}: {tuning['heap_mb']}M heap, {tuning['gc']}, CDS {tuning['cds']}), nya~")
+            if play:
+                self.bus.post("stages", f"Slowest stages: {trace.summary_line(play)} (whole launch {play.seconds:.1f}s)")
             # self.root.iconify() # Optionally minimize the launcher
 
+        except Cancelled:
+            # Finished files stay, big half-done ones keep their resume journal: the next try continues
+            self.bus.post("status", f"Launch of {version_id} cancelled. Next time picks up where this stopped, nya~")
         except Exception as e:
-            self.status_var.set(f"Launch Error: {e}")
-            messagebox.showerror("Launch Error 냥!", f"Failed to launch Minecraft:\n{e}")
+            self.bus.post("status", f"Launch Error: {e}")
+            self.bus.call(messagebox.showerror, "Launch Error 냥!", f"Failed to launch Minecraft:\n{e}")
         finally:
-            self.launch_button.config(state=tk.NORMAL)
+            self.bus.call(self._launch_ended)
+
+    def _launch_ended(self):
+        self.launching = False
+        self._update_launch_button(bool(self.version_combo['values']))
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def cancel_launch(self):
+        if self.tasks.cancel("launch"):
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set("Cancelling... stopping the downloads, nya~")
 
 
     def launch_minecraft_thread(self):
-        # Run the launch process in a separate thread to keep the UI responsive
-        thread = threading.Thread(target=self._launch_minecraft_task, daemon=True)
-        thread.start()
+        # Read the Tk variables here on the Tk thread; the worker only gets plain values
+        if not self._pick_typed(): # Half-typed "1.20" launches the version the list shows for it
+            return
+        self.launching = True
+        self.launch_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.save_session() # What gets launched is what the next start opens with
+        settings = {
+            "version": self.version_var.get(),
+            "directory": self.dir_var.get(),
+            "username": self.username_var.get(),
+            "ram": self.ram_var.get().strip(),
+            "profile": self.profile_var.get(),
+            "forge": self.forge_var.get(),
+        }
+        # Runs on the task pool to keep the UI responsive; Cancel stops it (cancelled while queued, it never starts)
+        self.tasks.submit("launch", self._launch_minecraft_task, settings,
+                          on_cancel=lambda: self.bus.call(self._launch_ended))
 
 
 if __name__ == "__main__":
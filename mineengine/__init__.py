@@ -0,0 +1,5 @@
+"""Shared launcher engine used by the Cute & Advanced Minecraft Launcher scripts.
+
+The GUI scripts (``mine4k1.0a.py`` and ``1.py``) stay thin; caching, installing
+and launching helpers live in the modules of this package.
+"""
@@ -0,0 +1,309 @@
+"""Command line entry point: ``python -m mineengine <command>``.
+
+``install`` is the headless provisioning mode: it installs a list of versions
+(vanilla and Forge) concurrently and prints JSON lines (one object per line)
+so build/lab scripts can follow along, ending with a ``summary`` line.
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+
+from . import trace
+from .jvm import PROFILES
+from .paths import get_default_minecraft_directory
+from .store import ObjectStore
+
+PROGRESS_INTERVAL = 0.5  # seconds between progress lines per job
+
+
+class JsonLinesReporter:
+    """Writes one JSON object per line; progress lines are throttled per job."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({"event": event, "time": round(time.time(), 3), **fields})
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def callbacks(self, version_id, forge=False):
+        state = {"max": 0, "sent": None, "last": 0.0}
+
+        def set_progress(value):
+            now = time.monotonic()
+            finished = bool(state["max"]) and value >= state["max"]
+            if value != state["sent"] and (finished or now - state["last"] >= PROGRESS_INTERVAL):
+                state.update(sent=value, last=now)
+                self.emit("progress", version=version_id, forge=forge, value=value, max=state["max"])
+
+        return {
+            "setStatus": lambda text: self.emit("status", version=version_id, forge=forge, text=text),
+            "setProgress": set_progress,
+            "setMax": lambda value: state.update(max=value),
+        }
+
+
+def _engine(args):
+    from .download import Downloader
+    from .engine import LauncherEngine
+
+    downloader = Downloader(max_workers=args.downloads) if getattr(args, "downloads", None) else None
+    return LauncherEngine(downloader=downloader)
+
+
+def cmd_gc(args):
+    store = ObjectStore.from_config() or ObjectStore()
+    objects, freed = store.gc(dry_run=args.dry_run)
+    verb = "Would free" if args.dry_run else "Freed"
+    print(f"{verb} {objects} objects ({freed / (1024 * 1024):.1f} MiB) from {store.root}")
+    return 0
+
+
+def cmd_install(args):
+    engine = _engine(args)
+    reporter = JsonLinesReporter()
+    forge_versions = set(args.forge)
+    requests = [(version_id, args.dir, False) for version_id in args.versions]
+    requests += [(version_id, args.dir, True) for version_id in args.forge]
+    if not requests:
+        print("Nothing to install, give me some versions nya~", file=sys.stderr)
+        return 2
+
+    reporter.emit("start", directory=args.dir, versions=args.versions, forge=sorted(forge_versions),
+                  jobs=args.jobs, downloads=engine.downloader.max_workers)
+    started = time.perf_counter()
+    try:
+        results = engine.provision(requests, max_jobs=args.jobs, make_callback=reporter.callbacks)
+    finally:
+        engine.downloader.close()
+    for result in results:
+        reporter.emit("result", **result)
+    reporter.emit("summary", seconds=round(time.perf_counter() - started, 3),
+                  ok=all(result["ok"] for result in results),
+                  versions={("forge:" if r["forge"] else "") + r["version"]: {
+                      "status": "ok" if r["ok"] else "failed", "seconds": r["seconds"],
+                      "files": r.get("files", 0), "downloaded": r.get("downloaded", 0),
+                      "bytes": r.get("bytes", 0)} for r in results})
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+def cmd_versions(args):
+    from .engine import LauncherEngine
+
+    if args.installed:
+        for version_id in sorted(LauncherEngine.installed_versions(args.dir)):
+            print(version_id)
+        return 0
+    engine = LauncherEngine()
+    for version in engine.get_versions(force=args.refresh):
+        if args.type == "all" or version["type"] == args.type:
+            print(version["id"] if not args.json else json.dumps(version))
+    return 0
+
+
+def cmd_java(args):
+    from .java import JavaRegistry
+
+    registry = JavaRegistry()
+    runtimes = registry.invalidate([args.dir]) if args.rescan else registry.runtimes([args.dir])
+    if not runtimes:
+        print("No Java found, nya~ (install one, then run this with --rescan)")
+        return 1
+    for path, info in sorted(runtimes.items(), key=lambda item: (-item[1]["major"], item[0])):
+        print(f"{info['major']:>3}  {info['version']:<14} {info['arch']:<8} {path}")
+    return 0
+
+
+def _parse_cpus(text):
+    """"0-3,6" -> [0, 1, 2, 3, 6]."""
+    cpus = []
+    for part in filter(None, text.split(",")):
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def cmd_launch(args):
+    import os
+    import uuid
+
+    from .supervisor import ResourceLimits
+
+    engine = _engine(args)
+    options = {"username": args.username, "uuid": "", "token": ""}
+    if args.java:
+        options["executablePath"] = args.java
+    heap = f"{args.ram}G" if args.ram else None
+    if args.print_command:
+        command, tuning = engine.prepare_launch(args.version, args.dir, options, profile=args.profile, heap=heap,
+                                                instances=args.count)
+        print(json.dumps({"command": command, "tuning": tuning}))
+        return 0
+
+    reporter = JsonLinesReporter()
+    limits = ResourceLimits(cpus=_parse_cpus(args.cpus) if args.cpus else None, nice=args.nice,
+                            memory_mb=args.memory_mb)
+    instances = []
+    for number in range(1, args.count + 1):
+        instance_options = dict(options, uuid=str(uuid.uuid4()))
+        if args.count > 1:
+            # Separate players and game directories so clients don't fight over saves/options.txt
+            instance_options["username"] = f"{args.username}{number}"
+            instance_options["gameDirectory"] = os.path.join(args.dir, "instances", str(number))
+        instance = engine.launch(args.version, args.dir, instance_options, limits=limits, profile=args.profile,
+                                 heap=heap, instances=args.count)
+        reporter.emit("launched", **instance.summary())
+        instances.append(instance)
+
+    printed = {instance.id: 0 for instance in instances}
+    try:
+        while True:
+            alive = engine.supervisor.running()  # Before printing, so the last lines aren't missed
+            for instance in instances:
+                total = instance.log.total
+                if args.follow and total > printed[instance.id]:
+                    for stream, line in instance.log.lines(last=total - printed[instance.id]):
+                        reporter.emit("log", id=instance.id, stream=stream, line=line)
+                    printed[instance.id] = total
+            if not alive:
+                break
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        engine.supervisor.stop_all()
+    for instance in instances:
+        engine.supervisor.wait(instance.id)
+        reporter.emit("exited", **instance.summary())
+    return max(0 if instance.state == "exited" else 1 for instance in instances)
+
+
+def cmd_mirror(args):
+    from .mirror import MirrorServer
+
+    server = MirrorServer(host=args.host, port=args.port)
+    print(f"Mirroring game files on {server.address}, nya~ Point other launchers at it with "
+          f'"mirrors": ["http://<this machine>:{server.httpd.server_address[1]}"]', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(json.dumps(server.stats))
+    return 0
+
+
+def cmd_history(args):
+    from .engine import LauncherEngine
+
+    for launch in LauncherEngine.launch_history(limit=args.limit):
+        if args.version and launch.get("version") != args.version:
+            continue
+        tuning = launch.get("tuning") or {}
+        ready = launch.get("ready_seconds")
+        print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(launch.get('time', 0)))}  "
+              f"{launch.get('version', '?'):<24} {tuning.get('profile', 'custom'):<12} {tuning.get('gc', '-'):<10} "
+              f"cds={tuning.get('cds', '-'):<6} heap={tuning.get('heap_mb', '-')}M  "
+              f"menu={f'{ready:.1f}s' if ready is not None else '-':<7} {launch.get('state', 'running')}")
+    return 0
+
+
+def cmd_metrics(args):
+    entries = trace.read_metrics(name=args.name, limit=args.limit)
+    if not entries:
+        print("No metrics recorded yet, nya~")
+        return 0
+    stages = {}
+    for entry in entries:
+        stages.setdefault(entry["name"], []).append(entry["seconds"])
+        for stage, seconds in entry.get("stages", {}).items():
+            stages.setdefault(f"  {stage}" if args.name else f"  {entry['name']} > {stage}", []).append(seconds)
+    print(f"{'stage':<48} {'runs':>5} {'median':>9} {'max':>9} {'last':>9}")
+    for stage, seconds in stages.items():
+        print(f"{stage:<48} {len(seconds):5d} {statistics.median(seconds):9.3f} {max(seconds):9.3f} "
+              f"{seconds[-1]:9.3f}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m mineengine", description="Cute launcher engine, nya~")
+    parser.add_argument("--trace", metavar="FILE", default=None,
+                        help="write a Chrome trace of this run (open in chrome://tracing or ui.perfetto.dev)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gc_parser = commands.add_parser("gc", help="delete store objects no Minecraft directory uses any more")
+    gc_parser.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+    gc_parser.set_defaults(func=cmd_gc)
+
+    install_parser = commands.add_parser("install", help="install versions headlessly, printing JSON lines")
+    install_parser.add_argument("versions", nargs="*", help="vanilla version ids, e.g. 1.20.4 1.8.9")
+    install_parser.add_argument("--forge", action="append", default=[], metavar="VERSION",
+                                help="also install the recommended Forge for this Minecraft version (repeatable)")
+    install_parser.add_argument("--dir", default=get_default_minecraft_directory(), help="Minecraft directory")
+    install_parser.add_argument("--jobs", type=int, default=4, help="versions installed at once")
+    install_parser.add_argument("--downloads", type=int, default=None,
+                                help="global download budget shared by all jobs (default from config)")
+    install_parser.set_defaults(func=cmd_install)
+
+    versions_parser = commands.add_parser("versions", help="list available (or installed) versions")
+    versions_parser.add_argument("--type", default="release", help="release, snapshot, old_beta, ... or all")
+    versions_parser.add_argument("--installed", action="store_true", help="list versions installed in --dir")
+    versions_parser.add_argument("--refresh", action="store_true", help="ignore the cached manifest")
+    versions_parser.add_argument("--json", action="store_true", help="one JSON object per version")
+    versions_parser.add_argument("--dir", default=get_default_minecraft_directory(), help="Minecraft directory")
+    versions_parser.set_defaults(func=cmd_versions)
+
+    java_parser = commands.add_parser("java", help="list the Java runtimes launches pick from")
+    java_parser.add_argument("--rescan", action="store_true", help="search the machine again (after installing a JDK)")
+    java_parser.add_argument("--dir", default=get_default_minecraft_directory(), help="Minecraft directory")
+    java_parser.set_defaults(func=cmd_java)
+
+    launch_parser = commands.add_parser("launch", help="launch an installed version")
+    launch_parser.add_argument("version", help="installed version (or Forge profile) id")
+    launch_parser.add_argument("--username", default="Player")
+    launch_parser.add_argument("--ram", type=int, default=None, help="GB of heap (default: sized by the profile)")
+    launch_parser.add_argument("--profile", choices=sorted(PROFILES), default=None,
+                               help="JVM tuning profile (default from config)")
+    launch_parser.add_argument("--java", default=None, help="java executable (default: picked per version)")
+    launch_parser.add_argument("--dir", default=get_default_minecraft_directory(), help="Minecraft directory")
+    launch_parser.add_argument("--print-command", action="store_true", help="print the command instead of running it")
+    launch_parser.add_argument("--count", type=int, default=1,
+                               help="clients to run at once, each with its own username and game directory")
+    launch_parser.add_argument("--follow", action="store_true", help="print game output as JSON lines")
+    launch_parser.add_argument("--cpus", default=None, help="pin the game to these CPUs, e.g. 0-3,6")
+    launch_parser.add_argument("--nice", type=int, default=None, help="run at this niceness (lower priority)")
+    launch_parser.add_argument("--memory-mb", type=int, default=None, help="kill an instance above this resident memory")
+    launch_parser.set_defaults(func=cmd_launch)
+
+    mirror_parser = commands.add_parser("mirror", help="serve game files to other launchers on the LAN")
+    mirror_parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    mirror_parser.add_argument("--port", type=int, default=None, help="port (default from config, 8765)")
+    mirror_parser.set_defaults(func=cmd_mirror)
+
+    history_parser = commands.add_parser("history", help="past launches: profile, GC, CDS and time to title screen")
+    history_parser.add_argument("--version", default=None, help="only launches of this version")
+    history_parser.add_argument("--limit", type=int, default=20)
+    history_parser.set_defaults(func=cmd_history)
+
+    metrics_parser = commands.add_parser("metrics", help="stage timings from the rolling metrics file")
+    metrics_parser.add_argument("--name", default=None, help="only operations of this kind, e.g. launch, install")
+    metrics_parser.add_argument("--limit", type=int, default=50, help="newest operations to include")
+    metrics_parser.set_defaults(func=cmd_metrics)
+
+    args = parser.parse_args(argv)
+    if not args.trace:
+        return args.func(args)
+    trace.configure(True)
+    try:
+        return args.func(args)
+    finally:
+        trace.export_chrome(args.trace)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""Launch commands from a cached, pre-resolved launch plan.
+
+Building a command normally means re-reading the version JSON and its whole
+``inheritsFrom`` chain and re-evaluating every library rule. Here that work is
+done once per version and directory and saved as a "launch plan" (classpath,
+natives dir, main class, argument templates) in
+``<minecraft dir>/.mineengine/launch-plans.json``. A plan is reused as long as
+the JSON files it came from have the same size and mtime; each launch then only
+fills in per-launch values like the username, UUID and JVM memory flags.
+"""
+import json
+import os
+import threading
+
+from . import trace
+from .errors import VersionNotFound
+from .install import get_runtime_platform
+from .java import find_java_in
+from .versions import (get_arch_bits, get_native_classifier, get_os_name, get_version_json_path, library_path,
+                       resolve_version_json, rules_allow)
+
+PLAN_FORMAT = 1
+
+
+def _rule_features(rules):
+    """The feature flags an argument's rules depend on, or None if the OS rules exclude it."""
+    if not rules:
+        return {}
+    os_only = [{k: v for k, v in rule.items() if k != "features"} for rule in rules if "features" not in rule]
+    if os_only and not rules_allow(os_only):
+        return None
+    features = {}
+    for rule in rules:
+        if rule.get("action") == "allow":
+            features.update(rule.get("features", {}))
+    return features
+
+
+def _argument_entries(arguments):
+    """Turns a ``arguments.game``/``arguments.jvm`` list into ``[values, features]`` pairs."""
+    entries = []
+    for arg in arguments:
+        if isinstance(arg, str):
+            entries.append([[arg], {}])
+            continue
+        features = _rule_features(arg.get("rules"))
+        if features is None:
+            continue
+        value = arg["value"]
+        entries.append([[value] if isinstance(value, str) else list(value), features])
+    return entries
+
+
+def build_launch_plan(minecraft_directory, version_id):
+    """Resolves everything about launching ``version_id`` that doesn't change between launches."""
+    if not os.path.isfile(get_version_json_path(minecraft_directory, version_id)):
+        raise VersionNotFound(version_id)
+    data, chain = resolve_version_json(minecraft_directory, version_id)
+    libraries_dir = os.path.join(minecraft_directory, "libraries")
+
+    classpath = []
+    for lib in data.get("libraries", []):
+        if not rules_allow(lib.get("rules")):
+            continue
+        downloads = lib.get("downloads", {})
+        if "artifact" in downloads:
+            classpath.append(os.path.join(libraries_dir, downloads["artifact"].get("path") or library_path(lib["name"])))
+        elif "natives" not in lib:
+            classpath.append(os.path.join(libraries_dir, library_path(lib["name"])))
+        classifier = get_native_classifier(lib)
+        if classifier:
+            native = downloads.get("classifiers", {}).get(classifier, {})
+            classpath.append(os.path.join(libraries_dir, native.get("path") or library_path(f"{lib['name']}:{classifier}")))
+    jar_id = data.get("jar", data["id"])
+    classpath.append(os.path.join(minecraft_directory, "versions", jar_id, f"{jar_id}.jar"))
+    classpath = list(dict.fromkeys(classpath))
+
+    if "arguments" in data:
+        jvm = _argument_entries(data["arguments"].get("jvm", []))
+        game = _argument_entries(data["arguments"].get("game", []))
+    else:
+        # Pre-1.13 versions: one string of game arguments and no JVM arguments
+        jvm = [[["-Djava.library.path=${natives_directory}", "-cp", "${classpath}"], {}]]
+        game = [[data.get("minecraftArguments", "").split(), {}]]
+
+    logging_arg = None
+    logging_client = data.get("logging", {}).get("client")
+    if logging_client:
+        log_config = os.path.join(minecraft_directory, "assets", "log_configs", logging_client["file"]["id"])
+        logging_arg = logging_client["argument"].replace("${path}", log_config)
+
+    assets_id = data.get("assets", data.get("assetIndex", {}).get("id", "legacy"))
+    assets_root = os.path.join(minecraft_directory, "assets")
+    game_assets = assets_root
+    asset_index_path = os.path.join(assets_root, "indexes", f"{assets_id}.json")
+    try:
+        with open(asset_index_path, "r", encoding="utf-8") as f:
+            asset_index = json.load(f)
+        if asset_index.get("map_to_resources"):
+            game_assets = os.path.join(minecraft_directory, "resources")
+        elif asset_index.get("virtual"):
+            game_assets = os.path.join(assets_root, "virtual", assets_id)
+    except (OSError, ValueError):
+        pass
+
+    java = None
+    component = data.get("javaVersion", {}).get("component")
+    if component:
+        java = find_java_in(os.path.join(minecraft_directory, "runtime", component, get_runtime_platform(), component))
+        if java and os.name == "nt" and os.path.isfile(os.path.join(os.path.dirname(java), "javaw.exe")):
+            java = os.path.join(os.path.dirname(java), "javaw.exe")
+
+    return {
+        "format": PLAN_FORMAT,
+        "version_id": version_id,
+        "main_class": data["mainClass"],
+        "classpath": classpath,
+        "natives_directory": os.path.join(minecraft_directory, "versions", data["id"], "natives"),
+        "jvm": jvm,
+        "game": game,
+        "logging_argument": logging_arg,
+        "java": java,
+        "variables": {
+            "version_name": data["id"],
+            "version_type": data.get("type", "release"),
+            "assets_root": assets_root,
+            "assets_index_name": assets_id,
+            "game_assets": game_assets,
+            "library_directory": libraries_dir,
+            "classpath_separator": os.pathsep,
+        },
+        "sources": [_stamp(get_version_json_path(minecraft_directory, v)) for v in chain] + [_stamp(asset_index_path)],
+    }
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return [path, st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [path, None, None]
+
+
+class LaunchPlanCache:
+    """Launch plans for one Minecraft directory, invalidated by their source files' stat."""
+
+    def __init__(self, minecraft_directory):
+        self.minecraft_directory = os.path.abspath(minecraft_directory)
+        self.path = os.path.join(self.minecraft_directory, ".mineengine", "launch-plans.json")
+        self._lock = threading.Lock()
+        self._plans = None
+
+    def _key(self, version_id):
+        return f"{version_id}|{get_os_name()}|{get_arch_bits()}"
+
+    def _load(self):
+        if self._plans is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._plans = json.load(f)
+            except (OSError, ValueError):
+                self._plans = {}
+        return self._plans
+
+    def get_plan(self, version_id):
+        with self._lock:
+            plan = self._load().get(self._key(version_id))
+            if plan and plan.get("format") == PLAN_FORMAT and all(
+                    _stamp(source[0]) == source for source in plan["sources"]):
+                trace.count("plan.cache_hits")
+                return plan
+        trace.count("plan.cache_misses")
+        with trace.span("launch.plan_build", version=version_id):
+            plan = build_launch_plan(self.minecraft_directory, version_id)
+        with self._lock:
+            self._load()[self._key(version_id)] = plan
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._plans, f)
+            os.replace(tmp_path, self.path)
+        return plan
+
+    def get_minecraft_command(self, version, options):
+        """Same result shape as ``minecraft_launcher_lib.command.get_minecraft_command``."""
+        return render_command(self.get_plan(version), self.minecraft_directory, options)
+
+
+def render_command(plan, minecraft_directory, options):
+    """Fills a launch plan with the per-launch ``options`` (mclib option names)."""
+    features = {
+        "is_demo_user": options.get("demo", False),
+        "has_custom_resolution": bool(options.get("customResolution", False)),
+        "has_quick_plays_support": bool(options.get("quickPlayPath")),
+        "is_quick_play_singleplayer": bool(options.get("quickPlaySingleplayer")),
+        "is_quick_play_multiplayer": bool(options.get("quickPlayMultiplayer")),
+        "is_quick_play_realms": bool(options.get("quickPlayRealms")),
+    }
+    token = options.get("token", "")
+    variables = dict(plan["variables"])
+    variables.update({
+        "natives_directory": options.get("nativesDirectory", plan["natives_directory"]),
+        "classpath": os.pathsep.join(plan["classpath"]),
+        "launcher_name": options.get("launcherName", "CuteLauncher"),
+        "launcher_version": options.get("launcherVersion", "0.1"),
+        "auth_player_name": options.get("username", "Player"),
+        "auth_uuid": options.get("uuid", ""),
+        "auth_access_token": token,
+        "auth_session": token,
+        "auth_xuid": options.get("xuid", ""),
+        "clientid": options.get("clientid", ""),
+        "user_type": "msa",
+        "user_properties": "{}",
+        "game_directory": options.get("gameDirectory", minecraft_directory),
+        "resolution_width": str(options.get("resolutionWidth", 854)),
+        "resolution_height": str(options.get("resolutionHeight", 480)),
+        "quickPlayPath": options.get("quickPlayPath", ""),
+        "quickPlaySingleplayer": options.get("quickPlaySingleplayer", ""),
+        "quickPlayMultiplayer": options.get("quickPlayMultiplayer", ""),
+        "quickPlayRealms": options.get("quickPlayRealms", ""),
+    })
+
+    def render(entries):
+        args = []
+        for values, needed in entries:
+            if all(bool(features.get(name, False)) == wanted for name, wanted in needed.items()):
+                for value in values:
+                    for name, replacement in variables.items():
+                        value = value.replace("${" + name + "}", replacement)
+                    args.append(value)
+        return args
+
+    command = [options.get("executablePath") or plan["java"] or "java"]
+    command.extend(options.get("jvmArguments", []))
+    command.extend(render(plan["jvm"]))
+    if plan["logging_argument"] and options.get("enableLoggingConfig", True):
+        command.append(plan["logging_argument"])
+    command.append(plan["main_class"])
+    command.extend(render(plan["game"]))
+    if options.get("server"):
+        command.extend(["--server", options["server"], "--port", str(options.get("port", "25565"))])
+    return command
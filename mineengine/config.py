@@ -0,0 +1,80 @@
+"""Launcher settings, read from ``config.json`` in the launcher data directory.
+
+Only keys present in the file override the defaults below, so an empty or
+missing file simply means "use the defaults".
+"""
+import json
+import os
+
+from .paths import get_launcher_data_dir
+
+DEFAULTS = {
+    # How long (seconds) a downloaded version manifest counts as fresh before
+    # we revalidate it with a conditional GET.
+    "manifest_ttl": 10 * 60,
+    # Network timeout (seconds) for manifest and download requests.
+    "http_timeout": 15,
+    # Size of the download worker pool, and how many of those workers may
+    # talk to the same host at once.
+    "download_workers": 16,
+    "download_per_host": 8,
+    # Files at least this big (MiB) keep a journal so an interrupted download
+    # resumes where it stopped; from parallel_range_min_mb on they are also
+    # fetched as up to range_parts byte ranges at once.
+    "resume_min_size_mb": 1,
+    "parallel_range_min_mb": 8,
+    "range_parts": 4,
+    # LAN caching mirrors tried before upstream, e.g. ["http://10.0.0.5:8765"]
+    # (MINEENGINE_MIRRORS="url,url" overrides), the port "python -m mineengine
+    # mirror" listens on, and extra upstream hosts it may fetch from.
+    "mirrors": [],
+    "mirror_port": 8765,
+    "mirror_allowed_hosts": [],
+    # Keep one copy of every downloaded file in a content-addressed store and
+    # hardlink it into each Minecraft directory. None = <data dir>/store.
+    "use_object_store": True,
+    "object_store_dir": None,
+    # How many independent Forge installer processors may run at once.
+    "forge_processor_workers": max(2, min(4, (os.cpu_count() or 2) // 2)),
+    # Output lines kept per running game instance, and how often (seconds) the
+    # supervisor checks instances for exits and memory use.
+    "instance_log_lines": 5000,
+    "supervisor_poll_interval": 2.0,
+    # How often (seconds) installed-version indexes re-check their versions/
+    # folder where inotify isn't available (see versionindex.py).
+    "installed_poll_interval": 2.0,
+    # Threads the GUIs' task runner (tasks.py) runs fetches, scans, installs
+    # and launches on; shared by every operation, so more clicks queue instead
+    # of piling up threads.
+    "task_workers": 4,
+    # JVM tuning profile used when a launch doesn't name one (see jvm.PROFILES),
+    # and whether to build/reuse a class-data-sharing archive per version.
+    "jvm_profile": "balanced",
+    "use_cds": True,
+    # Upstream endpoints; None means Mojang's and Forge's own. Point them at an
+    # internal copy or a local stand-in (see benchmarks/fake_mojang.py).
+    "version_manifest_url": None,
+    "resources_url": None,
+    "forge_maven_url": None,
+    # Time every stage (see trace.py); the rolling per-operation metrics file
+    # is trimmed to its newer half once it passes metrics_max_kb.
+    "tracing": True,
+    "metrics_max_kb": 512,
+}
+
+
+def get_config_path():
+    return os.path.join(get_launcher_data_dir(), "config.json")
+
+
+def load_config():
+    """Returns the defaults merged with whatever the user put in config.json."""
+    config = dict(DEFAULTS)
+    try:
+        with open(get_config_path(), "r", encoding="utf-8") as f:
+            user_config = json.load(f)
+        if isinstance(user_config, dict):
+            config.update(user_config)
+    except (OSError, ValueError):
+        pass  # No (valid) config file, nya~ defaults it is
+    return config
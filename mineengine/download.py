@@ -0,0 +1,645 @@
+"""Parallel file downloader with keep-alive connection reuse.
+
+Files are fetched by a bounded worker pool. Each worker borrows a persistent
+HTTP connection for the target host from ``ConnectionPool`` (so thousands of
+small asset requests don't each pay for a TCP + TLS handshake), and the number
+of simultaneous requests per host is capped. SHA-1 is computed while the body
+is streamed to disk and the file is only moved into place once it matches.
+
+Bigger files are written to ``<target>.part`` next to a ``.part.json`` journal
+of the bytes that are safely on disk, so an interrupted download (closed
+window, dropped connection) continues with an HTTP Range request instead of
+starting over. The largest ones (client jars, big libraries) are split into
+byte ranges fetched over several connections at once.
+"""
+import hashlib
+import http.client
+import json
+import os
+import queue
+import re
+import ssl
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import trace
+from .config import load_config
+from .errors import Cancelled, DownloadError
+from .mirror import SHA1_HEADER, get_mirrors
+from .store import ObjectStore
+
+USER_AGENT = "CuteLauncher/0.1"
+CHUNK_SIZE = 64 * 1024
+JOURNAL_INTERVAL = 2 * 1024 * 1024  # fsync + journal update after this many bytes per range
+MIN_RANGE_SIZE = 4 * 1024 * 1024  # Don't split files into ranges smaller than this
+
+
+class DownloadJob:
+    """One file to fetch: where from, where to, and what it should hash to."""
+
+    __slots__ = ("url", "path", "sha1", "size", "executable", "category")
+
+    def __init__(self, url, path, sha1=None, size=None, executable=False, category=None):
+        self.url = url
+        self.path = path
+        self.sha1 = sha1
+        self.size = size
+        self.executable = executable
+        self.category = category  # "assets", "libraries", ...: how traces break a batch down
+
+    def __repr__(self):
+        return f"DownloadJob({self.url!r} -> {self.path!r})"
+
+
+def sha1_of_file(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _NoRanges(Exception):
+    """The server answered a Range request with the whole file."""
+
+
+class _PartialFile:
+    """A ``.part`` file plus its journal of which bytes of each range are on disk.
+
+    ``parts`` is a list of ``[start, end, synced]``: the range ``[start, end)``
+    (``end`` is None while the size is unknown) of which the first ``synced``
+    bytes have been fsynced. The journal only ever claims fsynced bytes, so
+    whatever it says survives a crash.
+    """
+
+    def __init__(self, target, job, resumable):
+        self.path = target + ".part"
+        self.journal_path = self.path + ".json"
+        self.job = job
+        self.resumable = resumable
+        self.parts = []
+        self.validator = None  # Strong ETag or Last-Modified, sent as If-Range when resuming
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Picks up an earlier attempt. Returns the bytes it left on disk (0 = start fresh)."""
+        if not self.resumable:
+            return 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        # Known hashes identify the file whatever mirror it came from; otherwise the URL does
+        same = (journal.get("sha1") == self.job.sha1 if self.job.sha1 else journal.get("url") == self.job.url)
+        if not same or journal.get("size") != self.job.size or not os.path.isfile(self.path):
+            return 0  # A different file (or the .part is gone); start over
+        self.parts = journal["parts"]
+        self.validator = journal.get("validator")
+        return sum(part[2] for part in self.parts)
+
+    def reset(self, parts):
+        self.parts = parts
+        self.validator = None
+        with open(self.path, "wb") as f:
+            if self.job.size:
+                f.truncate(self.job.size)  # Sparse; every range writes at its own offset
+        self.save()
+
+    def pending(self):
+        return [i for i, (start, end, synced) in enumerate(self.parts) if end is None or start + synced < end]
+
+    def synced(self, index, synced):
+        with self._lock:
+            self.parts[index][2] = synced
+        self.save()
+
+    def save(self):
+        if not self.resumable:
+            return
+        with self._lock:
+            data = json.dumps({"url": self.job.url, "sha1": self.job.sha1, "size": self.job.size,
+                               "validator": self.validator, "parts": self.parts})
+            tmp_path = f"{self.journal_path}.tmp{threading.get_ident()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.journal_path)
+
+    def finish(self):
+        """The ``.part`` is complete and verified; the journal isn't needed any more."""
+        try:
+            os.remove(self.journal_path)
+        except OSError:
+            pass
+
+    def discard(self):
+        for path in (self.path, self.journal_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ConnectionPool:
+    """Idle keep-alive connections, keyed by (scheme, host:port)."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def acquire(self, scheme, netloc):
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop()
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def release(self, scheme, netloc, conn, reusable=True):
+        if not reusable:
+            conn.close()
+            return
+        with self._lock:
+            self._idle.setdefault((scheme, netloc), []).append(conn)
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+def check_cancelled(callback):
+    """Raises ``Cancelled`` once the callback dict's optional ``"cancelled"`` hook returns True.
+
+    The hook rides along in the mclib-style dict (``tasks.Operation.callbacks``
+    adds it) because that dict already reaches every install step.
+    """
+    cancelled = (callback or {}).get("cancelled")
+    if cancelled is not None and cancelled():
+        raise Cancelled()
+
+
+class _Progress:
+    """Aggregates progress from all workers into the mclib-style callback dict.
+
+    ``setMax``/``setProgress`` get file counts, ``setStatus`` gets a throughput
+    line at most a few times per second. Every chunk checks the ``"cancelled"``
+    hook, so a cancelled batch stops within one chunk per worker; big files
+    keep their resume journal.
+    """
+
+    STATUS_INTERVAL = 0.25
+
+    def __init__(self, callback, total, label):
+        self.callback = callback or {}
+        self.cancelled = self.callback.get("cancelled")
+        self.total = total
+        self.label = label
+        self.files = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self._last_status = 0.0
+        self._lock = threading.Lock()
+        self._call("setMax", total)
+        self._call("setProgress", 0)
+
+    def _call(self, name, *args):
+        func = self.callback.get(name)
+        if func:
+            func(*args)
+
+    def check(self):
+        if self.cancelled is not None and self.cancelled():
+            raise Cancelled()
+
+    def add_bytes(self, count):
+        self.check()
+        with self._lock:
+            self.bytes += count
+
+    def file_done(self):
+        with self._lock:
+            self.files += 1
+            files = self.files
+            now = time.perf_counter()
+            report = now - self._last_status >= self.STATUS_INTERVAL or files == self.total
+            if report:
+                self._last_status = now
+        self._call("setProgress", files)
+        if report:
+            self._call("setStatus", self.status_line())
+
+    def status_line(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-6)
+        return (f"{self.label} {self.files}/{self.total} files, "
+                f"{self.bytes / elapsed / (1024 * 1024):.1f} MB/s, {self.files / elapsed:.0f} files/s")
+
+
+class Downloader:
+    """Downloads batches of ``DownloadJob`` through a bounded worker pool."""
+
+    MAX_REDIRECTS = 5
+
+    def __init__(self, max_workers=None, per_host=None, timeout=None, retries=3, store=None, mirrors=None):
+        config = load_config()
+        # LAN mirrors are tried before the upstream host (see mirror.py)
+        self.mirrors = mirrors if mirrors is not None else get_mirrors()
+        # Files with a known SHA-1 go through the shared object store (if enabled)
+        self.store = store if store is not None else ObjectStore.from_config()
+        self.max_workers = max_workers or config["download_workers"]
+        self.per_host = per_host or config["download_per_host"]
+        self.retries = retries
+        self.resume_min_size = int(config["resume_min_size_mb"] * 1024 * 1024)
+        self.parallel_min_size = int(config["parallel_range_min_mb"] * 1024 * 1024)
+        self.range_parts = config["range_parts"]
+        self.pool = ConnectionPool(timeout or config["http_timeout"])
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+        self._object_locks = {}
+        # Global budget: however many batches run at once, at most max_workers requests are in flight
+        self._budget = threading.BoundedSemaphore(self.max_workers)
+
+    def _host_slot(self, netloc):
+        with self._host_lock:
+            if netloc not in self._host_slots:
+                self._host_slots[netloc] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[netloc]
+
+    def _object_lock(self, key):
+        # Only one worker fetches a given object (or path); the others then just link/skip it
+        with self._host_lock:
+            return self._object_locks.setdefault(key, threading.Lock())
+
+    # --- single requests ---
+
+    def _open(self, url, headers=None, sha1=None):
+        """GET ``url`` on a pooled connection, following redirects.
+
+        Configured mirrors are tried first (told the expected ``sha1``); one
+        that is unreachable, failing or missing the file falls through to the
+        next and finally to ``url`` itself. Returns ``(response, release)``;
+        call ``release(reusable)`` once the body has been read (or abandoned).
+        """
+        candidates = self.mirrors.candidates(url)
+        for mirror, candidate in candidates[:-1]:
+            mirror_headers = dict(headers or {})
+            if sha1:
+                mirror_headers[SHA1_HEADER] = sha1
+            try:
+                response, release = self._open_direct(candidate, mirror_headers)
+            except (OSError, http.client.HTTPException):
+                self.mirrors.mark_down(mirror)
+                continue
+            if response.status < 400:
+                return response, release
+            response.read()
+            release()
+        return self._open_direct(candidates[-1][1], headers)
+
+    def _open_direct(self, url, headers=None):
+        for _ in range(self.MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            conn = self.pool.acquire(parts.scheme, parts.netloc)
+            request_headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity"}
+            request_headers.update(headers or {})
+            try:
+                conn.request("GET", path, headers=request_headers)
+                response = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+
+            def release(reusable=True, parts=parts, conn=conn, response=response):
+                self.pool.release(parts.scheme, parts.netloc, conn, reusable and not response.will_close)
+
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                response.read()
+                release()
+                url = urllib.parse.urljoin(url, response.getheader("Location"))
+                continue
+            return response, release
+        raise DownloadError(url, "too many redirects")
+
+    def fetch_bytes(self, url):
+        """Fetches a small document (version JSON, asset index) into memory."""
+        last_error = None
+        for attempt in range(self.retries):
+            try:
+                response, release = self._open(url)
+                body = response.read()
+                release()
+                if response.status != 200:
+                    raise DownloadError(url, f"HTTP {response.status}")
+                return body
+            except (OSError, http.client.HTTPException) as e:
+                last_error = e
+                time.sleep(0.25 * (2 ** attempt))
+        raise DownloadError(url, last_error)
+
+    def _needs_download(self, job, index=None):
+        if index is not None:
+            return not index.is_valid(job.path, job.sha1, job.size)
+        if not os.path.isfile(job.path):
+            return True
+        if job.size is not None and os.path.getsize(job.path) != job.size:
+            return True
+        return job.sha1 is not None and sha1_of_file(job.path) != job.sha1
+
+    def _plan_parts(self, size):
+        """Byte ranges to fetch a file of ``size`` bytes in: one, or several for big files."""
+        if not size or size < self.parallel_min_size or self.range_parts < 2:
+            return [[0, size, 0]]
+        count = max(1, min(self.range_parts, size // MIN_RANGE_SIZE))
+        step = -(-size // count)
+        return [[start, min(size, start + step), 0] for start in range(0, size, step)]
+
+    def _fetch_part(self, job, partial, index, progress, digest=None):
+        """Fetches what's missing of one range into the ``.part`` file."""
+        start, end, synced = partial.parts[index]
+        position = start + synced
+        whole_file = position == 0 and (end is None or end == job.size) and len(partial.parts) == 1
+        headers = {}
+        if not whole_file:
+            headers["Range"] = f"bytes={position}-{'' if end is None else end - 1}"
+            if partial.validator:
+                headers["If-Range"] = partial.validator
+        response, release = self._open(job.url, headers, sha1=job.sha1)
+        completed = False
+        try:
+            if response.status == 200 and not whole_file:
+                if len(partial.parts) > 1:
+                    raise _NoRanges()
+                position = start = synced = 0  # Server ignored the range (or the file changed): from the top
+                digest = None
+                # Forget the old file's validator and bytes, or every later resume would be answered 200 too
+                partial.validator = None
+                partial.parts[index] = [0, end, 0]
+                partial.save()
+            elif response.status == 206:
+                match = re.match(r"bytes (\d+)-", response.getheader("Content-Range") or "")
+                if not match or int(match.group(1)) != position:
+                    raise DownloadError(job.url, "bad Content-Range")
+            elif response.status != 200:
+                response.read()
+                completed = True
+                raise DownloadError(job.url, f"HTTP {response.status}")
+            validator = response.getheader("ETag") or response.getheader("Last-Modified")
+            if partial.validator is None and validator and not validator.startswith("W/"):
+                partial.validator = validator  # Weak ETags can't be used with If-Range
+
+            with open(partial.path, "r+b") as f:
+                f.seek(position)
+                remaining = None if end is None else end - position
+                done = synced
+                unsynced = 0
+                try:
+                    while remaining is None or remaining > 0:
+                        chunk = response.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        if digest is not None:
+                            digest.update(chunk)
+                        done += len(chunk)
+                        unsynced += len(chunk)
+                        if remaining is not None:
+                            remaining -= len(chunk)
+                        if progress:
+                            progress.add_bytes(len(chunk))
+                        if partial.resumable and unsynced >= JOURNAL_INTERVAL:
+                            f.flush()
+                            os.fsync(f.fileno())
+                            partial.synced(index, done)
+                            unsynced = 0
+                    if remaining:
+                        raise DownloadError(job.url, "connection closed early")
+                    if end is None:
+                        f.truncate()  # Size wasn't known up front; the file ends here
+                        partial.parts[index][1] = start + done
+                    completed = True
+                finally:
+                    if partial.resumable and unsynced:
+                        f.flush()
+                        os.fsync(f.fileno())
+                        partial.synced(index, done)
+        finally:
+            release(reusable=completed)
+        return digest
+
+    def _fetch_parts(self, job, partial, progress, digest):
+        """Fetches every unfinished range, with extra connections if the budget has room for them."""
+        pending = partial.pending()
+        if len(pending) <= 1:
+            return self._fetch_part(job, partial, pending[0], progress, digest) if pending else digest
+
+        todo = queue.SimpleQueue()
+        for index in pending:
+            todo.put(index)
+        errors = []
+
+        def work():
+            while not errors:
+                try:
+                    index = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    self._fetch_part(job, partial, index, progress)
+                except BaseException as e:
+                    errors.append(e)
+
+        slot = self._host_slot(urllib.parse.urlsplit(job.url).netloc)
+        helpers = []
+        for _ in range(len(pending) - 1):
+            # Never wait for a slot here: whoever holds them may be waiting on us
+            if not self._budget.acquire(blocking=False):
+                break
+            if not slot.acquire(blocking=False):
+                self._budget.release()
+                break
+
+            def helper():
+                try:
+                    work()
+                finally:
+                    slot.release()
+                    self._budget.release()
+
+            thread = threading.Thread(target=helper, daemon=True)
+            thread.start()
+            helpers.append(thread)
+        work()
+        for thread in helpers:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return None
+
+    def _fetch_to_file(self, job, progress, target):
+        resumable = job.size is None or job.size >= self.resume_min_size
+        partial = _PartialFile(target, job, resumable)
+        resumed = partial.load()
+        if resumed:
+            trace.count("download.resumed_bytes", resumed)
+        else:
+            partial.reset(self._plan_parts(job.size))
+        # Hash while streaming when one connection writes the whole file in this attempt
+        fresh = len(partial.parts) == 1 and partial.parts[0][2] == 0
+        try:
+            try:
+                digest = self._fetch_parts(job, partial, progress, hashlib.sha1() if fresh else None)
+            except _NoRanges:
+                partial.reset([[0, job.size, 0]])
+                digest = self._fetch_parts(job, partial, progress, hashlib.sha1())
+        except BaseException:
+            if not resumable:
+                partial.discard()  # Small files just start over next time
+            raise
+
+        written = os.path.getsize(partial.path)
+        actual = digest.hexdigest() if digest is not None else (sha1_of_file(partial.path) if job.sha1 else None)
+        if (job.sha1 and actual != job.sha1) or (job.size is not None and written != job.size):
+            partial.discard()
+            raise DownloadError(job.url, "checksum mismatch")
+        partial.finish()
+        if self.store is not None and target != job.path:
+            self.store.add(partial.path, job.sha1, job.executable)
+            return
+        if job.executable:
+            os.chmod(partial.path, 0o755)
+        os.replace(partial.path, target)
+
+    def download(self, job, progress=None, index=None):
+        """Makes sure ``job.path`` exists and matches. Returns True if it was (re)downloaded.
+
+        With a ``VerifyIndex`` existing files are checked by stat instead of
+        being re-hashed, and fresh downloads are recorded in it.
+        """
+        if progress is not None:
+            progress.check()  # Jobs still queued when the batch is cancelled end here
+        if not self._needs_download(job, index):
+            trace.count("download.verified")
+            return False
+        if self.store is None or job.sha1 is None:
+            with self._object_lock(os.path.normcase(os.path.abspath(job.path))):
+                if not self._needs_download(job, index):
+                    return False  # Someone else's batch just fetched it
+                return self._download_to(job, job.path, progress, index)
+        with self._object_lock(job.sha1):
+            if self.store.has(job.sha1):
+                # Another directory (or job) already has it: link instead of downloading
+                self.store.link_into(job.sha1, job.path)
+                if index is not None:
+                    index.record(job.path, job.sha1)
+                trace.count("download.store_hits")
+                return False
+            return self._download_to(job, self.store.object_path(job.sha1), progress, index)
+
+    def fetch_object(self, url, sha1, size=None):
+        """Makes sure the object store has ``sha1``, fetching ``url`` if not. Returns its path."""
+        with self._object_lock(sha1):
+            if not self.store.has(sha1):
+                self._download_to(DownloadJob(url, None, sha1, size), self.store.object_path(sha1), None, None)
+        return self.store.object_path(sha1)
+
+    def _download_to(self, job, target, progress, index):
+        use_store = target != job.path
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        slot = self._host_slot(urllib.parse.urlsplit(job.url).netloc)
+        last_error = None
+        attempt = 0
+        on_disk = 0
+        for _ in range(self.retries * 10):
+            with self._budget, slot:
+                try:
+                    self._fetch_to_file(job, progress, target)
+                    if use_store and job.path:
+                        self.store.link_into(job.sha1, job.path)
+                    if index is not None:
+                        index.record(job.path, job.sha1)
+                    return True
+                except DownloadError as e:
+                    last_error = e
+                    if not str(e.reason).startswith("HTTP 5") and e.reason not in (
+                            "checksum mismatch", "connection closed early", "bad Content-Range"):
+                        raise  # 404 and friends won't get better by retrying
+                except (OSError, http.client.HTTPException) as e:
+                    last_error = e
+            trace.count("download.retries")
+            # A drop after real progress doesn't use up a retry; the next attempt resumes
+            resumed = _PartialFile(target, job, True).load()
+            if resumed > on_disk:
+                on_disk = resumed
+            else:
+                attempt += 1
+                if attempt >= self.retries:
+                    break
+            time.sleep(0.25 * (2 ** attempt))
+        if isinstance(last_error, DownloadError):
+            raise last_error
+        raise DownloadError(job.url, last_error)
+
+    # --- batches ---
+
+    def download_all(self, jobs, callback=None, label="Downloading", index=None):
+        """Downloads every job in parallel and reports to an mclib-style callback dict.
+
+        Returns a small stats dict (files, downloaded, bytes, seconds).
+        """
+        unique = {}
+        for job in jobs:
+            unique.setdefault(os.path.normcase(os.path.abspath(job.path)), job)
+        jobs = list(unique.values())
+
+        progress = _Progress(callback, len(jobs), label)
+        downloaded = 0
+        # Per category: [last file done, files, fetched, bytes], when someone is tracing
+        categories = {} if trace.current() else None
+        download = trace.bind(self.download)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(download, job, progress, index): job for job in jobs}
+            try:
+                for future in as_completed(futures):
+                    fetched = future.result()
+                    if fetched:
+                        downloaded += 1
+                    progress.file_done()
+                    if categories is not None:
+                        job = futures[future]
+                        tally = categories.setdefault(job.category or "files", [0.0, 0, 0, 0])
+                        tally[0] = time.perf_counter()
+                        tally[1] += 1
+                        if fetched:
+                            tally[2] += 1
+                            tally[3] += job.size or 0
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        if jobs:
+            progress._call("setStatus", progress.status_line())
+        for name, (done, files, fetched, size) in (categories or {}).items():
+            # Categories share one pool, so each span runs from the batch start to its last file
+            trace.record(f"download.{name}", progress.started, done,
+                         {"download.files": files, "download.fetched": fetched, "download.bytes": size})
+        return {
+            "files": len(jobs),
+            "downloaded": downloaded,
+            "bytes": progress.bytes,
+            "seconds": time.perf_counter() - progress.started,
+        }
+
+    def close(self):
+        self.pool.close()
+        if self.store is not None:
+            self.store.save()
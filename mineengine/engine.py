@@ -0,0 +1,259 @@
+"""The launcher's fetch/install/launch logic without any Tk.
+
+Both GUI scripts and the headless ``python -m mineengine`` CLI drive this.
+One engine shares a single downloader (so one global download budget and one
+object store), one manifest cache and one Java registry across every Minecraft
+directory it is asked to touch.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from . import trace
+from .command import LaunchPlanCache, render_command
+from .config import load_config
+from .download import Downloader
+from .forge import ForgeIndex, ForgeInstaller
+from .install import Installer
+from .java import JavaRegistry, get_required_java_major
+from .jvm import cds_archive_path, dump_finished, tune
+from .manifest import ManifestCache
+from .supervisor import Supervisor
+from .paths import get_launcher_data_dir
+from .versionindex import InstalledIndex
+from .versions import resolve_version_json
+
+_history_lock = threading.Lock()
+
+
+def _history_path():
+    return os.path.join(get_launcher_data_dir(), "launch-history.jsonl")
+
+
+def _append_history(entry):
+    # One JSON object per line; appends are small, so concurrent launches don't interleave
+    with _history_lock:
+        with open(_history_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+class LauncherEngine:
+    def __init__(self, downloader=None, manifest_cache=None, java_registry=None, forge_index=None, supervisor=None):
+        self.downloader = downloader or Downloader()
+        self.manifest_cache = manifest_cache or ManifestCache()
+        self.java_registry = java_registry or JavaRegistry()
+        self.forge_index = forge_index or ForgeIndex()
+        self.supervisor = supervisor or Supervisor()  # Every game we start, with its output
+        self._lock = threading.Lock()
+        self._installers = {}
+        self._launch_plans = {}
+        self._installed_indexes = {}
+
+    def _per_directory(self, cache, minecraft_directory, factory):
+        # One Installer/LaunchPlanCache per directory so concurrent jobs share its indexes
+        key = os.path.normcase(os.path.abspath(minecraft_directory))
+        with self._lock:
+            if key not in cache:
+                cache[key] = factory()
+            return cache[key]
+
+    def installer(self, minecraft_directory):
+        return self._per_directory(self._installers, minecraft_directory,
+                                   lambda: Installer(minecraft_directory, self.downloader, self.manifest_cache))
+
+    def launch_plans(self, minecraft_directory):
+        return self._per_directory(self._launch_plans, minecraft_directory,
+                                   lambda: LaunchPlanCache(minecraft_directory))
+
+    # --- versions ---
+
+    def get_versions(self, force=False, on_update=None):
+        """The (cached) manifest version list; see ``ManifestCache.get_versions``."""
+        return self.manifest_cache.get_versions(force=force, on_update=on_update)
+
+    def installed_index(self, minecraft_directory):
+        """The directory's live installed-version index (scanned once, then kept current by a watcher)."""
+        return self._per_directory(self._installed_indexes, minecraft_directory,
+                                   lambda: InstalledIndex(minecraft_directory))
+
+    def close_installed_index(self, minecraft_directory):
+        """Stops watching a directory nobody looks at any more; ``installed_index`` starts over if asked again."""
+        with self._lock:
+            index = self._installed_indexes.pop(os.path.normcase(os.path.abspath(minecraft_directory)), None)
+        if index is not None:
+            index.close()
+
+    @staticmethod
+    def installed_versions(minecraft_directory):
+        """Ids of every version (vanilla or modded profile) installed in a directory."""
+        with trace.span("versions.scan") as span:
+            versions_dir = os.path.join(minecraft_directory, "versions")
+            try:
+                names = os.listdir(versions_dir)
+            except OSError:
+                return []
+            installed = [name for name in names if os.path.isfile(os.path.join(versions_dir, name, f"{name}.json"))]
+            span.count("versions.installed", len(installed))
+            return installed
+
+    def find_forge_version(self, minecraft_version):
+        return self.forge_index.find_forge_version(minecraft_version)
+
+    # --- install / launch ---
+
+    def install(self, version_id, minecraft_directory, callback=None):
+        os.makedirs(minecraft_directory, exist_ok=True)
+        return self.installer(minecraft_directory).install(version_id, callback)
+
+    def install_forge(self, forge_version, minecraft_directory, callback=None, verified=()):
+        """Installs a Forge build and returns the profile id to launch.
+
+        ``verified``: Minecraft versions the caller has just installed in this
+        directory, so the Forge profile's parent isn't verified a second time.
+        """
+        os.makedirs(minecraft_directory, exist_ok=True)
+        forge_installer = ForgeInstaller(minecraft_directory, self.downloader, self.manifest_cache,
+                                         self.java_registry, self.forge_index,
+                                         installer=self.installer(minecraft_directory))
+        return forge_installer.install(forge_version, callback, verified=verified)
+
+    def prepare_launch(self, version_id, minecraft_directory, options, profile=None, heap=None, instances=None):
+        """``(command, tuning)`` for one launch.
+
+        Picks the Java the version needs unless ``executablePath`` is set. Unless
+        the caller brings its own ``jvmArguments`` (and no ``profile``), the JVM
+        flags come from a tuning profile sized for ``instances`` clients (default:
+        the ones already running plus this one); ``tuning`` records what was chosen.
+        """
+        with trace.span("launch.command", version=version_id):
+            options = dict(options)
+            plans = self.launch_plans(minecraft_directory)
+            plan = plans.get_plan(version_id)  # VersionNotFound before anything slow
+            version_data, _ = resolve_version_json(minecraft_directory, version_id)
+            java_major = get_required_java_major(version_data)
+            if not options.get("executablePath"):
+                with trace.span("java.select", major=java_major):
+                    options["executablePath"] = (self.java_registry.select(java_major, minecraft_directory)
+                                                 or plan["java"] or "java")
+            tuning = None
+            if profile or not options.get("jvmArguments"):
+                with trace.span("jvm.tune"):
+                    config = load_config()
+                    java = options["executablePath"]
+                    info = self.java_registry.info(java) or {}
+                    java_major = info.get("major") or java_major
+                    archive_path = None
+                    if config["use_cds"] and info.get("mtime_ns"):
+                        archive_path = cds_archive_path(minecraft_directory, version_id, java, info["mtime_ns"],
+                                                        plan["classpath"])
+                    tuning = tune(profile or config["jvm_profile"], java_major, java, heap=heap,
+                                  instances=instances or len(self.supervisor.running()) + 1,
+                                  archive_path=archive_path)
+                    tuning.update(java=java, java_major=java_major)
+                # The caller's own flags go last so they win over the profile's
+                options["jvmArguments"] = tuning["arguments"] + list(options.get("jvmArguments", []))
+            return render_command(plan, plans.minecraft_directory, options), tuning
+
+    def build_command(self, version_id, minecraft_directory, options):
+        """The launch command alone; see ``prepare_launch``."""
+        command, tuning = self.prepare_launch(version_id, minecraft_directory, options)
+        if tuning and tuning["cds"] == "dump":
+            dump_finished(tuning["cds_archive"])  # Nothing runs this command for us, so nobody is dumping
+        return command
+
+    def launch(self, version_id, minecraft_directory, options, name=None, limits=None, profile=None, heap=None,
+               instances=None):
+        """Starts the game under the supervisor and returns its ``Instance``.
+
+        Set ``options["gameDirectory"]`` to give each concurrent instance its own
+        saves/options/logs; ``limits`` is a ``ResourceLimits``; ``instances`` is how
+        many clients the heap is sized for (see ``prepare_launch``). The chosen tuning
+        and, on exit, the time to the title screen go to the launch history.
+        """
+        with trace.span("launch", version=version_id) as span:
+            command, tuning = self.prepare_launch(version_id, minecraft_directory, options, profile=profile,
+                                                  heap=heap, instances=instances)
+            with trace.span("launch.spawn"):
+                instance = self._spawn(version_id, minecraft_directory, options, command, tuning, name, limits)
+            span.set(pid=instance.pid)
+            return instance
+
+    def _spawn(self, version_id, minecraft_directory, options, command, tuning, name, limits):
+        username = options.get("username")
+        record = {"launch_id": uuid.uuid4().hex, "version": version_id,
+                  "directory": os.path.abspath(minecraft_directory), "username": username, "tuning": tuning}
+
+        def on_exit(instance):
+            if tuning and tuning["cds"] == "dump":
+                dump_finished(tuning["cds_archive"])
+            summary = instance.summary()
+            _append_history({"event": "exit", "launch_id": record["launch_id"], **{
+                key: summary[key] for key in ("state", "returncode", "reason", "ready_seconds", "uptime",
+                                              "peak_rss_mb")}})
+
+        try:
+            instance = self.supervisor.launch(command, options.get("gameDirectory") or minecraft_directory,
+                                              name=name or f"{version_id} ({username})", username=username,
+                                              limits=limits, exit_hooks=[on_exit])
+        except BaseException:
+            if tuning and tuning["cds"] == "dump":
+                dump_finished(tuning["cds_archive"])  # No instance will exit to release it; the next launch dumps
+            raise
+        instance.tuning = tuning
+        _append_history({"event": "launch", "time": round(instance.started, 3), "pid": instance.pid, **record})
+        return instance
+
+    @staticmethod
+    def launch_history(limit=None):
+        """Past launches, newest last: each launch record merged with its exit record."""
+        launches = {}
+        try:
+            with open(_history_path(), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short by a crash
+                    launch = launches.setdefault(entry.get("launch_id"), {})
+                    launch.update({key: value for key, value in entry.items() if key != "event"})
+        except OSError:
+            return []
+        history = list(launches.values())
+        return history[-limit:] if limit else history
+
+    # --- batch provisioning ---
+
+    def provision(self, requests, max_jobs=4, make_callback=None):
+        """Installs many versions at once, e.g. to pre-provision lab machines.
+
+        ``requests`` is a list of ``(version_id, minecraft_directory, forge)``.
+        Jobs run concurrently but share this engine's downloader, so the
+        download budget is global and files shared between jobs (libraries,
+        assets) are fetched once. ``make_callback(version_id, forge)`` may
+        return a callback dict per job. Returns one result dict per request.
+        """
+        def run(request):
+            version_id, minecraft_directory, forge = request
+            callback = make_callback(version_id, forge) if make_callback else None
+            started = time.perf_counter()
+            result = {"version": version_id, "forge": forge, "directory": minecraft_directory}
+            try:
+                stats = self.install(version_id, minecraft_directory, callback)
+                result["launch_id"] = version_id
+                if forge:
+                    forge_version = self.find_forge_version(version_id)
+                    if not forge_version:
+                        raise LookupError(f"No Forge build for {version_id}")
+                    result["launch_id"] = self.install_forge(forge_version, minecraft_directory, callback,
+                                                             verified=[version_id])
+                result.update(ok=True, files=stats["files"], downloaded=stats["downloaded"], bytes=stats["bytes"])
+            except Exception as e:
+                result.update(ok=False, error=str(e))
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            return result
+
+        with trace.span("provision", jobs=len(requests)), ThreadPoolExecutor(max_workers=max(1, max_jobs)) as executor:
+            return list(executor.map(trace.bind(run), requests))
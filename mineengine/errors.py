@@ -0,0 +1,29 @@
+"""Exceptions raised by the launcher engine."""
+
+
+class LauncherError(Exception):
+    """Base class for everything the engine raises on purpose."""
+
+
+class VersionNotFound(LauncherError):
+    """The version is neither in the manifest nor installed locally."""
+
+    def __init__(self, version_id):
+        super().__init__(f"Version {version_id} was not found")
+        self.version_id = version_id
+
+
+class Cancelled(LauncherError):
+    """The operation was cancelled (see ``tasks.Operation.cancel``) before it finished."""
+
+    def __init__(self):
+        super().__init__("Cancelled")
+
+
+class DownloadError(LauncherError):
+    """A file could not be downloaded (or failed verification) after retrying."""
+
+    def __init__(self, url, reason):
+        super().__init__(f"Could not download {url}: {reason}")
+        self.url = url
+        self.reason = reason
@@ -0,0 +1,375 @@
+"""Forge support: a cached Forge version index and a faster Forge installer.
+
+``ForgeIndex`` is Forge's maven-metadata.xml behind the same TTL/conditional
+GET cache as the game manifest, so finding the Forge build for a Minecraft
+version doesn't touch the network on relaunch.
+
+``ForgeInstaller`` installs modern (1.13+) Forge itself: libraries go through
+the parallel downloader, installer processors whose files don't overlap run
+concurrently, and each processor's outputs are cached in the object store keyed
+by a hash of its jar, arguments and input files, so re-running an identical
+processor (another directory, a reinstall) just links the results. Installs are
+recorded per directory so an installed Forge profile is never reinstalled.
+Old installers (``install``/``versionInfo`` profiles) are left to
+minecraft-launcher-lib, the one place the engine still needs it (an optional
+dependency: without it those installs fail with a ``LauncherError`` saying so).
+"""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import trace
+from .config import load_config
+from .download import DownloadJob, check_cancelled
+from .errors import LauncherError
+from .install import Installer
+from .java import JavaRegistry, get_required_java_major
+from .manifest import CachedResource
+from .paths import get_cache_dir
+from .store import ObjectStore
+from .versions import library_path, load_version_json
+
+FORGE_MAVEN_URL = "https://maven.minecraftforge.net/net/minecraftforge/forge/"
+FORGE_METADATA_URL = FORGE_MAVEN_URL + "maven-metadata.xml"
+
+
+def get_forge_maven_url():
+    """Forge's maven, or the ``forge_maven_url`` override from the config."""
+    return load_config()["forge_maven_url"] or FORGE_MAVEN_URL
+
+
+def _call(callback, name, *args):
+    func = (callback or {}).get(name)
+    if func:
+        func(*args)
+
+
+class ForgeIndex(CachedResource):
+    """All Forge builds (``<minecraft>-<forge>``), newest first, from Forge's maven."""
+
+    def __init__(self, url=None, cache_dir=None, ttl=None, timeout=None, mirrors=None):
+        cache_dir = cache_dir or get_cache_dir("manifests")
+        url = url or get_forge_maven_url() + "maven-metadata.xml"
+        super().__init__(url, os.path.join(cache_dir, "forge-maven-metadata.xml"), ttl, timeout, mirrors)
+
+    def list_versions(self, force=False):
+        body = self.fetch(force=True) if force else self.get()
+        return [node.text for node in ET.fromstring(body).iter("version") if node.text]
+
+    def find_forge_version(self, minecraft_version):
+        """Like ``minecraft_launcher_lib.forge.find_forge_version``, but served from cache."""
+        return next((v for v in self.list_versions() if v.split("-")[0] == minecraft_version), None)
+
+
+class _Processor:
+    """One installer processor with its command line and the files it touches."""
+
+    def __init__(self, index, command, jar_files, files, produced, outputs):
+        self.index = index
+        self.command = command
+        self.jar_files = jar_files  # processor jar + classpath
+        self.files = files  # every file path mentioned in its arguments
+        self.produced = produced  # the subset this processor (probably) writes
+        self.outputs = outputs  # declared {path: sha1} to verify
+        self.depends_on = set()
+
+
+class ForgeInstaller:
+    def __init__(self, minecraft_directory, downloader=None, manifest_cache=None, java_registry=None,
+                 forge_index=None, installer=None):
+        # Pass the directory's shared Installer (LauncherEngine.installer) to reuse its verification index
+        self.installer = installer or Installer(minecraft_directory, downloader, manifest_cache)
+        self.minecraft_directory = self.installer.minecraft_directory
+        self.downloader = self.installer.downloader
+        self.java_registry = java_registry or JavaRegistry()
+        self.forge_index = forge_index or ForgeIndex()
+        self.store = self.downloader.store or ObjectStore(get_cache_dir("forge-outputs"))
+        self.installs_path = os.path.join(self.minecraft_directory, ".mineengine", "forge-installs.json")
+
+    # --- what's installed ---
+
+    def _read_installs(self):
+        try:
+            with open(self.installs_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record_install(self, forge_version, profile_id):
+        installs = self._read_installs()
+        installs[forge_version] = profile_id
+        os.makedirs(os.path.dirname(self.installs_path), exist_ok=True)
+        tmp_path = f"{self.installs_path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(installs, f, indent=1)
+        os.replace(tmp_path, self.installs_path)
+
+    def installed_profile(self, forge_version):
+        """The version id of an already completed install of ``forge_version``, or None."""
+        profile_id = self._read_installs().get(forge_version)
+        if profile_id and os.path.isfile(os.path.join(self.minecraft_directory, "versions", profile_id,
+                                                      f"{profile_id}.json")):
+            return profile_id
+        return None
+
+    # --- install ---
+
+    def install(self, forge_version, callback=None, verified=()):
+        """Installs ``forge_version`` (e.g. "1.20.1-47.2.0") and returns the profile id to launch.
+
+        An install this directory already completed is only re-verified (stat
+        checks); Minecraft versions in ``verified`` (the caller has just
+        installed them) aren't checked again at all.
+        """
+        with trace.span("forge", version=forge_version) as span:
+            profile_id = self.installed_profile(forge_version)
+            if profile_id:
+                span.set(installed=True)
+                _call(callback, "setStatus", f"{profile_id} is already installed")
+                self.installer.install(profile_id, callback, verified=verified)
+                return profile_id
+
+            check_cancelled(callback)
+            with trace.span("forge.installer_jar"):
+                installer_jar = self._download_installer(forge_version, callback)
+            with zipfile.ZipFile(installer_jar) as jar:
+                profile = json.loads(jar.read("install_profile.json"))
+                if "install" in profile:
+                    profile_id = self._install_legacy(forge_version, profile, callback, verified)
+                else:
+                    profile_id = self._install_modern(forge_version, profile, jar, installer_jar, callback, verified)
+            self._record_install(forge_version, profile_id)
+            return profile_id
+
+    def _download_installer(self, forge_version, callback):
+        _call(callback, "setStatus", f"Downloading Forge installer {forge_version}")
+        url = f"{get_forge_maven_url()}{forge_version}/forge-{forge_version}-installer.jar"
+        path = os.path.join(get_cache_dir("forge"), f"forge-{forge_version}-installer.jar")
+        try:
+            sha1 = self.downloader.fetch_bytes(url + ".sha1").decode("ascii").split()[0]
+        except (LauncherError, OSError, ValueError, IndexError):
+            sha1 = None
+        self.downloader.download(DownloadJob(url, path, sha1))
+        return path
+
+    def _install_legacy(self, forge_version, profile, callback, verified=()):
+        # Pre-1.13 installers use a different format; minecraft-launcher-lib handles those fine
+        try:
+            import minecraft_launcher_lib
+        except ImportError:
+            raise LauncherError(f"Forge {forge_version} uses the old (pre-1.13) installer, which needs "
+                                f"minecraft-launcher-lib: pip install minecraft-launcher-lib") from None
+        minecraft_version = forge_version.split("-")[0]
+        if minecraft_version not in verified:
+            self.installer.install(minecraft_version, callback)
+        java = self.java_registry.select(8, self.minecraft_directory)
+        minecraft_launcher_lib.forge.install_forge_version(forge_version, self.minecraft_directory,
+                                                          callback=callback, java=java)
+        return profile["versionInfo"]["id"]
+
+    def _install_modern(self, forge_version, profile, jar, installer_jar, callback, verified=()):
+        minecraft_version = profile["minecraft"]
+        if minecraft_version not in verified:
+            self.installer.install(minecraft_version, callback)
+
+        # The profile Forge wants to launch
+        version_json = json.loads(jar.read(profile.get("json", "/version.json").lstrip("/")))
+        profile_id = version_json["id"]
+        version_dir = os.path.join(self.minecraft_directory, "versions", profile_id)
+        os.makedirs(version_dir, exist_ok=True)
+        with open(os.path.join(version_dir, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(version_json, f, indent=2)
+
+        # Libraries shipped inside the installer, then everything else in parallel
+        with trace.span("forge.libraries"):
+            libraries_dir = os.path.join(self.minecraft_directory, "libraries")
+            for member in jar.infolist():
+                if member.filename.startswith("maven/") and not member.is_dir():
+                    dest = os.path.join(libraries_dir, *member.filename[len("maven/"):].split("/"))
+                    if not os.path.isfile(dest) or os.path.getsize(dest) != member.file_size:
+                        os.makedirs(os.path.dirname(dest), exist_ok=True)
+                        with jar.open(member) as src, open(dest, "wb") as out:
+                            shutil.copyfileobj(src, out)
+            installer_libs, _ = self.installer.library_jobs({"libraries": profile.get("libraries", [])})
+            version_libs, _ = self.installer.library_jobs(version_json)
+            self.downloader.download_all(installer_libs + version_libs, callback, label="Forge libraries:",
+                                         index=self.installer.index)
+
+        with trace.span("forge.processors"):
+            check_cancelled(callback)
+            processors = self._plan_processors(forge_version, profile, jar, installer_jar, minecraft_version,
+                                               {job.path for job in installer_libs + version_libs})
+            if processors:
+                vanilla_data = load_version_json(self.minecraft_directory, minecraft_version)
+                java = self.java_registry.select(get_required_java_major(vanilla_data), self.minecraft_directory)
+                if not java:
+                    raise LauncherError("Forge needs Java to run its installer, but none was found")
+                self._run_processors(processors, java, callback)
+
+        self.installer.install(profile_id, callback, verified=verified)
+        return profile_id
+
+    # --- processors ---
+
+    def _plan_processors(self, forge_version, profile, jar, installer_jar, minecraft_version, downloaded):
+        libraries_dir = os.path.join(self.minecraft_directory, "libraries")
+        data_dir = get_cache_dir("forge", forge_version)
+        minecraft_jar = os.path.join(self.minecraft_directory, "versions", minecraft_version, f"{minecraft_version}.jar")
+
+        def lib(coord):
+            return os.path.join(libraries_dir, library_path(coord))
+
+        variables = {
+            "SIDE": "client",
+            "MINECRAFT_JAR": minecraft_jar,
+            "MINECRAFT_VERSION": minecraft_version,
+            "ROOT": self.minecraft_directory,
+            "INSTALLER": installer_jar,
+            "LIBRARY_DIR": libraries_dir,
+        }
+        known_inputs = set(downloaded) | {minecraft_jar, installer_jar}
+        for key, value in profile.get("data", {}).items():
+            value = value.get("client", "")
+            if value.startswith("[") and value.endswith("]"):
+                variables[key] = lib(value[1:-1])
+            elif value.startswith("'") and value.endswith("'"):
+                variables[key] = value[1:-1]
+            elif value.startswith("/"):
+                # A file inside the installer (e.g. the binary patches)
+                dest = os.path.join(data_dir, *value.lstrip("/").split("/"))
+                if not os.path.isfile(dest):
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    with jar.open(value.lstrip("/")) as src, open(dest + ".tmp", "wb") as out:
+                        shutil.copyfileobj(src, out)
+                    os.replace(dest + ".tmp", dest)
+                variables[key] = dest
+                known_inputs.add(dest)
+            else:
+                variables[key] = value
+
+        def substitute(arg):
+            if arg.startswith("[") and arg.endswith("]"):
+                return lib(arg[1:-1])
+            for key, value in variables.items():
+                arg = arg.replace("{" + key + "}", value)
+            return arg
+
+        processors = []
+        for entry in profile.get("processors", []):
+            if "client" not in entry.get("sides", ["client"]):
+                continue
+            jar_files = [lib(entry["jar"])] + [lib(c) for c in entry.get("classpath", [])]
+            args = [substitute(a) for a in entry.get("args", [])]
+            files = {a for a in args if os.path.isabs(a) and not os.path.isdir(a)}
+            outputs = {substitute(k): substitute(v) for k, v in entry.get("outputs", {}).items()}
+            produced = (files - known_inputs) | set(outputs)
+            command = [None, "-cp", os.pathsep.join(jar_files), None] + args  # java and main class filled in later
+            processors.append(_Processor(len(processors), command, jar_files, files, produced, outputs))
+
+        # A processor waits for every earlier one whose files it reads or overwrites
+        for later in processors:
+            for earlier in processors[:later.index]:
+                if earlier.produced & (later.files | set(later.outputs)) or later.produced & earlier.files:
+                    later.depends_on.add(earlier.index)
+        return processors
+
+    def _cache_key(self, processor):
+        digest = hashlib.sha1()
+        for path in processor.jar_files:
+            digest.update(self.installer.index.sha1_of(path).encode())
+        for arg in processor.command[4:]:
+            # Relative paths so identical processors in other directories share results
+            if os.path.isabs(arg) and arg.startswith(self.minecraft_directory):
+                arg = "$MC/" + os.path.relpath(arg, self.minecraft_directory).replace(os.sep, "/")
+            digest.update(arg.encode() + b"\0")
+        for path in sorted(processor.files - processor.produced):
+            if os.path.isfile(path):
+                digest.update(self.installer.index.sha1_of(path).encode())
+        return digest.hexdigest()
+
+    def _outputs_ok(self, processor):
+        return processor.outputs and all(
+            os.path.isfile(path) and self.installer.index.sha1_of(path) == sha1
+            for path, sha1 in processor.outputs.items())
+
+    def _run_processor(self, processor, java):
+        if self._outputs_ok(processor):
+            return "up to date"
+        cache_path = os.path.join(get_cache_dir("forge-processors"), f"{self._cache_key(processor)}.json")
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if all(self.store.has(sha1) for sha1 in cached.values()):
+                for rel_path, sha1 in cached.items():
+                    self.store.link_into(sha1, os.path.join(self.minecraft_directory, *rel_path.split("/")))
+                return "cached"
+        except (OSError, ValueError):
+            pass
+
+        with zipfile.ZipFile(processor.jar_files[0]) as jar:
+            manifest = jar.read("META-INF/MANIFEST.MF").decode("utf-8", "replace")
+        main_class = next(line.split(":", 1)[1].strip() for line in manifest.splitlines()
+                          if line.startswith("Main-Class:"))
+        command = [java, processor.command[1], processor.command[2], main_class] + processor.command[4:]
+        result = subprocess.run(command, cwd=self.minecraft_directory, capture_output=True, text=True,
+                                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        if result.returncode != 0:
+            output = (result.stdout + result.stderr).strip().splitlines()[-10:]
+            raise LauncherError(f"Forge processor {main_class} failed:\n" + "\n".join(output))
+        for path, sha1 in processor.outputs.items():
+            if self.installer.index.sha1_of(path) != sha1:
+                raise LauncherError(f"Forge processor {main_class} produced a bad {os.path.basename(path)}")
+
+        # Keep the results for next time
+        cached = {}
+        for path in processor.produced:
+            if not os.path.isfile(path) or not path.startswith(self.minecraft_directory):
+                continue
+            sha1 = self.installer.index.sha1_of(path)
+            if not self.store.has(sha1):
+                tmp_path = self.store.object_path(sha1) + f".part{threading.get_ident()}"
+                os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+                shutil.copyfile(path, tmp_path)
+                self.store.add(tmp_path, sha1)
+            self.store.link_into(sha1, path)
+            cached[os.path.relpath(path, self.minecraft_directory).replace(os.sep, "/")] = sha1
+        with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(cached, f)
+        os.replace(cache_path + ".tmp", cache_path)
+        return "ran"
+
+    def _run_processors(self, processors, java, callback):
+        done, running = set(), {}
+        pending = list(processors)
+        _call(callback, "setMax", len(processors))
+        _call(callback, "setProgress", 0)
+        workers = load_config()["forge_processor_workers"]
+
+        def run(processor):
+            check_cancelled(callback)  # A running processor finishes; the ones after it don't start
+            with trace.span("forge.processor", index=processor.index) as span:
+                outcome = self._run_processor(processor, java)
+                span.count("forge.processors_" + outcome.replace(" ", "_"))
+                return outcome
+        run = trace.bind(run)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for processor in [p for p in pending if p.depends_on <= done]:
+                    pending.remove(processor)
+                    running[executor.submit(run, processor)] = processor
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    processor = running.pop(future)
+                    outcome = future.result()
+                    done.add(processor.index)
+                    _call(callback, "setProgress", len(done))
+                    _call(callback, "setStatus", f"Forge processor {len(done)}/{len(processors)} ({outcome})")
+        self.installer.index.save()
+        self.store.save()
@@ -0,0 +1,273 @@
+"""Launcher-side replacement for ``minecraft_launcher_lib.install``.
+
+The version JSON, asset index and Java runtime manifest are resolved first
+(they are small), then every library, asset object, client jar and runtime
+file goes through one ``Downloader.download_all`` batch so they are fetched in
+parallel instead of one after another. The on-disk layout is the same as the
+official launcher / minecraft-launcher-lib, so either can launch the result.
+"""
+import json
+import os
+import platform
+import shutil
+import zipfile
+
+from . import trace
+from .config import load_config
+from .download import DownloadJob, Downloader, check_cancelled
+from .errors import DownloadError, VersionNotFound
+from .manifest import CachedResource, ManifestCache
+from .paths import get_cache_dir
+from .verify import VerifyIndex
+from .versions import (get_arch_bits, get_library_files, get_os_name, get_version_json_path,
+                       load_version_json, resolve_version_json)
+
+RESOURCES_URL = "https://resources.download.minecraft.net/"
+JVM_MANIFEST_URL = "https://launchermeta.mojang.com/v1/products/java-runtime/2ec0cc96c44e5a76b9c8b8c39b1b6b0e6b8a3c79/all.json"
+
+
+def get_runtime_platform():
+    """The platform key used by Mojang's Java runtime manifest."""
+    machine = platform.machine().lower()
+    os_name = get_os_name()
+    if os_name == "windows":
+        if "arm" in machine:
+            return "windows-arm64"
+        return "windows-x64" if get_arch_bits() == "64" else "windows-x86"
+    if os_name == "osx":
+        return "mac-os-arm64" if machine == "arm64" else "mac-os"
+    return "linux" if get_arch_bits() == "64" else "linux-i386"
+
+
+def _call(callback, name, *args):
+    func = (callback or {}).get(name)
+    if func:
+        func(*args)
+
+
+class Installer:
+    """Installs versions into one Minecraft directory."""
+
+    def __init__(self, minecraft_directory, downloader=None, manifest_cache=None):
+        self.minecraft_directory = os.path.abspath(minecraft_directory)
+        self.downloader = downloader or Downloader()
+        self.manifest_cache = manifest_cache or ManifestCache()
+        self.index = VerifyIndex(self.minecraft_directory)
+        self.resources_url = load_config()["resources_url"] or RESOURCES_URL
+
+    # --- small documents ---
+
+    def _manifest_entry(self, version_id):
+        try:
+            versions = self.manifest_cache.get_versions()
+        except (OSError, ValueError):
+            return None  # Offline without a cached manifest; local JSON only
+        return next((v for v in versions if v["id"] == version_id), None)
+
+    def ensure_version_json(self, version_id):
+        """Makes sure ``versions/<id>/<id>.json`` is present and current."""
+        path = get_version_json_path(self.minecraft_directory, version_id)
+        entry = self._manifest_entry(version_id)
+        if entry is None:
+            if not os.path.isfile(path):
+                raise VersionNotFound(version_id)
+            return
+        self.downloader.download(DownloadJob(entry["url"], path, entry.get("sha1")), index=self.index)
+
+    def _load_asset_index(self, version_data):
+        asset_index = version_data.get("assetIndex")
+        if not asset_index:
+            return None
+        path = os.path.join(self.minecraft_directory, "assets", "indexes", f"{asset_index['id']}.json")
+        self.downloader.download(DownloadJob(asset_index["url"], path, asset_index.get("sha1"), asset_index.get("size")),
+                                 index=self.index)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_runtime_manifest(self, component):
+        all_runtimes = CachedResource(JVM_MANIFEST_URL, os.path.join(get_cache_dir("runtimes"), "all.json"))
+        entries = json.loads(all_runtimes.get()).get(get_runtime_platform(), {}).get(component)
+        if not entries:
+            return None, None
+        manifest = entries[0]["manifest"]
+        path = os.path.join(get_cache_dir("runtimes"), f"{manifest['sha1']}.json")
+        self.downloader.download(DownloadJob(manifest["url"], path, manifest["sha1"], manifest.get("size")))
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f), entries[0].get("version", {}).get("name", "")
+
+    # --- file lists ---
+
+    def library_jobs(self, version_data):
+        jobs, natives = [], []
+        for lib in version_data.get("libraries", []):
+            for path, url, sha1, size, is_native in get_library_files(lib, self.minecraft_directory):
+                jobs.append(DownloadJob(url, path, sha1, size, category="natives" if is_native else "libraries"))
+                if is_native:
+                    natives.append((jobs[-1], lib.get("extract", {}).get("exclude", [])))
+        return jobs, natives
+
+    def asset_jobs(self, asset_index):
+        objects_dir = os.path.join(self.minecraft_directory, "assets", "objects")
+        jobs = []
+        for obj in asset_index.get("objects", {}).values():
+            h = obj["hash"]
+            jobs.append(DownloadJob(f"{self.resources_url}{h[:2]}/{h}", os.path.join(objects_dir, h[:2], h), h, obj.get("size"),
+                                    category="assets"))
+        return jobs
+
+    def runtime_jobs(self, component, runtime_manifest):
+        base = os.path.join(self.minecraft_directory, "runtime", component, get_runtime_platform(), component)
+        jobs, links = [], []
+        for rel_path, entry in runtime_manifest.get("files", {}).items():
+            path = os.path.join(base, rel_path)
+            if entry["type"] == "file":
+                raw = entry["downloads"]["raw"]
+                jobs.append(DownloadJob(raw["url"], path, raw.get("sha1"), raw.get("size"), entry.get("executable", False),
+                                        category="runtime"))
+            elif entry["type"] == "directory":
+                os.makedirs(path, exist_ok=True)
+            elif entry["type"] == "link":
+                links.append((path, entry["target"]))
+        return jobs, links
+
+    # --- post-processing ---
+
+    @staticmethod
+    def extract_natives(jar_path, natives_dir, exclude):
+        os.makedirs(natives_dir, exist_ok=True)
+        with zipfile.ZipFile(jar_path) as jar:
+            for member in jar.infolist():
+                if member.is_dir() or any(member.filename.startswith(prefix) for prefix in exclude):
+                    continue
+                jar.extract(member, natives_dir)
+
+    def _place_legacy_assets(self, asset_index, index_id):
+        # Pre-1.7 versions read assets by name instead of by hash
+        targets = []
+        if asset_index.get("map_to_resources"):
+            targets.append(os.path.join(self.minecraft_directory, "resources"))
+        if asset_index.get("virtual"):
+            targets.append(os.path.join(self.minecraft_directory, "assets", "virtual", index_id))
+        objects_dir = os.path.join(self.minecraft_directory, "assets", "objects")
+        for target in targets:
+            for name, obj in asset_index.get("objects", {}).items():
+                dest = os.path.join(target, *name.split("/"))
+                if not os.path.isfile(dest) or os.path.getsize(dest) != obj.get("size"):
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    shutil.copyfile(os.path.join(objects_dir, obj["hash"][:2], obj["hash"]), dest)
+
+    @staticmethod
+    def _make_links(links):
+        for path, target in links:
+            if os.path.lexists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.symlink(target, path)
+            except OSError:
+                pass  # No symlink permission (Windows); the runtime works without them
+
+    # --- the whole thing ---
+
+    def install(self, version_id, callback=None, verified=()):
+        """Installs ``version_id`` (and whatever it inherits from). Returns download stats.
+
+        Files already recorded in the verification index are checked by stat
+        only, so re-running this on an installed version is cheap. A parent in
+        ``verified`` (the caller has just installed it) isn't checked again:
+        only the files the profile adds on top of it are.
+        """
+        try:
+            return self._install(version_id, callback, verified)
+        finally:
+            self.index.save()
+            if self.downloader.store is not None:
+                self.downloader.store.save()
+
+    def _install(self, version_id, callback, verified=()):
+        with trace.span("install", version=version_id):
+            _call(callback, "setStatus", f"Resolving {version_id}")
+            with trace.span("install.resolve"):
+                self.ensure_version_json(version_id)
+                raw_data = load_version_json(self.minecraft_directory, version_id)
+            parent_stats = None
+            parent_verified = raw_data.get("inheritsFrom") in verified
+            if "inheritsFrom" in raw_data and not parent_verified:
+                parent_stats = self._install(raw_data["inheritsFrom"], callback)
+
+            check_cancelled(callback)
+            with trace.span("install.plan"):
+                version_data, _ = resolve_version_json(self.minecraft_directory, version_id)
+                jobs, natives = self.library_jobs(version_data)
+                if parent_verified:
+                    # Only download/verify what the profile itself lists; the inherited libraries, jar and
+                    # assets were just checked. Natives still come from everything: they are extracted
+                    # into this profile's own natives directory
+                    version_data = {**raw_data, "id": version_data["id"]}
+                    jobs, _ = self.library_jobs(version_data)
+
+                client = version_data.get("downloads", {}).get("client")
+                client_jar = os.path.join(self.minecraft_directory, "versions", version_data["id"],
+                                          f"{version_data['id']}.jar")
+                if client and client.get("url"):
+                    jobs.append(DownloadJob(client["url"], client_jar, client.get("sha1"), client.get("size"),
+                                            category="client"))
+
+                logging_file = version_data.get("logging", {}).get("client", {}).get("file")
+                if logging_file:
+                    jobs.append(DownloadJob(logging_file["url"],
+                                            os.path.join(self.minecraft_directory, "assets", "log_configs",
+                                                         logging_file["id"]),
+                                            logging_file.get("sha1"), logging_file.get("size"), category="log_config"))
+
+                asset_index = self._load_asset_index(version_data)
+                if asset_index:
+                    jobs.extend(self.asset_jobs(asset_index))
+
+                runtime_links, runtime_version = [], None
+                component = version_data.get("javaVersion", {}).get("component")
+                if component:
+                    try:
+                        runtime_manifest, runtime_version = self._load_runtime_manifest(component)
+                    except (OSError, ValueError, DownloadError):
+                        runtime_manifest = None  # No runtime for us; fall back to a system Java
+                    if runtime_manifest:
+                        runtime_files, runtime_links = self.runtime_jobs(component, runtime_manifest)
+                        jobs.extend(runtime_files)
+
+                # Natives only need extracting again if a natives jar is new or changed
+                natives_dir = os.path.join(self.minecraft_directory, "versions", version_data["id"], "natives")
+                extract_natives = not os.path.isdir(natives_dir) or any(
+                    not self.index.is_valid(job.path, job.sha1, job.size) for job, _ in natives)
+
+            with trace.span("install.download", files=len(jobs)):
+                stats = self.downloader.download_all(jobs, callback, label=f"Installing {version_id}:",
+                                                     index=self.index)
+
+            check_cancelled(callback)  # Downloads stop on their own; don't half-finish after them
+            with trace.span("install.finish"):
+                if extract_natives:
+                    for job, exclude in natives:
+                        self.extract_natives(job.path, natives_dir, exclude)
+                if asset_index:
+                    self._place_legacy_assets(asset_index, version_data["assetIndex"]["id"])
+                if runtime_version is not None:
+                    self._make_links(runtime_links)
+                    with open(os.path.join(self.minecraft_directory, "runtime", component, get_runtime_platform(),
+                                           ".version"), "w", encoding="utf-8") as f:
+                        f.write(runtime_version)
+                # Old Forge profiles expect their own copy of the game jar
+                if not os.path.isfile(client_jar) and "inheritsFrom" in raw_data:
+                    parent_jar = os.path.join(self.minecraft_directory, "versions", raw_data["inheritsFrom"],
+                                              f"{raw_data['inheritsFrom']}.jar")
+                    if os.path.isfile(parent_jar):
+                        shutil.copyfile(parent_jar, client_jar)
+
+            _call(callback, "setStatus", f"Installed {version_id}")
+            if parent_stats:
+                stats = {key: stats[key] + parent_stats[key] for key in stats}
+            return stats
+
+def install_minecraft_version(versionid, minecraft_directory, callback=None, downloader=None):
+    """Drop-in for ``minecraft_launcher_lib.install.install_minecraft_version``."""
+    return Installer(minecraft_directory, downloader).install(versionid, callback)
@@ -0,0 +1,272 @@
+"""Registry of Java runtimes found on this machine.
+
+Candidates come from PATH, JAVA_HOME, the usual install roots and Mojang's
+bundled runtimes; each is probed once (in parallel) for its version and
+architecture and the result is cached in ``<data dir>/cache/java-runtimes.json``
+keyed by path and mtime. Launching then only looks things up in that cache and
+picks the Java major version the Minecraft version asks for.
+"""
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import trace
+from .paths import get_cache_dir
+from .versions import get_os_name
+
+PROBE_TIMEOUT = 10
+JAVA_EXE = "java.exe" if os.name == "nt" else "java"
+JAVAW_EXE = "javaw.exe"
+
+
+def _install_roots():
+    """Directories whose immediate children are Java installations."""
+    os_name = get_os_name()
+    if os_name == "windows":
+        roots = []
+        for env, default in (("ProgramFiles", "C:\\Program Files"), ("ProgramFiles(x86)", "C:\\Program Files (x86)"),
+                             ("ProgramW6432", "C:\\Program Files")):
+            base = os.environ.get(env, default)
+            for vendor in ("Java", "Eclipse Adoptium", "Eclipse Foundation", "Zulu", "Microsoft", "BellSoft",
+                           "Amazon Corretto", "AdoptOpenJDK"):
+                roots.append(os.path.join(base, vendor))
+        return roots
+    if os_name == "osx":
+        return ["/Library/Java/JavaVirtualMachines", os.path.expanduser("~/Library/Java/JavaVirtualMachines")]
+    return ["/usr/lib/jvm", "/usr/lib64/jvm", "/usr/java", "/opt", "/opt/java", os.path.expanduser("~/.jdks"),
+            os.path.expanduser("~/.sdkman/candidates/java")]
+
+
+def find_java_in(home):
+    """The java executable inside a Java home (or macOS bundle), if there is one."""
+    for sub in ("bin", os.path.join("Contents", "Home", "bin"), os.path.join("jre.bundle", "Contents", "Home", "bin")):
+        path = os.path.join(home, sub, JAVA_EXE)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _mojang_runtime_dirs():
+    dirs = [os.path.join(os.getenv("APPDATA", os.path.expanduser("~")), ".minecraft", "runtime"),
+            os.path.expanduser("~/.minecraft/runtime"),
+            os.path.expanduser("~/Library/Application Support/minecraft/runtime")]
+    if os.getenv("LOCALAPPDATA"):
+        dirs.append(os.path.join(os.getenv("LOCALAPPDATA"), "Programs", "Minecraft Launcher", "runtime"))
+        dirs.append(os.path.join(os.getenv("LOCALAPPDATA"), "Packages", "Microsoft.4297127D64EC6_8wekyb3d8bbwe",
+                                 "LocalCache", "Local", "runtime"))
+    return dirs
+
+
+def runtime_candidates(runtime_dir):
+    """Java executables in a Mojang-style ``runtime/<component>/<platform>/<component>`` tree."""
+    found = []
+    for home in glob.glob(os.path.join(runtime_dir, "*", "*", "*")):
+        java = find_java_in(home)
+        if java:
+            found.append(java)
+    return found
+
+
+def _environment_candidates():
+    """The java on PATH and in JAVA_HOME; cheap enough to look up on every start."""
+    candidates = []
+    for name in (JAVA_EXE, "java"):
+        path = shutil.which(name)
+        if path:
+            candidates.append(os.path.realpath(path))
+    if os.environ.get("JAVA_HOME"):
+        candidates.append(find_java_in(os.environ["JAVA_HOME"]))
+    return [os.path.abspath(path) for path in candidates if path]
+
+
+def discover_candidates(minecraft_directories=()):
+    """Every plausible java executable. Globs fixed depths only, no directory walks."""
+    candidates = _environment_candidates()
+    for root in _install_roots():
+        for home in glob.glob(os.path.join(root, "*")):
+            candidates.append(find_java_in(home))
+    for runtime_dir in _mojang_runtime_dirs() + [os.path.join(d, "runtime") for d in minecraft_directories]:
+        candidates.extend(runtime_candidates(runtime_dir))
+
+    unique = []
+    for path in candidates:
+        if path and os.path.normcase(path) not in {os.path.normcase(p) for p in unique}:
+            unique.append(os.path.abspath(path))
+    return unique
+
+
+def parse_major(version):
+    """"1.8.0_312" -> 8, "17.0.2" -> 17, "21" -> 21."""
+    match = re.match(r"(\d+)(?:\.(\d+))?", version or "")
+    if not match:
+        return 0
+    major = int(match.group(1))
+    if major == 1 and match.group(2):
+        return int(match.group(2))
+    return major
+
+
+def probe_java(path):
+    """Asks a java executable about itself. Returns a dict or None if it doesn't run."""
+    try:
+        result = subprocess.run([path, "-XshowSettings:properties", "-version"], capture_output=True,
+                                text=True, timeout=PROBE_TIMEOUT,
+                                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    props = {}
+    for line in (result.stderr + result.stdout).splitlines():
+        key, sep, value = line.strip().partition(" = ")
+        if sep:
+            props[key] = value
+    version = props.get("java.version")
+    if not version:
+        return None
+    return {
+        "version": version,
+        "major": parse_major(version),
+        "arch": props.get("os.arch", ""),
+        "vendor": props.get("java.vendor", ""),
+        "home": props.get("java.home", ""),
+    }
+
+
+class JavaRegistry:
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.path.join(get_cache_dir(), "java-runtimes.json")
+        self._lock = threading.Lock()
+        self._runtimes = None  # path -> probe result (+ mtime_ns)
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self):
+        tmp_path = f"{self.cache_path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._runtimes, f, indent=1)
+        os.replace(tmp_path, self.cache_path)
+
+    def _probe_all(self, paths, known):
+        """Probes paths whose mtime isn't already in ``known``, in parallel."""
+        results = {}
+        to_probe = []
+        for path in paths:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            entry = known.get(path)
+            if entry and entry.get("mtime_ns") == mtime_ns:
+                results[path] = entry
+            else:
+                to_probe.append((path, mtime_ns))
+        trace.count("java.cache_hits", len(results))
+        trace.count("java.probes", len(to_probe))
+        if to_probe:
+            with ThreadPoolExecutor(max_workers=min(8, len(to_probe))) as executor:
+                for (path, mtime_ns), info in zip(to_probe, executor.map(lambda p: probe_java(p[0]), to_probe)):
+                    if info:
+                        info["mtime_ns"] = mtime_ns
+                        results[path] = info
+        return results
+
+    def runtimes(self, minecraft_directories=()):
+        """All known runtimes. Discovers and probes only on first use or after ``invalidate``.
+
+        A cached registry is revalidated instead: its executables are
+        re-statted and whatever PATH and JAVA_HOME point at now is added.
+        """
+        with self._lock:
+            if self._runtimes is None:
+                with trace.span("java.discover"):
+                    cached = self._load()
+                    if cached is None:
+                        self._runtimes = self._probe_all(discover_candidates(minecraft_directories), {})
+                        self._save()
+                    else:
+                        # Cheap revalidation: re-probe only executables whose mtime changed
+                        paths = list(cached)
+                        paths += [path for path in _environment_candidates() if path not in cached]
+                        self._runtimes = self._probe_all(paths, cached)
+                        if self._runtimes != cached:
+                            self._save()
+            return dict(self._runtimes)
+
+    def invalidate(self, minecraft_directories=()):
+        """Forgets everything and rediscovers (e.g. after the user installed a new JDK)."""
+        with self._lock, trace.span("java.discover", rescan=True):
+            old = self._runtimes or self._load() or {}
+            self._runtimes = self._probe_all(discover_candidates(minecraft_directories), old)
+            self._save()
+            return dict(self._runtimes)
+
+    def add(self, paths):
+        """Registers specific executables (e.g. a freshly installed Mojang runtime)."""
+        self.runtimes()
+        with self._lock:
+            new = [p for p in paths if p not in self._runtimes]
+            if new:
+                self._runtimes.update(self._probe_all(new, {}))
+                self._save()
+
+    def info(self, path):
+        """Probe result for one executable (javaw.exe maps to its java.exe), probing it if new."""
+        java = os.path.join(os.path.dirname(path), JAVA_EXE) if os.path.basename(path) == JAVAW_EXE else path
+        java = os.path.abspath(shutil.which(java) or java)
+        runtimes = self.runtimes()
+        if java not in runtimes:
+            self.add([java])
+            runtimes = self.runtimes()
+        return runtimes.get(java)
+
+    def select(self, major, minecraft_directory=None):
+        """Best java executable for a Java ``major`` version, or None.
+
+        Exact major versions win (Mojang runtimes in the game directory first),
+        otherwise the closest newer one. On Windows javaw.exe is returned when
+        it sits next to java.exe so no console window pops up. When nothing
+        known fits, the machine is searched again once before giving up (a JDK
+        installed since the registry was cached).
+        """
+        if minecraft_directory:
+            # Runtimes our installer put into this directory; a fixed-depth glob, not a walk
+            self.add(runtime_candidates(os.path.join(minecraft_directory, "runtime")))
+        best = self._best(self.runtimes(), major, minecraft_directory)
+        if best is None:
+            trace.count("java.select_misses")
+            best = self._best(self.invalidate([minecraft_directory] if minecraft_directory else ()), major,
+                              minecraft_directory)
+        if best is None:
+            return None
+        javaw = os.path.join(os.path.dirname(best), JAVAW_EXE)
+        if os.name == "nt" and os.path.isfile(javaw):
+            return javaw
+        return best
+
+    @staticmethod
+    def _best(runtimes, major, minecraft_directory):
+        def rank(item):
+            path, info = item
+            in_game_dir = bool(minecraft_directory) and os.path.normcase(path).startswith(
+                os.path.normcase(os.path.abspath(minecraft_directory)))
+            is_64bit = "64" in info.get("arch", "")
+            return (info["major"] - major, not in_game_dir, not is_64bit)
+
+        exact = [item for item in runtimes.items() if item[1]["major"] == major]
+        newer = [item for item in runtimes.items() if item[1]["major"] > major]
+        best = min(exact or newer, key=rank, default=None)
+        return best[0] if best is not None else None
+
+
+def get_required_java_major(version_data):
+    """The Java major version a (resolved) version JSON needs; 8 for old versions."""
+    return version_data.get("javaVersion", {}).get("majorVersion", 8)
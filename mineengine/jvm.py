@@ -0,0 +1,192 @@
+"""JVM tuning profiles: heap size, garbage collector and class-data sharing.
+
+A profile sizes the heap from this machine's memory and how many clients run
+at once, and picks GC flags the launching Java actually has. Where the JVM
+supports dynamic AppCDS (Java 13+) the first launch of a version dumps the
+classes it loaded into ``<minecraft dir>/.mineengine/cds/<version>/<key>.jsa``
+and later launches map that archive instead of parsing the same jars again.
+"""
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+
+from .paths import get_cache_dir
+
+PROFILES = {
+    "balanced": {"description": "G1, half the memory left after an OS reserve, grows the heap as needed", "gc": "g1",
+                 "memory_share": 0.5, "max_heap_mb": 8192, "initial_share": 0.5},
+    "low-latency": {"description": "ZGC/Shenandoah where available for the shortest GC pauses", "gc": "pauseless",
+                    "memory_share": 0.6, "max_heap_mb": 12288, "initial_share": 1.0},
+    "throughput": {"description": "Parallel GC, fixed heap; best for servers and benchmarks", "gc": "parallel",
+                   "memory_share": 0.5, "max_heap_mb": 8192, "initial_share": 1.0},
+    "low-memory": {"description": "Small G1 heap for modest machines or many clients per box", "gc": "g1",
+                   "memory_share": 0.25, "max_heap_mb": 3072, "initial_share": 0.25},
+}
+DEFAULT_PROFILE = "balanced"
+MIN_HEAP_MB = 1024
+OS_RESERVE_MB = 2048  # Left for the OS (and the launcher) before sharing memory out
+
+_flag_lock = threading.Lock()
+_flag_cache = None
+_dumping = set()  # Archives being written by a running instance right now
+
+
+def system_memory_mb():
+    """Total physical memory in MiB (4096 if we can't tell)."""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    if line.startswith("MemTotal:"):
+                        return int(line.split()[1]) // 1024
+        elif os.name == "nt":
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(status)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullTotalPhys // (1024 * 1024)
+        elif sys.platform == "darwin":
+            output = subprocess.run(["sysctl", "-n", "hw.memsize"], capture_output=True, text=True, timeout=5)
+            return int(output.stdout.strip()) // (1024 * 1024)
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (OSError, ValueError, AttributeError, subprocess.SubprocessError):
+        return 4096
+
+
+def parse_memory(text):
+    """"2G" -> 2048, "4096M" -> 4096, "4096" -> 4096 (MiB), "" -> None."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([gGmMkK]?)[bB]?\s*", str(text or ""))
+    if not match:
+        return None
+    value, unit = float(match.group(1)), match.group(2).lower()
+    return int(value * 1024 if unit == "g" else value / 1024 if unit == "k" else value) or None
+
+
+def heap_size_mb(profile, instances=1, total_mb=None):
+    """Max heap for one of ``instances`` clients sharing this machine under ``profile``."""
+    total_mb = total_mb or system_memory_mb()
+    share = max(total_mb - OS_RESERVE_MB, total_mb // 2) * profile["memory_share"] / max(1, instances)
+    heap = min(int(share), profile["max_heap_mb"])
+    return max(MIN_HEAP_MB, heap // 256 * 256)
+
+
+def _supports_flag(java, flag):
+    """Whether ``java`` starts with ``flag`` (e.g. a GC only some vendors ship); cached by path+mtime."""
+    global _flag_cache
+    try:
+        key = f"{java}|{os.stat(java).st_mtime_ns}|{flag}"
+    except OSError:
+        return False
+    cache_path = os.path.join(get_cache_dir(), "jvm-flags.json")
+    with _flag_lock:
+        if _flag_cache is None:
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    _flag_cache = json.load(f)
+            except (OSError, ValueError):
+                _flag_cache = {}
+        if key in _flag_cache:
+            return _flag_cache[key]
+    try:
+        result = subprocess.run([java, flag, "-version"], capture_output=True, timeout=10,
+                                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        supported = result.returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        supported = False
+    with _flag_lock:
+        _flag_cache[key] = supported
+        tmp_path = f"{cache_path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_flag_cache, f)
+        os.replace(tmp_path, cache_path)
+    return supported
+
+
+def gc_arguments(gc, java_major, java=None):
+    """``(name, arguments)`` for a profile's GC on this Java."""
+    if gc == "pauseless":
+        if java_major >= 23:
+            return "zgc", ["-XX:+UseZGC"]  # Generational by default now
+        if java_major >= 21:
+            return "zgc", ["-XX:+UseZGC", "-XX:+ZGenerational"]
+        if java_major >= 15:
+            return "zgc", ["-XX:+UseZGC"]
+        if java_major >= 11 and java and _supports_flag(java, "-XX:+UseShenandoahGC"):
+            return "shenandoah", ["-XX:+UseShenandoahGC"]
+        gc = "g1"  # Nothing pauseless on this Java; G1 with a short pause goal is next best
+    if gc == "parallel":
+        return "parallel", ["-XX:+UseParallelGC"]
+    return "g1", ["-XX:+UseG1GC", "-XX:MaxGCPauseMillis=50", "-XX:+ParallelRefProcEnabled"]
+
+
+def cds_archive_path(minecraft_directory, version_id, java, java_mtime_ns, classpath):
+    """Where this version's archive lives; the name changes with the Java build and classpath."""
+    digest = hashlib.sha1(f"{java}|{java_mtime_ns}|{os.pathsep.join(classpath)}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.abspath(minecraft_directory), ".mineengine", "cds", version_id, f"{digest}.jsa")
+
+
+def cds_arguments(java_major, archive_path):
+    """``(mode, arguments)``: "auto" (19+ handles create/reuse itself), "dump", "reuse" or "off"."""
+    if not archive_path or java_major < 13:
+        return "off", []  # Dynamic archives arrived in Java 13
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+    # Drop archives for an older Java/classpath of the same version
+    for name in os.listdir(os.path.dirname(archive_path)):
+        old = os.path.join(os.path.dirname(archive_path), name)
+        if old != archive_path and name.endswith(".jsa"):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    if java_major >= 19:
+        return "auto", ["-XX:+AutoCreateSharedArchive", f"-XX:SharedArchiveFile={archive_path}"]
+    if os.path.isfile(archive_path):
+        return "reuse", [f"-XX:SharedArchiveFile={archive_path}"]
+    with _flag_lock:
+        if archive_path in _dumping:
+            return "off", []  # Another instance is writing it; don't race it
+        _dumping.add(archive_path)
+    return "dump", [f"-XX:ArchiveClassesAtExit={archive_path}"]
+
+
+def dump_finished(archive_path):
+    """Called when the instance that was dumping ``archive_path`` exits."""
+    with _flag_lock:
+        _dumping.discard(archive_path)
+
+
+def tune(profile_name, java_major, java=None, heap=None, instances=1, archive_path=None):
+    """The JVM arguments for one launch plus a record of what was chosen.
+
+    ``heap`` overrides the profile's heap size ("2G", "4096M"); ``archive_path``
+    enables AppCDS (see ``cds_archive_path``).
+    """
+    profile = PROFILES.get(profile_name) or PROFILES[DEFAULT_PROFILE]
+    profile_name = profile_name if profile_name in PROFILES else DEFAULT_PROFILE
+    heap_mb = parse_memory(heap) or heap_size_mb(profile, instances)
+    # Never above -Xmx: the JVM refuses to start with -Xms > -Xmx (a small RAM override)
+    initial_mb = min(heap_mb, max(256, int(heap_mb * profile["initial_share"]) // 256 * 256))
+    gc, gc_args = gc_arguments(profile["gc"], java_major, java)
+    cds, cds_args = cds_arguments(java_major, archive_path)
+    return {
+        "profile": profile_name,
+        "heap_mb": heap_mb,
+        "initial_heap_mb": initial_mb,
+        "gc": gc,
+        "cds": cds,
+        "cds_archive": archive_path if cds != "off" else None,
+        "instances": instances,
+        "arguments": [f"-Xmx{heap_mb}M", f"-Xms{initial_mb}M"] + gc_args + cds_args,
+    }
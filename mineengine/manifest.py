@@ -0,0 +1,200 @@
+"""On-disk cache for the Mojang version manifest (and other small documents).
+
+A cached copy is served straight away; once it is older than the TTL it is
+revalidated with a conditional GET (``If-None-Match`` / ``If-Modified-Since``)
+so an unchanged manifest costs a 304 instead of a full download. If the network
+is down we keep serving the last good copy.
+"""
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from . import trace
+from .config import load_config
+from .mirror import get_mirrors
+from .paths import get_cache_dir
+
+VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest_v2.json"
+USER_AGENT = "CuteLauncher/0.1"
+
+
+def _atomic_write(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class CachedResource:
+    """A single URL mirrored to ``cache_path`` with ETag/Last-Modified revalidation."""
+
+    def __init__(self, url, cache_path, ttl=None, timeout=None, mirrors=None):
+        config = load_config()
+        self.url = url
+        self.mirrors = mirrors if mirrors is not None else get_mirrors()
+        self.cache_path = cache_path
+        self.meta_path = cache_path + ".meta.json"
+        self.ttl = config["manifest_ttl"] if ttl is None else ttl
+        self.timeout = config["http_timeout"] if timeout is None else timeout
+        self._lock = threading.Lock()
+        self._revalidating = False
+
+    # --- cache files ---
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta):
+        _atomic_write(self.meta_path, json.dumps(meta).encode("utf-8"))
+
+    def read_cached(self):
+        """Returns the cached body, or None if we never fetched it."""
+        try:
+            with open(self.cache_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def is_fresh(self):
+        fetched_at = self._read_meta().get("fetched_at", 0)
+        return time.time() - fetched_at < self.ttl
+
+    # --- network ---
+
+    def revalidate(self):
+        """Conditional GET against the server. Returns (body, changed)."""
+        with trace.span(f"fetch.{os.path.basename(self.cache_path)}", url=self.url):
+            return self._revalidate()
+
+    def _revalidate(self):
+        meta = self._read_meta()
+        cached = self.read_cached()
+        candidates = self.mirrors.candidates(self.url)
+        for number, (mirror, url) in enumerate(candidates):
+            request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+            # Validators are only meaningful to whoever handed them out
+            if cached is not None and meta.get("source", self.url) == url:
+                if meta.get("etag"):
+                    request.add_header("If-None-Match", meta["etag"])
+                if meta.get("last_modified"):
+                    request.add_header("If-Modified-Since", meta["last_modified"])
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    body = response.read()
+                    headers = response.headers
+                break
+            except urllib.error.HTTPError as e:
+                if e.code == 304 and cached is not None:
+                    trace.count("manifest.not_modified")
+                    meta["fetched_at"] = time.time()
+                    self._write_meta(meta)
+                    return cached, False
+                if mirror is None:
+                    raise
+            except OSError:
+                if mirror is None:
+                    raise
+                self.mirrors.mark_down(mirror)
+                trace.count("mirror.fallbacks")
+
+        trace.count("manifest.bytes", len(body))
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        _atomic_write(self.cache_path, body)
+        self._write_meta({
+            "url": self.url,
+            "source": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        })
+        return body, body != cached
+
+    def fetch(self, force=False):
+        """Blocking fetch: fresh cache if within TTL, otherwise revalidate.
+
+        ``force`` skips the TTL check (it is still a cheap conditional GET).
+        Falls back to the last good copy when the network is unavailable.
+        """
+        cached = self.read_cached()
+        if cached is not None and not force and self.is_fresh():
+            trace.count("manifest.cache_hits")
+            return cached
+        try:
+            return self.revalidate()[0]
+        except (OSError, ValueError):
+            if cached is not None:
+                return cached  # Offline, nya~ serve what we have
+            raise
+
+    def get(self, on_update=None):
+        """Stale-while-revalidate: returns the cached copy immediately.
+
+        If the copy is stale it is revalidated on a background thread and
+        ``on_update(body)`` is called only if the content actually changed.
+        Without any cached copy this blocks on the network like ``fetch``.
+        """
+        cached = self.read_cached()
+        if cached is None:
+            return self.fetch(force=True)
+        if not self.is_fresh():
+            self._revalidate_in_background(on_update)
+        trace.count("manifest.cache_hits")
+        return cached
+
+    def _revalidate_in_background(self, on_update):
+        with self._lock:
+            if self._revalidating:
+                return
+            self._revalidating = True
+
+        def task():
+            try:
+                body, changed = self.revalidate()
+                if changed and on_update:
+                    on_update(body)
+            except (OSError, ValueError):
+                pass  # Still offline, the cached copy stays in use
+            finally:
+                with self._lock:
+                    self._revalidating = False
+
+        threading.Thread(target=task, daemon=True).start()
+
+
+class ManifestCache(CachedResource):
+    """The Mojang version manifest, parsed."""
+
+    def __init__(self, url=None, cache_dir=None, ttl=None, timeout=None, mirrors=None):
+        cache_dir = cache_dir or get_cache_dir("manifests")
+        url = url or load_config()["version_manifest_url"] or VERSION_MANIFEST_URL
+        super().__init__(url, os.path.join(cache_dir, "version_manifest_v2.json"), ttl, timeout, mirrors)
+
+    def get_manifest(self, force=False, on_update=None):
+        """Returns the manifest dict.
+
+        ``force`` revalidates synchronously (the "Refresh" button); otherwise
+        the cached copy is returned at once and revalidated in the background,
+        calling ``on_update(manifest)`` if a newer one arrives.
+        """
+        with trace.span("manifest", force=force):
+            if force:
+                body = self.fetch(force=True)
+            else:
+                callback = (lambda new_body: on_update(json.loads(new_body))) if on_update else None
+                body = self.get(on_update=callback)
+            return json.loads(body)
+
+    def get_versions(self, force=False, on_update=None):
+        """Like ``minecraft_launcher_lib.utils.get_version_list`` but cached.
+
+        Entries keep every manifest field (id, type, url, sha1, releaseTime...).
+        """
+        callback = (lambda manifest: on_update(manifest["versions"])) if on_update else None
+        return self.get_manifest(force=force, on_update=callback)["versions"]
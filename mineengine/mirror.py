@@ -0,0 +1,248 @@
+"""LAN caching mirror: one launcher serves game files to the rest of the fleet.
+
+``python -m mineengine mirror`` runs a small HTTP server backed by the object
+store. Other launchers list it under ``mirrors`` in their config (or in
+``MINEENGINE_MIRRORS``) and every request for an upstream host is first tried
+as ``<mirror>/<scheme>/<host>/<path>``, falling back to upstream if the mirror
+is down or doesn't have it. The mirror fetches each file from upstream once:
+content-addressed files (assets, jars, version JSONs; the SHA-1 comes from the
+client's ``X-Mineengine-SHA1`` header or, for Mojang's hash-named layouts, the
+URL) go into the object store, everything else (the version manifest, the Java
+runtime manifest, Forge metadata) into a URL cache that is revalidated like
+the launcher's own manifest cache.
+"""
+import email.utils
+import http.server
+import os
+import re
+import threading
+import time
+import urllib.parse
+
+from .config import load_config
+from .paths import get_cache_dir
+
+DEFAULT_PORT = 8765
+SHA1_HEADER = "X-Mineengine-SHA1"
+# Only these upstreams are fetched on a client's behalf, so the mirror is no open proxy
+UPSTREAM_HOSTS = (
+    "launchermeta.mojang.com", "launcher.mojang.com", "piston-meta.mojang.com", "piston-data.mojang.com",
+    "libraries.minecraft.net", "resources.download.minecraft.net", "maven.minecraftforge.net",
+    "files.minecraftforge.net",
+)
+DOWN_SECONDS = 60  # How long a mirror that refused a connection is skipped
+# The layouts whose URL is named after the file's SHA-1: asset objects (``<xx>/<sha1>``) and
+# Mojang's ``v1/objects``/``v1/packages``. Other hashes in a path (the Java runtime manifest's)
+# name a document that changes, so those go through the URL cache
+_SHA1_IN_PATH = re.compile(r"/(?:v1/(?:objects|packages)/([0-9a-f]{40})/|([0-9a-f]{2})/([0-9a-f]{40})$)")
+_SHA1 = re.compile(r"[0-9a-f]{40}")
+
+
+def _sha1_in_path(path):
+    """The SHA-1 a content-addressed URL path is named after, or ""."""
+    match = _SHA1_IN_PATH.search(path)
+    if match is None:
+        return ""
+    if match.group(1):
+        return match.group(1)
+    return match.group(3) if match.group(3).startswith(match.group(2)) else ""
+
+
+def allowed_hosts():
+    return set(UPSTREAM_HOSTS) | set(load_config()["mirror_allowed_hosts"])
+
+
+def mirror_url(mirror, url):
+    """``https://host/a/b?c`` -> ``<mirror>/https/host/a/b?c``."""
+    parts = urllib.parse.urlsplit(url)
+    rewritten = f"{mirror.rstrip('/')}/{parts.scheme}/{parts.netloc}{parts.path or '/'}"
+    return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+
+class MirrorList:
+    """The configured mirrors, with mirrors that just failed skipped for a while."""
+
+    def __init__(self, mirrors=None):
+        if mirrors is None:
+            env = os.environ.get("MINEENGINE_MIRRORS")
+            mirrors = env.split(",") if env else load_config()["mirrors"]
+        self.mirrors = [mirror.strip().rstrip("/") for mirror in mirrors if mirror.strip()]
+        self.hosts = allowed_hosts() if self.mirrors else set()
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.mirrors)
+
+    def candidates(self, url):
+        """``[(mirror or None, url), ...]`` to try in order; upstream (None) always comes last."""
+        if not self.mirrors or urllib.parse.urlsplit(url).hostname not in self.hosts:
+            return [(None, url)]
+        now = time.monotonic()
+        with self._lock:
+            up = [mirror for mirror in self.mirrors if self._down_until.get(mirror, 0) <= now]
+        return [(mirror, mirror_url(mirror, url)) for mirror in up] + [(None, url)]
+
+    def mark_down(self, mirror):
+        with self._lock:
+            self._down_until[mirror] = time.monotonic() + DOWN_SECONDS
+
+
+_default_mirrors = None
+
+
+def get_mirrors():
+    """The process-wide ``MirrorList`` built from the config."""
+    global _default_mirrors
+    if _default_mirrors is None:
+        _default_mirrors = MirrorList()
+    return _default_mirrors
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "MineEngineMirror/0.1"
+
+    def log_message(self, format, *args):
+        pass  # The mirror keeps counters instead of a line per asset
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        mirror = self.server.mirror
+        scheme, _, rest = self.path.lstrip("/").partition("/")
+        host, _, path = rest.partition("/")
+        if scheme not in ("http", "https") or host.split(":")[0] not in mirror.hosts:
+            return self._send_error(404)
+        url = f"{scheme}://{host}/{path}"
+        sha1 = (self.headers.get(SHA1_HEADER) or _sha1_in_path(urllib.parse.urlsplit(url).path)).lower() or None
+        if sha1 is not None and not _SHA1.fullmatch(sha1):
+            return self._send_error(400)  # It names a file in the store; nothing else may get that far
+        try:
+            if sha1:
+                file_path, etag, last_modified = mirror.object_for(url, sha1), f'"{sha1}"', None
+            else:
+                file_path, etag, last_modified = mirror.document_for(url)
+        except Exception:
+            mirror.count("errors")
+            return self._send_error(502)
+        self._send_file(file_path, etag, last_modified, send_body)
+
+    def _send_error(self, code):
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_file(self, file_path, etag, last_modified, send_body):
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        size = os.path.getsize(file_path)
+        start, end = 0, size - 1
+        status = 200
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", range_header or "")
+        if match and (not if_range or if_range in (etag, last_modified)):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                return self.end_headers()
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if etag:
+            self.send_header("ETag", etag)
+        if last_modified:
+            self.send_header("Last-Modified", last_modified)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if send_body:
+            with open(file_path, "rb") as f:
+                self.connection.sendfile(f, start, end - start + 1)  # Zero-copy where the OS has it
+            self.server.mirror.count("bytes_served", end - start + 1)
+
+
+class MirrorServer:
+    """Serves upstream files from this machine's store, fetching each one upstream only once."""
+
+    def __init__(self, host="0.0.0.0", port=None, downloader=None, cache_dir=None, ttl=None):
+        from .download import Downloader
+        from .store import ObjectStore
+
+        config = load_config()
+        # Our own downloads must go upstream, never to another mirror (or ourselves)
+        self.downloader = downloader or Downloader(store=ObjectStore.from_config() or ObjectStore(),
+                                                   mirrors=MirrorList([]))
+        self.cache_dir = cache_dir or get_cache_dir("mirror")
+        self.ttl = config["manifest_ttl"] if ttl is None else ttl
+        self.hosts = allowed_hosts()
+        self.stats = {"objects_hit": 0, "objects_fetched": 0, "documents": 0, "bytes_served": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+        self._documents = {}
+        self._documents_lock = threading.Lock()
+        self.httpd = http.server.ThreadingHTTPServer((host, port or config["mirror_port"]), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mirror = self
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def object_for(self, url, sha1):
+        """Path of object ``sha1`` in the store, fetched from ``url`` on first request."""
+        store = self.downloader.store
+        if store.has(sha1):
+            self.count("objects_hit")
+        else:
+            self.downloader.fetch_object(url, sha1)
+            self.count("objects_fetched")
+        return store.object_path(sha1)
+
+    def document_for(self, url):
+        """``(path, etag, last_modified)`` of a mutable document, revalidated after the TTL."""
+        from .manifest import CachedResource
+
+        with self._documents_lock:
+            resource = self._documents.get(url)
+            if resource is None:
+                parts = urllib.parse.urlsplit(url)
+                name = re.sub(r"[^A-Za-z0-9._-]", "_", parts.path.strip("/") + (f"_{parts.query}" if parts.query else ""))
+                resource = CachedResource(url, os.path.join(self.cache_dir, parts.netloc.replace(":", "_"), name),
+                                          ttl=self.ttl, mirrors=MirrorList([]))
+                self._documents[url] = resource
+        resource.fetch()
+        self.count("documents")
+        meta = resource._read_meta()
+        last_modified = meta.get("last_modified") or email.utils.formatdate(meta.get("fetched_at", 0), usegmt=True)
+        return resource.cache_path, meta.get("etag"), last_modified
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        """Serves on a background thread (tests, or a launcher that is also the mirror)."""
+        threading.Thread(target=self.serve_forever, daemon=True, name="mirror").start()
+        return self
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.downloader.close()
@@ -0,0 +1,32 @@
+"""Where the launcher keeps its own state (caches, indexes, settings)."""
+import os
+import sys
+
+
+def get_launcher_data_dir():
+    """Returns (and creates) the per-user launcher data directory.
+
+    Set ``MINEENGINE_HOME`` to move it somewhere else, e.g. on lab machines.
+    """
+    path = os.environ.get("MINEENGINE_HOME") or os.path.join(
+        os.getenv("APPDATA", os.path.expanduser("~")), ".mineengine")
+    path = os.path.abspath(path)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_cache_dir(*parts):
+    """Returns (and creates) a subdirectory of the launcher cache."""
+    path = os.path.join(get_launcher_data_dir(), "cache", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_default_minecraft_directory():
+    """The official launcher's game directory (same as mclib's get_minecraft_directory)."""
+    if sys.platform.startswith("win"):
+        return os.path.join(os.getenv("APPDATA", os.path.join(os.path.expanduser("~"), "AppData", "Roaming")),
+                            ".minecraft")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Application Support", "minecraft")
+    return os.path.join(os.path.expanduser("~"), ".minecraft")
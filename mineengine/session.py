@@ -0,0 +1,55 @@
+"""The last session's window state, so a launcher can open populated before anything is fetched.
+
+Each GUI saves what it was showing (version list, installed set, picked
+version, username, RAM, directory, ...) under its own name when something
+settles and when it closes, and reads it back first thing on the next start:
+the window is usable from the snapshot while the engine is imported and the
+manifest, Java runtimes and installed versions are refreshed in the background.
+
+Only light stdlib modules are imported here on purpose; this module sits on
+the startup path ahead of everything else.
+"""
+import json
+import os
+import threading
+import time
+
+from .paths import get_launcher_data_dir
+
+SNAPSHOT_FORMAT = 1  # Bump when the fields change meaning; older snapshots are then ignored
+
+
+def snapshot_path(name):
+    return os.path.join(get_launcher_data_dir(), f"session-{name}.json")
+
+
+def slim_versions(versions):
+    """Manifest entries cut down to what the version list shows and filters on (no url, sha1, time...)."""
+    return [{"id": v["id"], "type": v.get("type", "release"), "releaseTime": v.get("releaseTime", "")} for v in versions]
+
+
+def load_snapshot(name):
+    """The state saved by ``save_snapshot(name, ...)``, or ``{}`` when there is none (or it is unreadable)."""
+    try:
+        with open(snapshot_path(name), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or state.get("format") != SNAPSHOT_FORMAT:
+        return {}
+    return state
+
+
+def save_snapshot(name, state):
+    """Atomically replaces the snapshot; best effort, a failed save only costs the next warm start."""
+    path = snapshot_path(name)
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**state, "format": SNAPSHOT_FORMAT, "saved_at": round(time.time(), 3)}, f)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
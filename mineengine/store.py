@@ -0,0 +1,188 @@
+"""Global content-addressed object store shared by every Minecraft directory.
+
+Downloaded files with a known SHA-1 are kept once in ``<store>/objects/ab/abcdef...``
+and each Minecraft directory gets a hardlink to them (a reflink or plain copy
+when hardlinks aren't possible, e.g. across drives). Installing a version that
+another instance already has is then just a pile of ``link()`` calls.
+
+References are counted two ways: a hardlinked object's own link count tells us
+how many directories still use it, and ``refs.json`` remembers where we put
+copies/reflinks. ``gc()`` removes objects nobody references any more.
+"""
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+
+from .config import load_config
+from .paths import get_launcher_data_dir
+
+STALE_PARTIAL_AGE = 7 * 24 * 3600  # gc drops interrupted downloads untouched for this long (seconds)
+FICLONE = 0x40049409  # Linux ioctl that shares extents between two files (btrfs, xfs)
+_SHA1 = re.compile(r"[0-9a-fA-F]{40}")
+
+
+def _reflink(src, dst):
+    """Copy-on-write clone of ``src`` to ``dst``. Raises OSError where unsupported."""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except OSError:
+                d.close()
+                os.remove(dst)
+                raise
+        return
+    if sys.platform == "darwin":
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            raise OSError(ctypes.get_errno(), "clonefile failed")
+        return
+    raise OSError("reflinks are not supported on this platform")
+
+
+class ObjectStore:
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or os.path.join(get_launcher_data_dir(), "store"))
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.refs_path = os.path.join(self.root, "refs.json")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Saves replace refs.json in the order they read the refs
+        self._dirty = False
+        self._refs = {}
+        try:
+            with open(self.refs_path, "r", encoding="utf-8") as f:
+                self._refs = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def from_config(cls):
+        """The store configured in config.json, or None if it is switched off."""
+        config = load_config()
+        if not config["use_object_store"]:
+            return None
+        return cls(config["object_store_dir"])
+
+    def object_path(self, sha1):
+        # The hash becomes a path, so anything but a hex digest (say "../x") is refused
+        if not isinstance(sha1, str) or not _SHA1.fullmatch(sha1):
+            raise ValueError(f"Not a SHA-1: {sha1!r}")
+        return os.path.join(self.objects_dir, sha1[:2], sha1)
+
+    def has(self, sha1):
+        return os.path.isfile(self.object_path(sha1))
+
+    def add(self, tmp_path, sha1, executable=False):
+        """Moves an already verified file into the store."""
+        path = self.object_path(sha1)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.name != "nt":
+            # Shared by hardlinks, so nobody gets to modify it in place
+            os.chmod(tmp_path, 0o555 if executable else 0o444)
+        os.replace(tmp_path, path)
+        return path
+
+    def link_into(self, sha1, dest):
+        """Populates ``dest`` from the store. Returns "hardlink", "reflink" or "copy"."""
+        src = self.object_path(sha1)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp_dest = f"{dest}.link{os.getpid()}.{threading.get_ident()}"
+        try:
+            os.link(src, tmp_dest)
+            method = "hardlink"
+        except OSError:
+            try:
+                _reflink(src, tmp_dest)
+                method = "reflink"
+            except OSError:
+                shutil.copy2(src, tmp_dest)
+                method = "copy"
+        if os.name == "nt" and os.path.exists(dest):
+            os.chmod(dest, 0o666)  # os.replace can't overwrite read-only files on Windows
+        os.replace(tmp_dest, dest)
+        self.add_ref(sha1, dest, method)
+        return method
+
+    # --- reference counting ---
+
+    def add_ref(self, sha1, dest, method):
+        with self._lock:
+            refs = self._refs.setdefault(sha1, {})
+            if refs.get(dest) != method:
+                refs[dest] = method
+                self._dirty = True
+
+    def refcount(self, sha1):
+        """How many places still use this object."""
+        try:
+            st = os.stat(self.object_path(sha1))
+        except OSError:
+            return 0
+        with self._lock:
+            refs = dict(self._refs.get(sha1, {}))
+        copies = sum(1 for dest, method in refs.items() if method != "hardlink" and os.path.isfile(dest))
+        return (st.st_nlink - 1) + copies
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps(self._refs, separators=(",", ":"))
+                self._dirty = False
+            tmp_path = f"{self.refs_path}.tmp{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.refs_path)
+
+    def gc(self, dry_run=False):
+        """Deletes objects with no remaining references. Returns (objects, bytes) freed."""
+        freed_objects = freed_bytes = 0
+        with self._lock:
+            # Forget references whose file is gone or no longer ours
+            for sha1 in list(self._refs):
+                src = self.object_path(sha1)
+                live = {}
+                for dest, method in self._refs[sha1].items():
+                    try:
+                        if method != "hardlink" or os.path.samefile(src, dest):
+                            if os.path.isfile(dest):
+                                live[dest] = method
+                    except OSError:
+                        pass
+                if live != self._refs[sha1]:
+                    self._dirty = True
+                if live:
+                    self._refs[sha1] = live
+                else:
+                    del self._refs[sha1]
+
+        for bucket in os.listdir(self.objects_dir):
+            bucket_dir = os.path.join(self.objects_dir, bucket)
+            if not os.path.isdir(bucket_dir):
+                continue
+            for sha1 in os.listdir(bucket_dir):
+                path = os.path.join(bucket_dir, sha1)
+                if ".part" in sha1:
+                    # A resumable download nobody came back for
+                    if not dry_run and time.time() - os.path.getmtime(path) > STALE_PARTIAL_AGE:
+                        os.remove(path)
+                    continue
+                if "." in sha1 or self.refcount(sha1) > 0:  # "." = download still in progress
+                    continue
+                freed_objects += 1
+                freed_bytes += os.path.getsize(path)
+                if not dry_run:
+                    if os.name == "nt":
+                        os.chmod(path, 0o666)
+                    os.remove(path)
+        if not dry_run:
+            self.save()
+        return freed_objects, freed_bytes
@@ -0,0 +1,358 @@
+"""Launches and watches several game instances at once.
+
+Every instance gets its own reader threads that drain stdout/stderr line by
+line into a bounded ring buffer, so a chatty JVM can never fill a pipe and
+block, and memory stays capped however long it runs. One monitor thread polls
+all instances for exits (a non-zero exit code or a fresh crash report counts
+as a crash), re-applies CPU affinity/niceness to new JVM threads and kills an
+instance whose resident memory goes over its cap.
+"""
+import collections
+import itertools
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from .config import load_config
+
+# First log line once the title screen is up (1.8 through current versions)
+READY_PATTERN = re.compile(r"Sound engine started")
+_IS_WINDOWS = os.name == "nt"
+_BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+_IDLE_PRIORITY_CLASS = 0x00000040
+KEEP_EXITED = 32  # Exited instances kept for instances()/get()/wait(); older ones are forgotten
+
+
+class RingBuffer:
+    """The newest ``max_lines`` lines of an instance's output, thread-safe."""
+
+    def __init__(self, max_lines):
+        self._lines = collections.deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self.total = 0  # Lines ever written, so readers can tell how many were dropped
+
+    def append(self, stream, line):
+        with self._lock:
+            self._lines.append((stream, line))
+            self.total += 1
+
+    def lines(self, last=None):
+        """``[(stream, line), ...]``, oldest first; only the newest ``last`` if given."""
+        with self._lock:
+            lines = list(self._lines)
+        return lines[-last:] if last else lines
+
+    @property
+    def dropped(self):
+        with self._lock:
+            return self.total - len(self._lines)
+
+
+class ResourceLimits:
+    """Per-instance limits. Anything left as None is not enforced.
+
+    ``cpus`` is a collection of CPU indexes to pin the game to, ``nice`` a POSIX
+    niceness (on Windows > 0 means below-normal, >= 10 idle priority) and
+    ``memory_mb`` a resident-memory cap; the instance is killed above it.
+    """
+
+    def __init__(self, cpus=None, nice=None, memory_mb=None):
+        self.cpus = sorted(set(cpus)) if cpus else None
+        self.nice = nice
+        self.memory_mb = memory_mb
+
+    def creationflags(self):
+        if not _IS_WINDOWS or not self.nice or self.nice <= 0:
+            return 0
+        return _IDLE_PRIORITY_CLASS if self.nice >= 10 else _BELOW_NORMAL_PRIORITY_CLASS
+
+
+def _thread_ids(pid):
+    try:
+        return [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        return [pid]
+
+
+def _apply_limits(process, limits):
+    """Best-effort affinity/niceness for a running process (and, on Linux, each of its threads)."""
+    if _IS_WINDOWS:
+        if limits.cpus:
+            import ctypes
+            mask = sum(1 << cpu for cpu in limits.cpus)
+            ctypes.windll.kernel32.SetProcessAffinityMask(int(process._handle), mask)
+        return  # Priority was set through creationflags
+    # Linux affinity and niceness are per thread, and threads the JVM already
+    # started don't inherit later changes to the main thread
+    tids = _thread_ids(process.pid) if sys.platform.startswith("linux") else [process.pid]
+    for tid in tids:
+        try:
+            if limits.cpus and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(tid, limits.cpus)
+            if limits.nice is not None and os.getpriority(os.PRIO_PROCESS, tid) < limits.nice:
+                os.setpriority(os.PRIO_PROCESS, tid, limits.nice)
+        except OSError:
+            pass  # Thread already gone (or not ours to change)
+
+
+def rss_bytes(pid):
+    """Resident memory of a process in bytes, or None if we can't tell."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open(f"/proc/{pid}/statm", "r") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+    if _IS_WINDOWS:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return None
+        try:
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        finally:
+            ctypes.windll.kernel32.CloseHandle(handle)
+    try:
+        output = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, timeout=5)
+        return int(output.stdout.strip()) * 1024
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+class Instance:
+    """One running (or finished) game process."""
+
+    def __init__(self, instance_id, name, command, game_directory, username, limits, log_lines):
+        self.id = instance_id
+        self.name = name
+        self.command = command
+        self.game_directory = game_directory
+        self.username = username
+        self.limits = limits or ResourceLimits()
+        self.log = RingBuffer(log_lines)
+        self.process = None
+        self.state = "starting"  # -> running -> exited / crashed / killed
+        self.returncode = None
+        self.crash_report = None
+        self.reason = None
+        self.peak_rss = 0
+        self.started = None
+        self.ready = None  # Seconds from spawn to the title screen, once it showed up
+        self.ended = None
+        self.exit_hooks = []  # Called with this instance once it has exited
+        self.tuning = None  # JVM profile it was launched with, if the engine tuned it
+        self._readers = []
+        self._finish_lock = threading.Lock()
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    @property
+    def running(self):
+        return self.state == "running"
+
+    def uptime(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.time()) - self.started
+
+    def summary(self):
+        return {"id": self.id, "name": self.name, "pid": self.pid, "username": self.username,
+                "state": self.state, "returncode": self.returncode, "reason": self.reason,
+                "crash_report": self.crash_report, "uptime": round(self.uptime(), 1),
+                "ready_seconds": round(self.ready, 2) if self.ready is not None else None,
+                "peak_rss_mb": round(self.peak_rss / (1024 * 1024), 1), "log_lines": self.log.total,
+                "profile": self.tuning["profile"] if self.tuning else None}
+
+    def _crash_reports(self):
+        try:
+            folder = os.path.join(self.game_directory, "crash-reports")
+            return {os.path.join(folder, name) for name in os.listdir(folder)}
+        except OSError:
+            return set()
+
+
+class Supervisor:
+    def __init__(self, log_lines=None, poll_interval=None, on_exit=None, ready_pattern=READY_PATTERN):
+        config = load_config()
+        self.ready_pattern = ready_pattern
+        self.log_lines = log_lines or config["instance_log_lines"]
+        self.poll_interval = poll_interval or config["supervisor_poll_interval"]
+        self.on_exit = on_exit  # Called with the Instance, from the monitor thread
+        self._instances = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._monitor = None
+        self._known_reports = {}
+
+    # --- launching ---
+
+    def launch(self, command, game_directory, name=None, username=None, limits=None, env=None, exit_hooks=()):
+        """Starts ``command`` in ``game_directory`` and returns its Instance right away."""
+        os.makedirs(game_directory, exist_ok=True)
+        instance_id = next(self._ids)
+        instance = Instance(instance_id, name or f"instance-{instance_id}", command, game_directory, username,
+                            limits, self.log_lines)
+        instance.exit_hooks.extend(exit_hooks)
+        known_reports = instance._crash_reports()
+        creationflags = instance.limits.creationflags()
+        if _IS_WINDOWS:
+            creationflags |= subprocess.CREATE_NO_WINDOW  # Output goes to our log, no console window needed
+        instance.started = time.time()
+        instance.process = subprocess.Popen(command, cwd=game_directory, env=env, stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                            creationflags=creationflags, start_new_session=not _IS_WINDOWS)
+        instance.state = "running"
+        self._known_reports[instance_id] = known_reports
+        _apply_limits(instance.process, instance.limits)
+        for stream_name, stream in (("stdout", instance.process.stdout), ("stderr", instance.process.stderr)):
+            reader = threading.Thread(target=self._drain, args=(instance, stream_name, stream), daemon=True,
+                                      name=f"{instance.name}-{stream_name}")
+            reader.start()
+            instance._readers.append(reader)
+        with self._lock:
+            self._instances[instance_id] = instance
+            if self._monitor is None or not self._monitor.is_alive():
+                self._monitor = threading.Thread(target=self._watch, daemon=True, name="instance-monitor")
+                self._monitor.start()
+        return instance
+
+    def _drain(self, instance, stream_name, stream):
+        # Reads until EOF so the JVM never blocks on a full pipe
+        with stream:
+            for raw in iter(stream.readline, b""):
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                instance.log.append(stream_name, line)
+                if instance.ready is None and self.ready_pattern and self.ready_pattern.search(line):
+                    instance.ready = time.time() - instance.started
+
+    # --- monitoring ---
+
+    def _watch(self):
+        while True:
+            with self._lock:
+                live = [instance for instance in self._instances.values() if instance.running]
+                if not live:
+                    self._monitor = None  # launch() starts a new monitor for the next instance
+                    return
+            for instance in live:
+                try:
+                    self._check(instance)
+                except Exception:
+                    pass  # One instance's trouble must not end monitoring (and memory caps) for the others
+            time.sleep(self.poll_interval)
+
+    def _check(self, instance):
+        returncode = instance.process.poll()
+        if returncode is None:
+            limits = instance.limits
+            if limits.cpus or (limits.nice is not None and not _IS_WINDOWS):
+                _apply_limits(instance.process, limits)  # Catch threads started since the last tick
+            rss = rss_bytes(instance.process.pid)
+            if rss:
+                instance.peak_rss = max(instance.peak_rss, rss)
+                if limits.memory_mb and rss > limits.memory_mb * 1024 * 1024:
+                    instance.reason = f"memory cap: {rss // (1024 * 1024)} MB > {limits.memory_mb} MB"
+                    self._kill(instance, "killed")
+            return
+        self._finish(instance, returncode)
+
+    def _finish(self, instance, returncode, state=None):
+        # Both the monitor and stop()/wait() may get here; record the exit only once
+        with instance._finish_lock:
+            if instance.ended is None:
+                self._record_exit(instance, returncode, state)
+
+    def _record_exit(self, instance, returncode, state):
+        for reader in instance._readers:
+            reader.join(timeout=2)  # Let the last output land in the log
+        instance.returncode = returncode
+        instance.ended = time.time()
+        new_reports = sorted(instance._crash_reports() - self._known_reports.pop(instance.id, set()))
+        if new_reports:
+            instance.crash_report = new_reports[-1]
+        if state:
+            instance.state = state
+        elif returncode != 0 or instance.crash_report:
+            instance.state = "crashed"
+            instance.reason = instance.reason or (f"exit code {returncode}" if returncode else "crash report written")
+        else:
+            instance.state = "exited"
+        for hook in instance.exit_hooks + ([self.on_exit] if self.on_exit else []):
+            try:
+                hook(instance)
+            except Exception:
+                pass  # A failing hook (say, a full disk for the history) must not stop the monitor thread
+        with self._lock:
+            exited = [instance_id for instance_id, other in self._instances.items() if other.ended is not None]
+            for instance_id in exited[:-KEEP_EXITED]:
+                del self._instances[instance_id]
+
+    def _kill(self, instance, state):
+        try:
+            if _IS_WINDOWS:
+                instance.process.kill()
+            else:
+                os.killpg(instance.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self._finish(instance, instance.process.wait(), state)
+
+    # --- queries and control ---
+
+    def instances(self):
+        with self._lock:
+            return list(self._instances.values())
+
+    def get(self, instance_id):
+        with self._lock:
+            return self._instances.get(instance_id)
+
+    def running(self):
+        return [instance for instance in self.instances() if instance.running]
+
+    def stop(self, instance_id, timeout=10):
+        """Asks an instance to quit (SIGTERM; Windows has no gentle option), then kills it after ``timeout``."""
+        instance = self.get(instance_id)
+        if instance is None or not instance.running:
+            return
+        instance.reason = "stopped"
+        try:
+            if _IS_WINDOWS:
+                instance.process.terminate()
+            else:
+                os.killpg(instance.process.pid, signal.SIGTERM)
+            self._finish(instance, instance.process.wait(timeout), "stopped")
+        except subprocess.TimeoutExpired:
+            self._kill(instance, "stopped")
+        except OSError:
+            pass  # Already gone; the monitor picks up the exit
+
+    def stop_all(self, timeout=10):
+        for instance in self.running():
+            self.stop(instance.id, timeout)
+
+    def wait(self, instance_id, timeout=None):
+        """Blocks until the instance has exited and been recorded; returns its exit code."""
+        instance = self.get(instance_id)
+        returncode = instance.process.wait(timeout)
+        self._finish(instance, returncode)
+        return returncode
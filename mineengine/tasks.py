@@ -0,0 +1,184 @@
+"""One asyncio event loop, beside the Tk main loop, that runs every launcher operation.
+
+The GUIs hand each fetch, scan, install and launch to ``TaskRunner.submit``
+instead of starting a thread per click:
+
+    op = runner.submit("versions", self._fetch_versions_task, directory, force,
+                       on_result=..., on_error=..., on_cancel=...)
+
+* Operations are keyed. Submitting under a key whose operation is still
+  running supersedes it: the old one is cancelled and its result is never
+  delivered. Submitting the very same call again (same function and
+  arguments, e.g. a double-clicked "Refresh") joins the running operation
+  instead of starting the work twice.
+* ``Operation.cancel`` is cooperative. Work that hasn't started never does;
+  installs see it through the ``"cancelled"`` hook ``Operation.callbacks``
+  adds to their callback dict and stop within a chunk (``errors.Cancelled``);
+  anything else runs to its end and is dropped.
+* All operations share one pool of ``task_workers`` threads, so bursts queue
+  instead of piling up threads. Those aren't daemon threads (the interpreter
+  waits for them at exit), so a closing window calls ``cancel_all`` first.
+
+The engine is blocking code, so operations run on that pool through
+``run_in_executor``; the loop owns their lifecycle (queueing, supersession,
+delivering outcomes). The ``on_*`` callbacks run on the loop thread and
+should only hand results on (``UiBus.post``/``call``).
+
+asyncio itself is imported on the loop thread: it costs ~0.1 s and the
+window's first frame shouldn't wait for it. Operations submitted before the
+loop is up are started as soon as it is.
+"""
+import threading
+
+from . import trace
+from .config import load_config
+from .errors import Cancelled
+
+
+class Operation:
+    """One submitted call. ``state`` goes queued -> running -> done/failed/cancelled."""
+
+    def __init__(self, key, func, args, on_result, on_error, on_cancel):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.state = "queued"
+        self.result = None
+        self.error = None
+        self._on_result = on_result
+        self._on_error = on_error
+        self._on_cancel = on_cancel
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+
+    def __repr__(self):
+        return f"<Operation {self.key} {self.state}>"
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Raises ``Cancelled`` if the operation was cancelled; for work between steps."""
+        if self._cancelled.is_set():
+            raise Cancelled()
+
+    def callbacks(self, callback=None):
+        """An mclib-style callback dict (default: none) that also stops installs when this is cancelled."""
+        return {**(callback or {}), "cancelled": self._cancelled.is_set}
+
+    def same_call(self, func, args):
+        return self.func == func and self.args == args
+
+    def wait(self, timeout=None):
+        """Blocks until the operation has ended; True unless ``timeout`` ran out. Not for the Tk thread."""
+        return self._finished.wait(timeout)
+
+    def _run(self):
+        # On a pool thread
+        self.check()  # Cancelled while it was queued
+        self.state = "running"
+        return self.func(self, *self.args)
+
+
+class TaskRunner:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or load_config()["task_workers"]
+        self._lock = threading.Lock()
+        self._running = {}  # key -> newest Operation under it
+        self._queued = []  # Submitted before the loop was up
+        self._closed = False  # After cancel_all every new operation starts out cancelled
+        self._loop = None
+        self._thread = threading.Thread(target=self._serve, name="mineengine-loop", daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(self.max_workers, thread_name_prefix="mineengine-task"))
+        asyncio.set_event_loop(loop)
+        with self._lock:
+            self._loop = loop
+            queued, self._queued = self._queued, None
+        for operation in queued:
+            loop.create_task(self._execute(operation))
+        loop.run_forever()
+
+    def submit(self, key, func, *args, on_result=None, on_error=None, on_cancel=None):
+        """Runs ``func(operation, *args)`` on the pool; from any thread. Returns the ``Operation``.
+
+        Exactly one of ``on_result(result)``, ``on_error(exception)`` and
+        ``on_cancel()`` is called when it ends, unless it was joined.
+        """
+        with self._lock:
+            current = self._running.get(key)
+            if current is not None and not current.cancelled() and current.same_call(func, args):
+                trace.count("tasks.joined")
+                return current  # The same work is already under way
+            operation = Operation(key, func, args, on_result, on_error, on_cancel)
+            if self._closed:
+                operation.cancel()
+            self._running[key] = operation
+            loop = self._loop
+            if loop is None:
+                self._queued.append(operation)
+        if current is not None:
+            current.cancel()  # Superseded
+            trace.count("tasks.superseded")
+        if loop is not None:
+            loop.call_soon_threadsafe(lambda: loop.create_task(self._execute(operation)))
+        return operation
+
+    def running(self, key):
+        """The live operation under ``key``, or None."""
+        with self._lock:
+            operation = self._running.get(key)
+        return operation if operation is not None and not operation.cancelled() else None
+
+    def cancel(self, key):
+        operation = self.running(key)
+        if operation is not None:
+            operation.cancel()
+        return operation
+
+    def cancel_all(self):
+        """Cancels every live operation and any submitted later; for when the window closes.
+
+        Otherwise an install would run on after the window is gone and start a game nobody sees.
+        """
+        with self._lock:
+            self._closed = True
+            operations = list(self._running.values())
+        for operation in operations:
+            operation.cancel()
+        return operations
+
+    async def _execute(self, operation):
+        import asyncio
+        try:
+            operation.result = await asyncio.get_running_loop().run_in_executor(None, operation._run)
+            operation.state = "cancelled" if operation.cancelled() else "done"
+        except Cancelled:
+            operation.state = "cancelled"
+        except Exception as e:
+            operation.error = e
+            operation.state = "cancelled" if operation.cancelled() else "failed"
+        finally:
+            with self._lock:
+                if self._running.get(operation.key) is operation:
+                    del self._running[operation.key]
+            operation._finished.set()
+        if operation.state == "done":
+            handler, args = operation._on_result, (operation.result,)
+        elif operation.state == "failed":
+            handler, args = operation._on_error, (operation.error,)
+        else:
+            handler, args = operation._on_cancel, ()
+        if handler is not None:
+            try:
+                handler(*args)
+            except Exception:
+                pass  # A broken handler must not take the loop down
@@ -0,0 +1,300 @@
+"""Timed spans with counters around every launcher stage.
+
+    with trace.span("install", version=version_id):
+        ...
+        trace.count("download.retries")  # lands on the innermost span of this thread
+
+Spans nest per thread; ``bind`` carries the current span into a worker thread
+so what it counts lands in the right place. When a span ends its counters are
+added to its parent, so a top-level span ("launch", "install", ...) holds the
+totals. Every finished top-level span appends one line to the rolling
+``<data dir>/metrics.jsonl``, and ``export_chrome`` writes the spans recorded
+so far as Chrome trace-event JSON (chrome://tracing, https://ui.perfetto.dev).
+
+Tracing is on unless the config says ``"tracing": false`` or
+``MINEENGINE_TRACE=0``. When it is off ``span`` hands back one shared no-op
+span, so the instrumentation costs a function call per stage and nothing per
+file.
+"""
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+
+from .config import load_config
+from .paths import get_launcher_data_dir
+
+MAX_SPANS = 20000  # Finished spans kept in memory for export
+_EPOCH = time.perf_counter()  # Trace timestamps count from here
+
+_local = threading.local()
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_finished = collections.deque(maxlen=MAX_SPANS)
+_enabled = None
+
+
+def enabled():
+    global _enabled
+    if _enabled is None:
+        env = os.environ.get("MINEENGINE_TRACE")
+        _enabled = env != "0" if env is not None else bool(load_config()["tracing"])
+    return _enabled
+
+
+def configure(enable):
+    """Turns tracing on or off for this process, whatever the config says."""
+    global _enabled
+    _enabled = bool(enable)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class Span:
+    """One timed stage. Use as a context manager; ``count``/``set`` are thread-safe."""
+
+    def __init__(self, name, parent, args, start=None):
+        self.id = next(_ids)
+        self.name = name
+        self.parent = parent
+        self.args = args
+        self.counters = {}
+        self.children = []
+        self.start = start or time.perf_counter()
+        self.end = None
+        self.thread = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return True
+
+    def __enter__(self):
+        _stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.finish()
+
+    @property
+    def seconds(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def finish(self, end=None):
+        self.end = end or time.perf_counter()
+        _finished.append(self)
+        parent = self.parent
+        if parent is None:
+            _write_metrics(self)
+            return
+        with parent._lock:
+            for key, value in self.counters.items():
+                parent.counters[key] = parent.counters.get(key, 0) + value
+            parent.children.append(self)
+
+    def stages(self):
+        """Every finished span below this one, in the order they started."""
+        found, todo = [], list(self.children)
+        while todo:
+            span = todo.pop()
+            found.append(span)
+            todo.extend(span.children)
+        return sorted(found, key=lambda span: span.start)
+
+
+class _NullSpan:
+    """What ``span`` returns while tracing is off: accepts everything, records nothing."""
+
+    name = None
+    counters = {}
+    seconds = 0.0
+
+    def __bool__(self):
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def count(self, key, amount=1):
+        pass
+
+    def set(self, **args):
+        pass
+
+    def finish(self, end=None):
+        pass
+
+    def stages(self):
+        return []
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """A new span under the current one (a top-level span if there is none)."""
+    if not enabled():
+        return NULL_SPAN
+    stack = _stack()
+    return Span(name, stack[-1] if stack else None, args)
+
+
+def begin(name, start=None, **args):
+    """A top-level span that is not tied to a thread's stack, for stages that outlive one call.
+
+    Startup, for one, begins before the window exists and ends when the first
+    background refresh lands; ``bind(func, parent=...)`` puts work under it and
+    ``finish()`` ends it (and writes its metrics line).
+    """
+    if not enabled():
+        return NULL_SPAN
+    return Span(name, None, args, start=start)
+
+
+def current():
+    """The innermost open span on this thread (or the one ``bind`` brought along)."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else NULL_SPAN
+
+
+def count(key, amount=1):
+    """Adds to a counter of the current span; nothing when tracing is off or no span is open."""
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1].count(key, amount)
+
+
+def bind(func, parent=None):
+    """``func`` wrapped to run under the caller's current span (or ``parent``), for thread pools."""
+    parent = parent or current()
+    if not parent:
+        return func
+
+    def run(*args, **kwargs):
+        stack = _stack()
+        stack.append(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stack.pop()
+    return run
+
+
+def record(name, start, end, counters=None, parent=None, **args):
+    """Adds an already timed span (``time.perf_counter`` values) under the current one (or ``parent``)."""
+    parent = parent or current()
+    if not parent:
+        return
+    done = Span(name, parent, args, start=start)
+    done.counters.update(counters or {})
+    done.finish(end)
+
+
+# --- summaries ---
+
+def slowest(root, limit=3):
+    """``[(name, seconds)]`` of the slowest innermost stages of a finished span."""
+    leaves = [span for span in root.stages() if not span.children]
+    return [(span.name, span.seconds) for span in sorted(leaves, key=lambda s: -s.seconds)[:limit]]
+
+
+def summary_line(root, limit=3):
+    """"download.assets 3.1s, forge.processor 0.62s, ..." for a status bar."""
+    return ", ".join(f"{name} {seconds:.2f}s" if seconds < 1 else f"{name} {seconds:.1f}s"
+                     for name, seconds in slowest(root, limit))
+
+
+# --- export ---
+
+def _metrics_path():
+    return os.path.join(get_launcher_data_dir(), "metrics.jsonl")
+
+
+def _write_metrics(root):
+    stages = {}  # A stage that ran more than once (two installs, two processors) adds up
+    for stage in root.stages():
+        stages[stage.name] = round(stages.get(stage.name, 0) + stage.seconds, 4)
+    entry = {"time": round(time.time(), 3), "name": root.name, "seconds": round(root.seconds, 4),
+             "args": root.args, "counters": root.counters, "stages": stages}
+    line = json.dumps(entry, default=str) + "\n"
+    path = _metrics_path()
+    limit = load_config()["metrics_max_kb"] * 1024
+    try:
+        with _lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+                size = f.tell()
+            if size > limit:
+                # Rolling: keep the newer half
+                with open(path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+                tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.writelines(lines[len(lines) // 2:])
+                os.replace(tmp_path, path)
+    except OSError:
+        pass  # Metrics are best effort; never fail a launch over them
+
+
+def read_metrics(name=None, limit=None):
+    """Entries from the metrics file, oldest first, optionally only top-level spans called ``name``."""
+    entries = []
+    try:
+        with open(_metrics_path(), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if name is None or entry.get("name") == name:
+                    entries.append(entry)
+    except OSError:
+        return []
+    return entries[-limit:] if limit else entries
+
+
+def chrome_events(spans=None):
+    """Spans as Chrome trace "complete" events, plus thread names."""
+    spans = list(_finished) if spans is None else spans
+    pid = os.getpid()
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "mineengine"}}]
+    threads = {}
+    for span in spans:
+        threads.setdefault(span.thread, span.thread_name)
+        events.append({"name": span.name, "cat": span.name.split(".")[0], "ph": "X", "pid": pid, "tid": span.thread,
+                       "ts": round((span.start - _EPOCH) * 1e6, 1), "dur": round(span.seconds * 1e6, 1),
+                       "args": {**span.args, **span.counters}})
+    events.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in threads.items())
+    return events
+
+
+def export_chrome(path, root=None):
+    """Writes the recorded spans (or just ``root`` and what ran under it) as a trace file."""
+    spans = None if root is None else [root] + root.stages()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": chrome_events(spans), "displayTimeUnit": "ms"}, f, default=str)
+    return path
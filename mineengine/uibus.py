@@ -0,0 +1,64 @@
+"""Thread-safe progress/status bus between worker threads and the Tk main loop.
+
+Workers never touch Tk widgets. They ``post(channel, value)`` (only the latest
+value per channel is kept, so a burst of 500 progress ticks becomes one repaint)
+or queue a one-off ``call`` (dialogs, button states) that must not be dropped.
+The Tk thread drains everything on a fixed-rate ``root.after`` timer.
+"""
+import queue
+import threading
+
+DEFAULT_INTERVAL_MS = 50
+
+
+class UiBus:
+    def __init__(self, root, interval_ms=DEFAULT_INTERVAL_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._calls = queue.SimpleQueue()
+        self._handlers = {}
+        self.root.after(self.interval_ms, self._drain)
+
+    def subscribe(self, channel, handler):
+        """Runs ``handler(value)`` on the Tk thread with the newest value of ``channel``.
+
+        Channels are applied in subscription order, so subscribe "progress_max"
+        before "progress".
+        """
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def post(self, channel, value):
+        """Callable from any thread; earlier unrendered values of the channel are dropped."""
+        with self._lock:
+            self._latest[channel] = value
+
+    def call(self, func, *args, **kwargs):
+        """Callable from any thread; runs ``func`` on the Tk thread, in order, exactly once."""
+        self._calls.put((func, args, kwargs))
+
+    def callbacks(self, status_prefix="", status_suffix=""):
+        """An mclib-style ``setStatus``/``setProgress``/``setMax`` dict that posts to this bus."""
+        return {
+            "setStatus": lambda text: self.post("status", f"{status_prefix}{text}{status_suffix}"),
+            "setProgress": lambda value: self.post("progress", value),
+            "setMax": lambda value: self.post("progress_max", value),
+        }
+
+    def _drain(self):
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        try:
+            for channel, handlers in self._handlers.items():
+                if channel in latest:
+                    for handler in handlers:
+                        handler(latest[channel])
+            while True:
+                try:
+                    func, args, kwargs = self._calls.get_nowait()
+                except queue.Empty:
+                    break
+                func(*args, **kwargs)
+        finally:
+            self.root.after(self.interval_ms, self._drain)
@@ -0,0 +1,96 @@
+"""Per-directory verification index so unchanged files are checked with a stat, not a hash.
+
+For every file we downloaded or verified we remember ``(size, mtime_ns, sha1)``.
+On the next install pass a file whose size and mtime still match its entry is
+trusted without reading it; only new, missing or touched files get re-hashed.
+The index lives in ``<minecraft dir>/.mineengine/verify-index.json``.
+"""
+import json
+import os
+import threading
+
+from .download import sha1_of_file
+
+INDEX_VERSION = 1
+
+
+class VerifyIndex:
+    def __init__(self, minecraft_directory):
+        self.root = os.path.abspath(minecraft_directory)
+        self.path = os.path.join(self.root, ".mineengine", "verify-index.json")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Saves replace the file in the order they read the entries
+        self._dirty = False
+        self._entries = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._entries = data.get("files", {})
+        except (OSError, ValueError):
+            pass  # First run (or a broken index): everything gets hashed once
+
+    def _key(self, path):
+        rel_path = os.path.relpath(os.path.abspath(path), self.root)
+        if rel_path.startswith(".."):
+            return None  # Outside this directory, not ours to track
+        return rel_path.replace(os.sep, "/")
+
+    def is_valid(self, path, sha1=None, size=None):
+        """True if ``path`` exists and matches ``sha1``/``size``, hashing only if it changed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if size is not None and st.st_size != size:
+            return False
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key) if key else None
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return sha1 is None or entry[2] == sha1
+        if sha1 is None:
+            return True  # Nothing to compare against; existing is good enough
+        actual = sha1_of_file(path)
+        self._store(key, st, actual)
+        return actual == sha1
+
+    def sha1_of(self, path):
+        """SHA-1 of an existing file, straight from the index if it is unchanged."""
+        st = os.stat(path)
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key) if key else None
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns and entry[2]:
+            return entry[2]
+        actual = sha1_of_file(path)
+        self._store(key, st, actual)
+        return actual
+
+    def record(self, path, sha1):
+        """Remembers a file we just wrote (and verified)."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self._store(self._key(path), st, sha1)
+
+    def _store(self, key, st, sha1):
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = [st.st_size, st.st_mtime_ns, sha1]
+            self._dirty = True
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps({"version": INDEX_VERSION, "files": self._entries}, separators=(",", ":"))
+                self._dirty = False
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp{os.getpid()}.{threading.get_ident()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
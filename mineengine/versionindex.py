@@ -0,0 +1,344 @@
+"""In-memory indexes behind the version list: what is installed, and what matches a filter.
+
+``InstalledIndex`` knows which versions (vanilla or modded profiles) a
+Minecraft directory has installed. It scans ``versions/`` once and then keeps
+the set current from filesystem notifications: inotify on Linux, otherwise
+(or when the inotify watch limit is reached) by polling the directory
+mtimes every ``installed_poll_interval`` seconds. Only the entries that
+changed are looked at again, so a directory with hundreds of profiles costs
+nothing to re-read and listeners hear about installs made by anything, this
+launcher or not.
+
+``VersionIndex`` is a manifest version list prepared for type-ahead: entries
+grouped by type, a sorted id table for prefix lookups and release dates for
+range filters. Installed profiles the manifest doesn't list (Forge, OptiFine,
+custom) are added to it as type ``"modded"``. A search is a couple of bisects and set lookups instead of a
+walk over every entry.
+"""
+import bisect
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+
+from . import trace
+from .config import load_config
+
+# --- installed versions ---
+
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0x80000
+_ENTRY_MASK = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO
+_ROOT_MASK = _ENTRY_MASK | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (then len bytes of NUL-padded name)
+
+_libc = None
+
+
+def _inotify():
+    """libc with the inotify calls, or None where there is no inotify."""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith("linux"):
+            try:
+                import ctypes.util  # Only here: the GUIs import this module on their startup path
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+                _libc = libc
+            except (OSError, AttributeError):
+                pass
+    return _libc or None
+
+
+def _events(data):
+    offset = 0
+    while offset + _EVENT.size <= len(data):
+        wd, mask, _, length = _EVENT.unpack_from(data, offset)
+        offset += _EVENT.size
+        name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+        offset += length
+        yield wd, mask, name
+
+
+def is_installed(versions_dir, name):
+    """A version counts as installed once ``versions/<id>/<id>.json`` exists."""
+    return os.path.isfile(os.path.join(versions_dir, name, f"{name}.json"))
+
+
+class InstalledIndex:
+    """The installed version ids of one Minecraft directory, kept current by a watcher thread.
+
+    ``ids()`` is a cheap snapshot; ``subscribe(callback)`` calls ``callback(ids)``
+    on the watcher thread after every change.
+    """
+
+    def __init__(self, minecraft_directory, poll_interval=None, watch=True):
+        self.versions_dir = os.path.join(os.path.abspath(minecraft_directory), "versions")
+        self.poll_interval = poll_interval or load_config()["installed_poll_interval"]
+        self.mode = None  # "inotify" or "poll" once the watcher runs
+        self.generation = 0  # Bumped on every change
+        self._lock = threading.Lock()
+        self._ids = frozenset()
+        self._mtimes = {}  # Polling: entry -> mtime_ns of versions/<entry>
+        self._root_mtime = None
+        self._listeners = []
+        self._stop = threading.Event()
+        with trace.span("versions.scan") as span:
+            self.rescan()
+            span.count("versions.installed", len(self._ids))
+        self._thread = None
+        if watch:
+            self._thread = threading.Thread(target=self._run, name=f"installed-index:{self.versions_dir}", daemon=True)
+            self._thread.start()
+
+    def ids(self):
+        return self._ids
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def close(self):
+        self._stop.set()
+
+    # --- updates ---
+
+    def _publish(self, ids):
+        with self._lock:
+            if ids == self._ids:
+                return
+            self._ids = ids
+            self.generation += 1
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(ids)
+            except Exception:
+                pass  # A broken listener must not stop the watcher
+
+    def rescan(self):
+        """Reads the whole ``versions/`` directory again."""
+        try:
+            names = os.listdir(self.versions_dir)
+            self._root_mtime = os.stat(self.versions_dir).st_mtime_ns
+        except OSError:
+            names, self._root_mtime = [], None
+        mtimes = {}
+        for name in names:
+            try:
+                mtimes[name] = os.stat(os.path.join(self.versions_dir, name)).st_mtime_ns
+            except OSError:
+                pass
+        self._mtimes = mtimes
+        self._publish(frozenset(name for name in mtimes if is_installed(self.versions_dir, name)))
+
+    def _recheck(self, names):
+        ids = set(self._ids)
+        for name in names:
+            if is_installed(self.versions_dir, name):
+                ids.add(name)
+            else:
+                ids.discard(name)
+        self._publish(frozenset(ids))
+
+    # --- watcher thread ---
+
+    def _run(self):
+        use_inotify = _inotify() is not None
+        while not self._stop.is_set():
+            if use_inotify and os.path.isdir(self.versions_dir):
+                try:
+                    self._watch_inotify()
+                    continue  # versions/ went away (or was replaced); start over
+                except OSError as e:
+                    if e.errno != errno.ENOENT:
+                        use_inotify = False  # Out of watches or instances: poll from now on
+            self.mode = "poll"
+            self._poll()
+            self._stop.wait(self.poll_interval)
+
+    def _poll(self):
+        try:
+            root_mtime = os.stat(self.versions_dir).st_mtime_ns
+        except OSError:
+            root_mtime = None
+        if root_mtime != self._root_mtime:
+            self.rescan()  # Entries came or went
+            return
+        changed = []
+        for name, mtime in self._mtimes.items():
+            try:
+                current = os.stat(os.path.join(self.versions_dir, name)).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                self._mtimes[name] = current
+                changed.append(name)
+        if changed:
+            self._recheck(changed)
+
+    def _watch_inotify(self):
+        import ctypes
+        libc = _inotify()
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+
+        def add(path, mask):
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), mask)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_add_watch", path)
+            return wd
+
+        try:
+            root = add(self.versions_dir, _ROOT_MASK)
+            entries = {}  # wd -> entry name under versions/
+            for name in os.listdir(self.versions_dir):
+                path = os.path.join(self.versions_dir, name)
+                if os.path.isdir(path):
+                    try:
+                        entries[add(path, _ENTRY_MASK | _IN_ONLYDIR)] = name
+                    except OSError as e:
+                        if e.errno != errno.ENOENT:
+                            raise
+            # Scan after the watches are in place so nothing slips in between
+            self.rescan()
+            self.mode = "inotify"
+            while not self._stop.is_set():
+                if not select.select([fd], [], [], 0.5)[0]:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                changed, full, gone = set(), False, False
+                for wd, mask, name in _events(data):
+                    if mask & _IN_Q_OVERFLOW:
+                        full = True
+                    elif wd == root:
+                        if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED):
+                            gone = True
+                            continue
+                        changed.add(name)
+                        if not mask & _IN_ISDIR:
+                            continue
+                        if mask & (_IN_CREATE | _IN_MOVED_TO):
+                            try:
+                                entries[add(os.path.join(self.versions_dir, name), _ENTRY_MASK | _IN_ONLYDIR)] = name
+                            except OSError as e:
+                                if e.errno != errno.ENOENT:
+                                    raise
+                        else:  # Deleted or moved away
+                            for entry_wd, entry in list(entries.items()):
+                                if entry == name:
+                                    del entries[entry_wd]
+                                    libc.inotify_rm_watch(fd, entry_wd)
+                    elif wd in entries:
+                        if mask & _IN_IGNORED:
+                            entries.pop(wd)
+                        elif name == f"{entries[wd]}.json":
+                            changed.add(entries[wd])
+                if full or gone:
+                    self.rescan()
+                    if gone:
+                        return
+                elif changed:
+                    self._recheck(changed)
+        finally:
+            os.close(fd)
+
+
+# --- searchable version list ---
+
+MODDED_TYPE = "modded"  # Installed profiles that aren't in the manifest
+
+
+class VersionIndex:
+    """Manifest entries (newest first, as the manifest lists them) indexed for filtering.
+
+    Ids in ``installed`` that the manifest doesn't have come first, as
+    ``MODDED_TYPE`` entries without a release date.
+    """
+
+    def __init__(self, versions, installed=()):
+        versions = list(versions)
+        known = {entry["id"] for entry in versions}
+        local = [{"id": version_id, "type": MODDED_TYPE, "releaseTime": ""}
+                 for version_id in sorted(set(installed) - known, reverse=True)]
+        self.entries = local + versions
+        self.by_type = {}
+        for position, entry in enumerate(self.entries):
+            self.by_type.setdefault(entry.get("type", "release"), []).append(position)
+        # (lower-case id, position), sorted: a prefix is one contiguous run
+        self._ids = sorted((entry["id"].lower(), position) for position, entry in enumerate(self.entries))
+        self._keys = [key for key, _ in self._ids]
+        self._dates = [entry.get("releaseTime", "")[:10] for entry in self.entries]  # "YYYY-MM-DD" compares as text
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, version_id):
+        """The entry with exactly this id, or None."""
+        key = version_id.lower()
+        at = bisect.bisect_left(self._keys, key)
+        while at < len(self._keys) and self._keys[at] == key:
+            position = self._ids[at][1]
+            if self.entries[position]["id"] == version_id:
+                return self.entries[position]
+            at += 1
+        return None
+
+    def types(self):
+        return sorted(self.by_type)
+
+    def search(self, prefix="", types=None, installed=None, installed_only=False, since=None, until=None, limit=None):
+        """Matching entries in manifest order.
+
+        ``prefix`` matches the start of the id (case-insensitive), ``types`` is
+        a collection of manifest types, ``installed_only`` keeps ids in
+        ``installed`` and ``since``/``until`` are inclusive "YYYY-MM-DD" bounds
+        on the release date.
+        """
+        if prefix:
+            prefix = prefix.lower()
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_left(self._keys, prefix + "\uffff", start)
+            positions = sorted(position for _, position in self._ids[start:end])
+        else:
+            positions = None
+        if types is not None:
+            typed = sorted(position for kind in types for position in self.by_type.get(kind, ()))
+            positions = typed if positions is None else sorted(set(positions).intersection(typed))
+        if positions is None:
+            positions = range(len(self.entries))
+        matches = []
+        for position in positions:
+            entry = self.entries[position]
+            if installed_only and entry["id"] not in (installed or ()):
+                continue
+            if since and self._dates[position] < since:
+                continue
+            if until and self._dates[position] > until:
+                continue
+            matches.append(entry)
+            if limit and len(matches) >= limit:
+                break
+        return matches
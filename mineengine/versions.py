@@ -0,0 +1,150 @@
+"""Reading version JSON files: inheritance, library rules and file locations."""
+import json
+import os
+import platform
+import re
+import sys
+
+LIBRARIES_URL = "https://libraries.minecraft.net/"
+
+
+def get_os_name():
+    """The OS name as used in version JSON rules (windows/osx/linux)."""
+    if sys.platform.startswith("win"):
+        return "windows"
+    if sys.platform == "darwin":
+        return "osx"
+    return "linux"
+
+
+def get_arch_bits():
+    return "64" if sys.maxsize > 2**32 else "32"
+
+
+def _rule_matches(rule, features):
+    os_rule = rule.get("os", {})
+    if "name" in os_rule and os_rule["name"] != get_os_name():
+        return False
+    if os_rule.get("arch") == "x86" and get_arch_bits() != "32":
+        return False
+    if "version" in os_rule and not re.match(os_rule["version"], platform.version()):
+        return False
+    for feature, wanted in rule.get("features", {}).items():
+        if bool(features.get(feature, False)) != wanted:
+            return False
+    return True
+
+
+def rules_allow(rules, features=None):
+    """Evaluates a Mojang ``rules`` list; the last matching rule wins."""
+    if not rules:
+        return True
+    features = features or {}
+    allowed = False
+    for rule in rules:
+        if _rule_matches(rule, features):
+            allowed = rule.get("action") == "allow"
+    return allowed
+
+
+def get_version_json_path(minecraft_directory, version_id):
+    return os.path.join(minecraft_directory, "versions", version_id, f"{version_id}.json")
+
+
+def load_version_json(minecraft_directory, version_id):
+    with open(get_version_json_path(minecraft_directory, version_id), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _library_key(lib):
+    # group:artifact[:classifier], i.e. the name without the version
+    parts = lib["name"].split("@")[0].split(":")
+    return ":".join(parts[:2] + parts[3:])
+
+
+def inherit_version_json(child, parent):
+    """Merges a child profile (e.g. Forge) onto its parent like the official launcher does."""
+    merged = dict(parent)
+    for key, value in child.items():
+        if key == "libraries":
+            child_keys = {_library_key(lib) for lib in value}
+            merged["libraries"] = list(value) + [lib for lib in parent.get("libraries", [])
+                                                 if _library_key(lib) not in child_keys]
+        elif key == "arguments":
+            arguments = dict(parent.get("arguments", {}))
+            for kind, args in value.items():
+                arguments[kind] = list(arguments.get(kind, [])) + list(args)
+            merged["arguments"] = arguments
+        else:
+            merged[key] = value
+    merged.pop("inheritsFrom", None)
+    return merged
+
+
+def resolve_version_json(minecraft_directory, version_id):
+    """Loads a version JSON with its whole ``inheritsFrom`` chain applied.
+
+    Returns ``(merged_json, chain)`` where ``chain`` lists the version ids that
+    were read, child first.
+    """
+    data = load_version_json(minecraft_directory, version_id)
+    chain = [version_id]
+    while "inheritsFrom" in data:
+        parent_id = data["inheritsFrom"]
+        chain.append(parent_id)
+        data = inherit_version_json(data, load_version_json(minecraft_directory, parent_id))
+    return data, chain
+
+
+def library_path(name):
+    """Maven coordinate (``group:artifact:version[:classifier][@ext]``) to a relative path."""
+    name, _, ext = name.partition("@")
+    parts = name.split(":")
+    group, artifact, version = parts[:3]
+    classifier = f"-{parts[3]}" if len(parts) > 3 else ""
+    return os.path.join(*group.split("."), artifact, version, f"{artifact}-{version}{classifier}.{ext or 'jar'}")
+
+
+def get_native_classifier(lib):
+    """The natives classifier for this platform, or None for non-native libraries."""
+    natives = lib.get("natives", {})
+    classifier = natives.get(get_os_name())
+    if classifier is None:
+        return None
+    return classifier.replace("${arch}", get_arch_bits())
+
+
+def get_library_files(lib, minecraft_directory):
+    """Lists ``(path, url, sha1, size, is_native)`` for the files a library needs on this OS."""
+    if not rules_allow(lib.get("rules")):
+        return []
+    libraries_dir = os.path.join(minecraft_directory, "libraries")
+    downloads = lib.get("downloads", {})
+    files = []
+
+    artifact = downloads.get("artifact")
+    if artifact:
+        rel_path = artifact.get("path") or library_path(lib["name"])
+        if artifact.get("url"):
+            files.append((os.path.join(libraries_dir, rel_path), artifact["url"], artifact.get("sha1"),
+                          artifact.get("size"), False))
+    elif "natives" not in lib:
+        # Old-style (or Forge/Fabric style) entry with just a name and maybe a repository url
+        rel_path = library_path(lib["name"])
+        base_url = lib.get("url") or LIBRARIES_URL
+        files.append((os.path.join(libraries_dir, rel_path), base_url.rstrip("/") + "/" + rel_path.replace(os.sep, "/"),
+                      lib.get("checksums", [None])[0], None, False))
+
+    classifier = get_native_classifier(lib)
+    if classifier:
+        native = downloads.get("classifiers", {}).get(classifier)
+        if native:
+            rel_path = native.get("path") or library_path(f"{lib['name']}:{classifier}")
+            files.append((os.path.join(libraries_dir, rel_path), native["url"], native.get("sha1"),
+                          native.get("size"), True))
+        elif not downloads:
+            rel_path = library_path(f"{lib['name']}:{classifier}")
+            base_url = lib.get("url") or LIBRARIES_URL
+            files.append((os.path.join(libraries_dir, rel_path), base_url.rstrip("/") + "/" + rel_path.replace(os.sep, "/"),
+                          None, None, True))
+    return files
@@ -0,0 +1,81 @@
+"""Resuming interrupted downloads against ``benchmarks.fake_mojang`` cutting connections short."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.fake_mojang import FakeMojang
+from mineengine.download import DownloadJob, Downloader
+from mineengine.mirror import MirrorList
+
+SIZE = 3 * 1024 * 1024  # Above resume_min_size_mb, below parallel_range_min_mb: one resumable range
+
+
+class _DropOnce(FakeMojang):
+    """Cuts the first response short (``drop_rate`` 1.0), then serves normally."""
+
+    def count(self, **amounts):
+        if amounts.get("dropped"):
+            self.drop_rate = 0.0
+        super().count(**amounts)
+
+
+class DownloadResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="mineengine-test-")
+        self.old_home = os.environ.get("MINEENGINE_HOME")
+        os.environ["MINEENGINE_HOME"] = os.path.join(self.workdir, "home")
+        os.makedirs(os.environ["MINEENGINE_HOME"])
+        with open(os.path.join(os.environ["MINEENGINE_HOME"], "config.json"), "w", encoding="utf-8") as f:
+            json.dump({"use_object_store": False, "resume_min_size_mb": 1, "parallel_range_min_mb": 64}, f)
+        self.fake = _DropOnce(assets=1, libraries=1, client_mb=1, forge_libraries=1, filler_versions=1,
+                              drop_rate=1.0).start()
+        self.data = os.urandom(SIZE)
+        self.sha1 = hashlib.sha1(self.data).hexdigest()
+        self.fake._add("/big.bin", self.data)
+        self.url = self.fake.base + "/big.bin"
+        self.path = os.path.join(self.workdir, "big.bin")
+        self.downloader = Downloader(mirrors=MirrorList([]))
+
+    def tearDown(self):
+        self.downloader.close()
+        self.fake.shutdown()
+        if self.old_home is None:
+            os.environ.pop("MINEENGINE_HOME", None)
+        else:
+            os.environ["MINEENGINE_HOME"] = self.old_home
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def assert_downloaded(self):
+        with open(self.path, "rb") as f:
+            self.assertEqual(hashlib.sha1(f.read()).hexdigest(), self.sha1)
+        self.assertFalse(os.path.exists(self.path + ".part"))
+        self.assertFalse(os.path.exists(self.path + ".part.json"))
+
+    def test_resumes_with_range_after_drop(self):
+        self.assertTrue(self.downloader.download(DownloadJob(self.url, self.path, self.sha1, SIZE)))
+        self.assert_downloaded()
+        self.assertEqual(self.fake.stats["dropped"], 1)
+        self.assertGreaterEqual(self.fake.stats["ranged"], 1)
+        # The dropped half isn't fetched again
+        self.assertLess(self.fake.stats["bytes"], SIZE * 1.1)
+
+    def test_restart_replaces_stale_validator(self):
+        # An earlier attempt against a file that has changed since: its ETag no longer matches
+        with open(self.path + ".part", "wb") as f:
+            f.write(b"\0" * SIZE)
+        with open(self.path + ".part.json", "w", encoding="utf-8") as f:
+            json.dump({"url": self.url, "sha1": self.sha1, "size": SIZE, "validator": '"stale"',
+                       "parts": [[0, SIZE, SIZE // 4]]}, f)
+        # Answered 200 (cut short), then resumed with the new ETag in If-Range: a 206
+        self.assertTrue(self.downloader.download(DownloadJob(self.url, self.path, self.sha1, SIZE)))
+        self.assert_downloaded()
+        self.assertEqual(self.fake.stats["dropped"], 1)
+        self.assertGreaterEqual(self.fake.stats["ranged"], 1)
+        self.assertLess(self.fake.stats["bytes"], SIZE * 1.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""The LAN mirror in front of ``benchmarks.fake_mojang``: what goes to the object store and what doesn't."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import urllib.request
+
+from benchmarks.fake_mojang import FakeMojang
+from mineengine.mirror import MirrorServer, mirror_url
+
+RUNTIME_HASH = "2ec0cc96c44e5a76b9c8b8c39b1b6b0e6b8a3c79"  # Names the manifest, not its content
+
+
+class MirrorTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="mineengine-test-")
+        self.old_home = os.environ.get("MINEENGINE_HOME")
+        os.environ["MINEENGINE_HOME"] = os.path.join(self.workdir, "home")
+        os.makedirs(os.environ["MINEENGINE_HOME"])
+        with open(os.path.join(os.environ["MINEENGINE_HOME"], "config.json"), "w", encoding="utf-8") as f:
+            json.dump({"mirror_allowed_hosts": ["127.0.0.1"]}, f)
+        self.fake = FakeMojang(assets=1, libraries=1, client_mb=1, forge_libraries=1, filler_versions=1).start()
+        self.mirror = MirrorServer(host="127.0.0.1", port=0, cache_dir=os.path.join(self.workdir, "cache")).start()
+
+    def tearDown(self):
+        self.mirror.shutdown()
+        self.fake.shutdown()
+        if self.old_home is None:
+            os.environ.pop("MINEENGINE_HOME", None)
+        else:
+            os.environ["MINEENGINE_HOME"] = self.old_home
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def get(self, path):
+        with urllib.request.urlopen(mirror_url(self.mirror.address, self.fake.base + path)) as response:
+            return response.read()
+
+    def test_hash_named_document_is_not_an_object(self):
+        path = f"/v1/products/java-runtime/{RUNTIME_HASH}/all.json"
+        self.fake._add(path, b'{"linux": {}}')
+        self.assertEqual(self.get(path), b'{"linux": {}}')
+        self.assertEqual(self.mirror.stats["documents"], 1)
+        self.assertEqual(self.mirror.stats["objects_fetched"], 0)
+
+    def test_package_is_an_object(self):
+        data = b'{"id": "x"}'
+        sha1 = hashlib.sha1(data).hexdigest()
+        path = f"/v1/packages/{sha1}/x.json"
+        self.fake._add(path, data)
+        self.assertEqual(self.get(path), data)
+        self.assertEqual(self.get(path), data)
+        self.assertEqual(self.mirror.stats["objects_fetched"], 1)
+        self.assertEqual(self.mirror.stats["objects_hit"], 1)
+        self.assertEqual(self.mirror.stats["documents"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()